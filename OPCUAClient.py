@@ -1,41 +1,195 @@
+import asyncio
 import logging
+import time
 from datetime import datetime
 
-from asyncua import Client
+from asyncua import Client, ua
+
+import metrics
+import tracing
+from batchSizer import AdaptiveBatchSize
+from readPlan import ReadPlan
 
 logger = logging.getLogger(__name__)
 
+# Largest number of nodes per Read request, also caps the server's MaxNodesPerRead
+DEFAULT_MAX_NODES_PER_READ = 1000
+# MonitoredItems created per CreateMonitoredItems request
+DEFAULT_MAX_MONITORED_ITEMS_PER_CALL = 1000
+# Largest number of nodes per Browse / BrowseNext request
+DEFAULT_MAX_NODES_PER_BROWSE = 500
+# Largest number of browse paths per TranslateBrowsePathsToNodeIds request
+DEFAULT_MAX_NODES_PER_TRANSLATE = 1000
+# Server.ServerCapabilities.OperationLimits properties read on connect
+OPERATION_LIMIT_NAMES = (
+    "MaxNodesPerRead",
+    "MaxNodesPerBrowse",
+    "MaxNodesPerTranslateBrowsePathsToNodeIds",
+    "MaxMonitoredItemsPerCall",
+)
+# Key under which a variable's value is kept when another variable's path continues below it
+LEAF_VALUE_KEY = "_value"
+# Schema key that sets the polling interval (seconds) of the subtree it appears in
+SCHEMA_INTERVAL_KEY = "_publish_interval"
+
 
 class OPCUAClient:
-    def __init__(self, endpoint, namespace_name=None):
+    def __init__(self, endpoint, namespace_name=None, discovery_refresh_interval=0, node_cache=None):
         self.endpoint = endpoint
         self.namespace_name = namespace_name
         self.client = Client(endpoint)
         self.namespace_index = None
         self.namespace_map = {}  # Maps namespace URI to server index
         self.is_connected = False
+        self.nodeset_plan = None  # Compiled ReadPlan for NodeSet mode, reset when namespaces change
+        self.schema_plan = None  # Compiled ReadPlan for legacy schema mode, reset when namespaces change
+        self.discovery_plan = None  # Cached auto-discovery result, reset per session
+        self.discovery_refresh_interval = discovery_refresh_interval  # Seconds, 0 = per session only
+        self._discovery_namespaces = None
+        self._discovery_time = 0.0
+        self.node_cache = node_cache  # Optional persistent NodeCache
+        self.operation_limits = None  # OperationLimits of the server, 0 where not advertised
+        self._apply_operation_limits(dict.fromkeys(OPERATION_LIMIT_NAMES, 0))
+        self.subscriptions = []
+        self._session_token = None  # AuthenticationToken of the last session, for reactivation
+        self._namespaces = None  # Namespace array the plans were resolved against
 
     async def connect(self):
-        """Connect to the OPC UA server and retrieve the namespace index."""
-        # Create a fresh client instance for each connection attempt
+        """
+        Connect to the OPC UA server and retrieve the namespace index.
+
+        After a connection loss, the previous session is first reactivated on a new
+        SecureChannel, which keeps plans and subscriptions. If the server no longer
+        holds the session, a new one is created; plans are kept as long as the
+        server's namespace array is unchanged, except for auto-discovery results.
+        """
+        if self._session_token is not None:
+            try:
+                await self._reactivate_session()
+                metrics.RECONNECTS.inc(endpoint=self.endpoint, session="reactivated")
+                self.is_connected = True
+                logger.info("Reactivated existing OPC UA session")
+                return
+            except Exception as e:
+                logger.info(f"Could not reactivate OPC UA session, creating a new one: {e}")
+                self._session_token = None
+                await self._stop_session_tasks()
+                self.client.disconnect_socket()
+
+        # Create a fresh client instance for each new session
         # This prevents issues with stale connection state
         self.client = Client(self.endpoint)
         await self.client.connect()
+        first_session = self._namespaces is None
+        try:
+            await self._setup_session(first_session)
+        except Exception:
+            # Close the half-open session so the next attempt does not reactivate it
+            if first_session:
+                self._namespaces = None
+            try:
+                await self.client.disconnect()
+            except Exception as e:
+                logger.debug(f"Error closing incomplete session: {e}")
+            raise
+
+        # Only a fully set up session is reactivated after a connection loss
+        self._session_token = self.client.uaclient.protocol.authentication_token
+        if not first_session:
+            metrics.RECONNECTS.inc(endpoint=self.endpoint, session="new")
+        self.is_connected = True
+        logger.info("Successfully connected to OPC UA server")
+
+    async def _setup_session(self, first_session):
+        """
+        Prepare a newly created session: namespaces, plans, operation limits and node cache.
+
+        :param first_session: True for the first session of the process
+        """
+        # Subscriptions belong to the previous session; the address space may have changed
+        self.subscriptions = []
+        self.discovery_plan = None
 
         # Build namespace URI to index map
         namespaces = await self.client.get_namespace_array()
+        if list(namespaces) != self._namespaces:
+            # Resolved NodeIds are only valid for the namespace array they were resolved against
+            self.nodeset_plan = None
+            self.schema_plan = None
+        # Kept plans still hold Nodes of the previous client
+        for plan in (self.nodeset_plan, self.schema_plan):
+            if plan is not None:
+                plan.bind(self.client)
+        self._namespaces = list(namespaces)
         self.namespace_map = {uri: idx for idx, uri in enumerate(namespaces)}
         logger.debug(f"Namespace map: {self.namespace_map}")
 
+        # Batch sizes learned in the previous session are kept if the limits did not change
+        limits = await self._read_operation_limits()
+        if limits != self.operation_limits:
+            self._apply_operation_limits(limits)
+
         # Get primary namespace index if namespace_name is provided
         if self.namespace_name:
             self.namespace_index = await self.get_namespace_index(self.namespace_name)
 
-        self.is_connected = True
-        logger.info("Successfully connected to OPC UA server")
+        # Select the persistent cache entry, discarding it if the server changed. Cached
+        # NodeIds only save the first browse after a process start; a new session after
+        # a connection loss browses again, as does a server without a known start time
+        if self.node_cache is not None:
+            fingerprint = await self._read_server_fingerprint()
+            reuse = first_session and fingerprint["start_time"] is not None
+            self.node_cache.bind(self.endpoint, namespaces, fingerprint, reuse)
+
+    async def _reactivate_session(self):
+        """
+        Open a new socket and SecureChannel on the existing client and activate the
+        previous session on it. Raises if the server rejects the session, e.g.
+        because it timed out.
+
+        asyncua has no public API for this, so it relies on private Client state of the
+        pinned asyncua version: _renew_channel_task, _monitor_server_task, _username,
+        _password, uaclient._publish_task, uaclient._publish_loop and
+        uaclient.protocol.authentication_token. Check them when upgrading asyncua.
+        """
+        client = self.client
+        await self._stop_session_tasks()
+        client.disconnect_socket()
+
+        await client.connect_socket()
+        # The new socket protocol starts without a session; requests carry the old token
+        client.uaclient.protocol.authentication_token = self._session_token
+        await client.send_hello()
+        await client.open_secure_channel()
+        await client.activate_session(
+            username=client._username, password=client._password, certificate=client.user_certificate
+        )
+
+        # Restart the keep-alive, channel renewal and publishing tasks of the session
+        client._renew_channel_task = asyncio.create_task(client._renew_channel_loop())
+        client._monitor_server_task = asyncio.create_task(client._monitor_server_loop())
+        if self.subscriptions:
+            client.uaclient._publish_task = asyncio.create_task(client.uaclient._publish_loop())
+
+    async def _stop_session_tasks(self):
+        """Cancel the background tasks of the current session, which may still be running."""
+        tasks = [
+            self.client._renew_channel_task,
+            self.client._monitor_server_task,
+            self.client.uaclient._publish_task,
+        ]
+        tasks = [task for task in tasks if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # asyncua checks these tasks before every request
+        self.client._renew_channel_task = None
+        self.client._monitor_server_task = None
+        self.client.uaclient._publish_task = None
 
     async def disconnect(self):
         """Disconnect from the OPC UA server."""
+        self._session_token = None
         try:
             await self.client.disconnect()
             self.is_connected = False
@@ -44,6 +198,135 @@ class OPCUAClient:
             logger.warning(f"Error during disconnect: {e}")
             self.is_connected = False
 
+    async def _read_operation_limits(self):
+        """
+        Read the server's OperationLimits in a single Read request.
+
+        :return: Dictionary of OPERATION_LIMIT_NAMES to limits, 0 where the server does not advertise one
+        """
+        plan = ReadPlan()
+        for name in OPERATION_LIMIT_NAMES:
+            nodeid = getattr(ua.ObjectIds, f"Server_ServerCapabilities_OperationLimits_{name}")
+            plan.add(self.client.get_node(nodeid), [name])
+
+        limits = dict.fromkeys(OPERATION_LIMIT_NAMES, 0)
+        try:
+            data_values = await self.read_plan(plan)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            logger.debug(f"Server does not expose OperationLimits: {e}")
+            return limits
+
+        for name, data_value in zip(OPERATION_LIMIT_NAMES, data_values):
+            if data_value.StatusCode.is_good() and data_value.Value is not None and data_value.Value.Value:
+                limits[name] = int(data_value.Value.Value)
+        logger.debug(f"Server OperationLimits: {limits}")
+        return limits
+
+    def _apply_operation_limits(self, limits):
+        """Size read, browse, translate and MonitoredItem batches from the server's OperationLimits."""
+        self.operation_limits = limits
+        self.read_batch_size = AdaptiveBatchSize(limits["MaxNodesPerRead"], DEFAULT_MAX_NODES_PER_READ)
+        self.browse_batch_size = AdaptiveBatchSize(limits["MaxNodesPerBrowse"], DEFAULT_MAX_NODES_PER_BROWSE)
+        self.translate_batch_size = AdaptiveBatchSize(
+            limits["MaxNodesPerTranslateBrowsePathsToNodeIds"], DEFAULT_MAX_NODES_PER_TRANSLATE
+        )
+        self.max_monitored_items_per_call = min(
+            limits["MaxMonitoredItemsPerCall"] or DEFAULT_MAX_MONITORED_ITEMS_PER_CALL,
+            DEFAULT_MAX_MONITORED_ITEMS_PER_CALL,
+        )
+
+    def _batch_rejected(self, batch_size, error, service):
+        """
+        Shrink batch_size if the server rejected a request as too large.
+
+        :return: True if the request should be retried with the smaller batch size
+        """
+        too_large = (
+            ua.StatusCodes.BadTooManyOperations,
+            ua.StatusCodes.BadResponseTooLarge,
+            ua.StatusCodes.BadRequestTooLarge,
+            ua.StatusCodes.BadEncodingLimitsExceeded,
+        )
+        if error.code not in too_large or not batch_size.reject():
+            return False
+        logger.warning(f"Server rejected {service} request as too large, reducing batch size to {batch_size.size}")
+        return True
+
+    async def _read_server_fingerprint(self):
+        """
+        Summarize the server's ServerStatus StartTime, BuildInfo BuildDate and namespace
+        metadata to validate cached NodeIds, so a restarted or updated server is browsed again.
+        StartTime and BuildDate are None if the server does not return them.
+        """
+        plan = ReadPlan()
+        for object_id in (
+            ua.ObjectIds.Server_ServerStatus_StartTime,
+            ua.ObjectIds.Server_ServerStatus_BuildInfo_BuildDate,
+        ):
+            nodeid = ua.NodeId(object_id)
+            plan.add(self.client.get_node(nodeid), [str(nodeid)])
+        try:
+            values = self._values_from_data_values(plan, await self.read_plan(plan))
+        except ConnectionError:
+            raise
+        except Exception as e:
+            logger.debug(f"Could not read server status: {e}")
+            values = [None, None]
+        start_time, build_date = (str(value) if value is not None else None for value in values)
+        return {
+            "start_time": start_time,
+            "build_date": build_date,
+            "namespaces": await self._read_namespace_fingerprint(),
+        }
+
+    async def _read_namespace_fingerprint(self):
+        """
+        Summarize the server's NamespaceMetadata objects (NamespaceUri, NamespaceVersion,
+        NamespacePublicationDate) to validate cached NodeIds.
+        Returns an empty list if the server does not expose namespace metadata.
+        """
+        try:
+            metadata_refs = (
+                await self.browse_references(
+                    [ua.NodeId(ua.ObjectIds.Server_Namespaces)], ua.NodeClass.Object
+                )
+            )[0]
+            property_names = ("NamespaceUri", "NamespaceVersion", "NamespacePublicationDate")
+            browse_paths = [
+                self._make_browse_path(ref.NodeId, [ua.QualifiedName(Name=name, NamespaceIndex=0)])
+                for ref in metadata_refs
+                for name in property_names
+            ]
+            nodeids = await self._translate_browse_paths(browse_paths)
+
+            plan = ReadPlan()
+            for nodeid in nodeids:
+                if nodeid is not None:
+                    plan.add(self.client.get_node(nodeid), [str(nodeid)])
+            values = iter(self._values_from_data_values(plan, await self.read_plan(plan)))
+            properties = [str(next(values)) if nodeid is not None else None for nodeid in nodeids]
+        except ConnectionError:
+            raise
+        except Exception as e:
+            logger.debug(f"Could not read namespace metadata: {e}")
+            return []
+
+        count = len(property_names)
+        return sorted(properties[i : i + count] for i in range(0, len(properties), count))
+
+    async def check_connection(self):
+        """
+        Raise ConnectionError if the session's background tasks (keep-alive,
+        channel renewal, subscription publishing) have stopped.
+        """
+        try:
+            await self.client.check_connection()
+        except Exception as e:
+            self.is_connected = False
+            raise ConnectionError(f"OPC UA connection lost: {e}") from e
+
     async def get_namespace_index(self, namespace_name):
         """Retrieve the namespace index from the server based on its name."""
         namespaces = await self.client.get_namespace_array()
@@ -53,25 +336,6 @@ class OPCUAClient:
         else:
             raise ValueError(f"Namespace '{namespace_name}' not found in server: {namespaces}")
 
-    async def resolve_node_by_full_path(self, path_parts):
-        """
-        Resolves an OPC UA node using a full hierarchical path (supports deep structures).
-
-        :param path_parts: A list of path components (e.g., ["Device1", "Sensors", "Temperature"]).
-        :return: The resolved OPC UA node, or None if not found.
-        """
-        try:
-            # Construct the full path for get_child()
-            node_path = ["0:Objects"] + [f"{self.namespace_index}:{part}" for part in path_parts]
-
-            # Fetch the node dynamically
-            node = await self.client.nodes.root.get_child(node_path)
-            logger.debug(f"Resolved Path {' → '.join(path_parts)} -> {node.nodeid}")
-            return node
-        except Exception as e:
-            logger.warning(f"Failed to resolve path {' → '.join(path_parts)}: {e}")
-            return None
-
     def _extract_namespace_from_nodeset(self, nodeset):
         """
         Extract namespace URI from NodeSet JSON if present.
@@ -132,19 +396,14 @@ class OPCUAClient:
 
         return (ns, identifier)
 
-    async def extract_variable_nodes_from_nodeset(self, nodeset):
+    def _get_nodeset_variable_defs(self, nodeset):
         """
-        Extract variable nodes from a NodeSet JSON structure.
-        Returns a list of (browse_name, node_obj, display_name, namespace_index) tuples for Variable nodes.
+        Return the Variable node definitions of a NodeSet JSON structure,
+        paired with their BrowseName and DisplayName as plain strings.
 
         :param nodeset: List of node dictionaries from NodeSet JSON, or full NodeSet with UAVariables
-        :return: List of (browse_name, node_obj, display_name, namespace_index) tuples
+        :return: List of (node_def, browse_name, display_name) tuples
         """
-        variable_nodes = []
-
-        # Build namespace mapping from NodeSet to server
-        ns_map = self._build_nodeset_namespace_map(nodeset)
-
         # Handle full NodeSet structure with UAVariables key
         if isinstance(nodeset, dict) and "UAVariables" in nodeset:
             nodes = nodeset.get("UAVariables", [])
@@ -154,12 +413,12 @@ class OPCUAClient:
         else:
             nodes = [nodeset]
 
+        variable_defs = []
         for node_def in nodes:
             # Check if this is a Variable node
             node_class = node_def.get("NodeClass", "")
 
             if node_class == "Variable" or node_class == 2:  # 2 is Variable in numeric form
-                node_id_def = node_def.get("NodeId")
                 browse_name = node_def.get("BrowseName", "")
                 display_name = node_def.get("DisplayName", browse_name)
 
@@ -169,209 +428,413 @@ class OPCUAClient:
                 if isinstance(display_name, dict):
                     display_name = display_name.get("Text", browse_name)
 
-                if not node_id_def:
-                    logger.warning(f"Node {browse_name} has no NodeId, skipping")
-                    continue
+                variable_defs.append((node_def, browse_name, display_name))
+
+        return variable_defs
+
+    def _parse_interval(self, interval, name):
+        """
+        Parse a configured polling interval in seconds.
+        Returns None (use the default interval) if it is missing or invalid.
+        """
+        if interval is None:
+            return None
+        try:
+            seconds = float(interval)
+        except (TypeError, ValueError):
+            seconds = 0
+        if seconds <= 0:
+            logger.warning(f"Ignoring invalid publish interval {interval!r} for {name}")
+            return None
+        return seconds
 
-                # Try to get the node from the server
-                try:
-                    nodeset_ns, identifier = self._parse_nodeid(node_id_def)
+    def _resolve_nodeset_nodeid(self, node_id_def, ns_map):
+        """
+        Translate a NodeSet NodeId definition into a NodeId string on the server.
+        Returns a tuple (nodeid_string, server_namespace_index).
+        """
+        nodeset_ns, identifier = self._parse_nodeid(node_id_def)
 
-                    # Map NodeSet namespace index to server namespace index
-                    actual_ns = ns_map.get(nodeset_ns, nodeset_ns)
+        # Map NodeSet namespace index to server namespace index
+        actual_ns = ns_map.get(nodeset_ns, nodeset_ns)
 
-                    # Determine if identifier is integer or string
-                    if isinstance(identifier, str) and identifier.isdigit():
-                        # Integer identifier
-                        node_obj = self.client.get_node(f"ns={actual_ns};i={identifier}")
-                    else:
-                        # String identifier
-                        node_obj = self.client.get_node(f"ns={actual_ns};s={identifier}")
+        # Determine if identifier is integer or string
+        if isinstance(identifier, str) and identifier.isdigit():
+            # Integer identifier
+            return f"ns={actual_ns};i={identifier}", actual_ns
+        # String identifier
+        return f"ns={actual_ns};s={identifier}", actual_ns
 
-                    variable_nodes.append((browse_name, node_obj, display_name, actual_ns))
-                    logger.debug(
-                        f"Found variable node: {browse_name} (ns={actual_ns};i={identifier})"
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not resolve node {browse_name} ({node_id_def}): {e}")
+    def _nodeset_output_path(self, node_def, browse_name, display_name, ns_index):
+        """
+        Derive the output path of a NodeSet variable.
+
+        Uses the explicit Path field, or the dotted string identifier of the NodeId,
+        prefixed with the namespace (e.g. ["ns2", "Machine1", "Tank", "Temperature"]).
+        Falls back to a single flat name taken from DisplayName or BrowseName.
+        """
+        path_parts = None
+
+        # 1. Check for explicit Path field (preferred)
+        if "Path" in node_def:
+            path_str = node_def["Path"]
+            if isinstance(path_str, str) and path_str:
+                path_parts = path_str.split(".")
+
+        # 2. Try NodeId string identifier (e.g., "ns=1;s=Machine.Tank.Temperature")
+        if not path_parts:
+            node_id = node_def.get("NodeId", "")
+            if isinstance(node_id, str) and ";s=" in node_id:
+                id_part = node_id.split(";s=")[-1]
+                if "." in id_part:
+                    path_parts = id_part.split(".")
+            elif isinstance(node_id, dict):
+                id_val = node_id.get("Id", "")
+                if isinstance(id_val, str) and "." in id_val:
+                    path_parts = id_val.split(".")
+
+        # Prefix namespace to path (creates separate root for each namespace)
+        if path_parts:
+            return [f"ns{ns_index}"] + path_parts
+
+        # Fallback: use display name or browse name
+        clean_name = browse_name.split(":")[-1] if ":" in browse_name else browse_name
+        if display_name and display_name != browse_name:
+            clean_name = display_name
+        return [clean_name]
+
+    def build_nodeset_read_plan(self, nodeset):
+        """
+        Compile a NodeSet JSON structure into a ReadPlan for the current session.
+
+        Namespace mapping, NodeId parsing and output path derivation happen once here
+        instead of on every read cycle.
+
+        :param nodeset: NodeSet JSON structure (list of node definitions)
+        :return: ReadPlan with one entry per resolvable Variable node
+        """
+        plan = ReadPlan(source=nodeset)
+
+        # Build namespace mapping from NodeSet to server
+        ns_map = self._build_nodeset_namespace_map(nodeset)
+
+        for node_def, browse_name, display_name in self._get_nodeset_variable_defs(nodeset):
+            node_id_def = node_def.get("NodeId")
+            if not node_id_def:
+                logger.warning(f"Node {browse_name} has no NodeId, skipping")
+                continue
+
+            try:
+                nodeid_str, actual_ns = self._resolve_nodeset_nodeid(node_id_def, ns_map)
+                node_obj = self.client.get_node(nodeid_str)
+            except Exception as e:
+                logger.warning(f"Could not resolve node {browse_name} ({node_id_def}): {e}")
+                continue
+
+            path_parts = self._nodeset_output_path(node_def, browse_name, display_name, actual_ns)
+            plan.add(node_obj, path_parts, self._parse_interval(node_def.get("PublishInterval"), browse_name))
+            logger.debug(f"Planned variable node: {'.'.join(path_parts)} ({nodeid_str})")
+
+        logger.info(f"Compiled NodeSet read plan with {len(plan)} variables")
+        return plan
+
+    def get_nodeset_read_plan(self, nodeset):
+        """
+        Return the compiled ReadPlan for a NodeSet, compiling it on first use.
+        The plan is re-used until the session is re-established or a different
+        configuration object is passed in.
+        """
+        if self.nodeset_plan is None or self.nodeset_plan.source is not nodeset:
+            with tracing.trace("resolve", endpoint=self.endpoint, mode="nodeset") as span:
+                self.nodeset_plan = self.build_nodeset_read_plan(nodeset)
+                span.set(variables=len(self.nodeset_plan))
+        return self.nodeset_plan
+
+    def _make_browse_path(self, starting_node, target_names):
+        """
+        Build a ua.BrowsePath following hierarchical references from starting_node
+        through the given QualifiedNames.
+        """
+        relative_path = ua.RelativePath()
+        for target in target_names:
+            element = ua.RelativePathElement()
+            element.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+            element.IsInverse = False
+            element.IncludeSubtypes = True
+            element.TargetName = target
+            relative_path.Elements.append(element)
+
+        browse_path = ua.BrowsePath()
+        browse_path.StartingNode = starting_node
+        browse_path.RelativePath = relative_path
+        return browse_path
+
+    async def _translate_browse_paths(self, browse_paths):
+        """
+        Send ua.BrowsePaths in batched TranslateBrowsePathsToNodeIds requests.
+
+        :return: List of the first target NodeId per path (None where unresolved)
+        """
+        nodeids = []
+        start = 0
+        while start < len(browse_paths):
+            batch = browse_paths[start : start + self.translate_batch_size.size]
+            began = time.monotonic()
+            try:
+                with tracing.span("translate", paths=len(batch)):
+                    results = await self.client.uaclient.translate_browsepaths_to_nodeids(batch)
+            except ua.UaStatusCodeError as e:
+                if self._batch_rejected(self.translate_batch_size, e, "TranslateBrowsePathsToNodeIds"):
+                    continue
+                raise
+            self.translate_batch_size.record(len(batch), time.monotonic() - began)
+            start += len(batch)
+            for result in results:
+                if result.StatusCode.is_good() and result.Targets:
+                    nodeids.append(result.Targets[0].TargetId)
+                else:
+                    nodeids.append(None)
+        return nodeids
 
-        return variable_nodes
+    async def translate_browse_paths(self, paths):
+        """
+        Resolve many browse paths below the Objects folder with batched
+        TranslateBrowsePathsToNodeIds requests. Paths found in the persistent
+        node cache are not sent to the server.
 
-    async def extract_leaf_nodes(self, schema, parent_path_parts=None):
+        :param paths: List of path component lists (e.g. [["Tank", "Temperature"]]),
+                      all in the primary namespace
+        :return: List of resolved NodeIds (None where unresolved), in the order of paths
+        """
+        root = ua.NodeId(ua.ObjectIds.RootFolder)
+        objects_name = ua.QualifiedName(Name="Objects", NamespaceIndex=0)
+
+        keys = ["/".join(f"{self.namespace_index}:{part}" for part in path_parts) for path_parts in paths]
+        cached = self.node_cache.get_paths(keys) if self.node_cache is not None else {}
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        browse_paths = [
+            self._make_browse_path(
+                root,
+                [objects_name]
+                + [ua.QualifiedName(Name=part, NamespaceIndex=self.namespace_index) for part in paths[i]],
+            )
+            for i in missing
+        ]
+        resolved = dict(zip(missing, await self._translate_browse_paths(browse_paths)))
+        if missing:
+            logger.debug(f"Translated {len(missing)} browse paths ({len(cached)} cached)")
+
+        nodeids = []
+        newly_resolved = {}
+        for i, (path_parts, key) in enumerate(zip(paths, keys)):
+            if key in cached:
+                nodeids.append(ua.NodeId.from_string(cached[key]))
+                continue
+            nodeid = resolved[i]
+            if nodeid is None:
+                logger.warning(f"Failed to resolve path {' → '.join(path_parts)}")
+            elif self.node_cache is not None:
+                newly_resolved[key] = nodeid.to_string()
+            nodeids.append(nodeid)
+
+        if newly_resolved:
+            self.node_cache.set_paths(newly_resolved)
+            self.node_cache.save()
+
+        return nodeids
+
+    def _collect_schema_leaves(self, schema, parent_path_parts=None, interval=None):
         """
-        Recursively extract OPC UA variable node paths and dynamically resolve nodes.
-        Returns a list of (full_opcua_path_string, node_id, schema_parent_path, schema_key_for_variable, opcua_variable_name) tuples.
+        Collect the leaves of a legacy schema without resolving them.
+        A subtree may set its own polling interval with a "_publish_interval" key,
+        which is inherited by nested subtrees unless they set their own.
+        Returns a list of (schema_parent_path, schema_key_for_variable, opcua_variable_name, interval) tuples.
         """
         if parent_path_parts is None:
             parent_path_parts = []
 
-        leaf_nodes_info = []
+        if SCHEMA_INTERVAL_KEY in schema:
+            name = ".".join(parent_path_parts) or "schema root"
+            interval = self._parse_interval(schema[SCHEMA_INTERVAL_KEY], name) or interval
 
+        leaves = []
         for key, value in schema.items():
-            # This 'key' is the one we want to keep in the final output, e.g., "Tank" or "Status"
-            current_schema_key = key
-            current_schema_parent_path = (
-                parent_path_parts  # The path to the parent of 'current_schema_key'
-            )
-
+            if key == SCHEMA_INTERVAL_KEY:
+                continue
             if isinstance(value, dict):
-                # If it's a subtree, recurse and extend the list
-                leaf_nodes_info.extend(
-                    await self.extract_leaf_nodes(value, parent_path_parts + [current_schema_key])
-                )
+                leaves.extend(self._collect_schema_leaves(value, parent_path_parts + [key], interval))
             else:
-                # 'value' is the OPC UA variable name (e.g., "Temperature", "Voltage")
-                opcua_variable_name = value
-
-                # The full path to the OPC UA node includes the schema path and the OPC UA variable name
-                # E.g., if schema_path is ['Tank'] and opcua_variable_name is 'Temperature', OPC UA path might be ['Tank', 'Temperature']
-                opcua_full_path_parts = parent_path_parts + [
-                    current_schema_key,
-                    opcua_variable_name,
-                ]
-
-                node = await self.resolve_node_by_full_path(opcua_full_path_parts)
-                if node:
-                    node_id = node.nodeid
-                    full_opcua_path_string = ".".join(opcua_full_path_parts)
-                    logger.debug(f"Resolved {full_opcua_path_string} -> {node_id}")
-                    # Store (OPC UA full path string, NodeId, parent path in original schema, key for this variable, actual OPC UA variable name)
-                    leaf_nodes_info.append(
-                        (
-                            full_opcua_path_string,
-                            node_id,
-                            current_schema_parent_path,
-                            current_schema_key,
-                            opcua_variable_name,
-                        )
-                    )
-                else:
-                    logger.warning(
-                        f"Could not resolve {'.'.join(opcua_full_path_parts)} to a node ID"
-                    )
-
-        return leaf_nodes_info
+                leaves.append((parent_path_parts, key, value, interval))
+        return leaves
 
-    def _build_nested_dict(self, path_parts, value):
+    async def build_schema_read_plan(self, schema):
         """
-        Build a nested dictionary from a path and value.
-        E.g., ["Machine1", "Tank", "Temperature"], 65.3
-        -> {"Machine1": {"Tank": {"Temperature": 65.3}}}
+        Compile a legacy schema into a ReadPlan for the current session.
+        All leaf paths are resolved together with batched TranslateBrowsePathsToNodeIds calls.
+        Each resolved leaf is planned under its schema path plus the OPC UA variable name,
+        e.g. {"Tank": "Temperature"} -> ["Tank", "Temperature"].
+
+        :param schema: JSON-like dictionary defining the OPC UA structure.
+        :return: ReadPlan with one entry per resolvable leaf
         """
-        if len(path_parts) == 1:
-            return {path_parts[0]: value}
+        plan = ReadPlan(source=schema)
+
+        leaves = self._collect_schema_leaves(schema)
+        opcua_paths = [parent + [key, variable] for parent, key, variable, _ in leaves]
+        nodeids = await self.translate_browse_paths(opcua_paths)
 
-        result = {}
-        current = result
-        for i, part in enumerate(path_parts[:-1]):
-            current[part] = {}
-            current = current[part]
-        current[path_parts[-1]] = value
+        for path_parts, nodeid, leaf in zip(opcua_paths, nodeids, leaves):
+            if nodeid is not None:
+                plan.add(self.client.get_node(nodeid), path_parts, leaf[3])
+                logger.debug(f"Resolved {'.'.join(path_parts)} -> {nodeid}")
 
-        return result
+        logger.info(f"Compiled schema read plan with {len(plan)} of {len(leaves)} leaves resolved")
+        return plan
 
-    def _merge_nested_dicts(self, dict1, dict2):
+    async def get_schema_read_plan(self, schema):
         """
-        Recursively merge two nested dictionaries.
+        Return the compiled ReadPlan for a legacy schema, resolving it on first use.
+        The plan is re-used until the session is re-established or a different
+        configuration object is passed in.
         """
-        result = dict1.copy()
+        if self.schema_plan is None or self.schema_plan.source is not schema:
+            with tracing.trace("resolve", endpoint=self.endpoint, mode="schema") as span:
+                self.schema_plan = await self.build_schema_read_plan(schema)
+                span.set(variables=len(self.schema_plan))
+        return self.schema_plan
 
-        for key, value in dict2.items():
-            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-                result[key] = self._merge_nested_dicts(result[key], value)
-            else:
-                result[key] = value
+    def _insert_path(self, tree, path_parts, value):
+        """
+        Insert a value into a nested dictionary in place, creating missing levels.
 
-        return result
+        If a path ends where another one continues (e.g. "Motor" and "Motor.Speed"),
+        the value of the shorter path is kept under "_value" in the subtree,
+        whichever of the two is inserted first.
+        """
+        node = tree
+        for part in path_parts[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = {LEAF_VALUE_KEY: child} if part in node else {}
+                node[part] = child
+            node = child
+
+        last = path_parts[-1]
+        if isinstance(node.get(last), dict):
+            node[last][LEAF_VALUE_KEY] = value
+        else:
+            node[last] = value
 
-    async def read_from_nodeset(self, nodeset):
+    def build_data_from_plan(self, plan, values):
         """
-        Extract and read data from OPC UA server based on NodeSet JSON structure.
+        Assemble the nested data structure for a ReadPlan from its values.
+        The tree is built in place in a single pass over the pre-split paths.
 
-        :param nodeset: NodeSet JSON structure (list of node definitions)
-        :return: Dictionary with timestamp and data populated with values.
+        :param plan: Compiled ReadPlan
+        :param values: Values in plan order
+        :return: Nested dictionary keyed by the plan's output paths
         """
-        tsp = datetime.now().astimezone().isoformat()
         data = {}
+        for path_parts, value in zip(plan.path_parts, values):
+            self._insert_path(data, path_parts, value)
+        return data
 
-        # Extract variable nodes from the NodeSet
-        variable_nodes = await self.extract_variable_nodes_from_nodeset(nodeset)
-
-        if not variable_nodes:
-            logger.warning("No variable nodes found in NodeSet")
-            return {"tsp": tsp, "data": data}
+    async def read_plan(self, plan):
+        """
+        Read the current values of all variables in a ReadPlan.
 
-        # Prepare for bulk reading
-        nodes_to_read = [node_obj for _, node_obj, _, _ in variable_nodes]
+        Issues one Read service call per batch, sized by read_batch_size. If the
+        server rejects a batch as too large, the read is repeated with smaller
+        batches. Nodes that cannot be read come back as DataValues with a bad
+        StatusCode instead of raising.
 
-        # Read values directly from each node
-        values = []
-        for node in nodes_to_read:
+        :param plan: Compiled ReadPlan
+        :return: List of ua.DataValue, in plan order
+        """
+        while True:
+            data_values = []
             try:
-                value = await node.read_value()
-                values.append(value)
-                logger.debug(f"Read value from {node.nodeid}: {value}")
+                for params in plan.read_batches(self.read_batch_size.size):
+                    began = time.monotonic()
+                    with tracing.span("read_batch", nodes=len(params.NodesToRead)):
+                        data_values.extend(await self.client.uaclient.read(params))
+                    elapsed = time.monotonic() - began
+                    self.read_batch_size.record(len(params.NodesToRead), elapsed)
+                    metrics.READ_BATCH_DURATION.observe(elapsed, endpoint=self.endpoint)
+                break
             except ConnectionError as e:
-                logger.warning(f"Connection lost while reading {node.nodeid}: {e}")
+                logger.warning(f"Connection lost while reading values: {e}")
                 self.is_connected = False
                 raise
-            except Exception as e:
-                logger.warning(f"Failed to read value from {node.nodeid}: {e}")
+            except ua.UaStatusCodeError as e:
+                if not self._batch_rejected(self.read_batch_size, e, "Read"):
+                    raise
+
+        metrics.NODES_READ.inc(len(data_values), endpoint=self.endpoint)
+        logger.debug(f"Read {len(data_values)} values from {len(plan)} nodes")
+        return data_values
+
+    def _values_from_data_values(self, plan, data_values):
+        """
+        Extract plain values from DataValues. Values with a non-good StatusCode become None.
+        """
+        values = []
+        bad_count = 0
+        for path, data_value in zip(plan.paths, data_values):
+            status = data_value.StatusCode
+            if status.is_good():
+                values.append(data_value.Value.Value if data_value.Value is not None else None)
+            else:
                 values.append(None)
+                bad_count += 1
+                logger.debug(f"Bad status for {path}: {status.name}")
 
-        logger.debug(f"Read {len(values)} values from {len(nodes_to_read)} nodes")
+        if bad_count:
+            metrics.BAD_STATUS.inc(bad_count, endpoint=self.endpoint)
+            logger.warning(f"{bad_count} of {len(plan)} nodes returned a bad StatusCode")
+        return values
 
-        # Build nested structure from NodeSet, grouped by namespace
-        for i, (browse_name, _node_obj, display_name, ns_index) in enumerate(variable_nodes):
-            value = values[i]
+    async def read_plan_data(self, plan):
+        """
+        Read all variables of a ReadPlan and assemble them into a data structure.
 
-            # Get the original node definition
-            if isinstance(nodeset, dict) and "UAVariables" in nodeset:
-                node_def = nodeset["UAVariables"][i] if i < len(nodeset["UAVariables"]) else {}
-            elif isinstance(nodeset, list):
-                node_def = nodeset[i] if i < len(nodeset) else {}
-            else:
-                node_def = {}
-
-            # Try to get path from multiple sources (in priority order)
-            path_parts = None
-
-            # 1. Check for explicit Path field (preferred)
-            if "Path" in node_def:
-                path_str = node_def["Path"]
-                if isinstance(path_str, str) and path_str:
-                    path_parts = path_str.split(".")
-
-            # 2. Try NodeId string identifier (e.g., "ns=1;s=Machine.Tank.Temperature")
-            if not path_parts:
-                node_id = node_def.get("NodeId", "")
-                if isinstance(node_id, str) and ";s=" in node_id:
-                    id_part = node_id.split(";s=")[-1]
-                    if "." in id_part:
-                        path_parts = id_part.split(".")
-                elif isinstance(node_id, dict):
-                    id_val = node_id.get("Id", "")
-                    if isinstance(id_val, str) and "." in id_val:
-                        path_parts = id_val.split(".")
-
-            # Prefix namespace to path (creates separate root for each namespace)
-            if path_parts and len(path_parts) > 0:
-                path_parts = [f"ns{ns_index}"] + path_parts
-
-            # Build nested structure from path
-            if path_parts and len(path_parts) > 1:
-                nested = self._build_nested_dict(path_parts, value)
-                data = self._merge_nested_dicts(data, nested)
-                logger.debug(f"Added nested variable: {'.'.join(path_parts)} = {value}")
-            else:
-                # Fallback: use display name or browse name
-                clean_name = browse_name.split(":")[-1] if ":" in browse_name else browse_name
-                if display_name and display_name != browse_name:
-                    clean_name = display_name
-                data[clean_name] = value
-                logger.debug(f"Added flat variable: {clean_name} = {value}")
+        :param plan: Compiled ReadPlan
+        :return: Dictionary with timestamp and the values nested by their output paths.
+        """
+        tsp, values = await self.read_plan_values(plan)
+        return {"tsp": tsp, "data": self.build_data_from_plan(plan, values)}
 
-        return {"tsp": tsp, "data": data}
+    async def read_plan_values(self, plan, with_status=False):
+        """
+        Read all variables of a ReadPlan as plain values.
+
+        :param plan: Compiled ReadPlan
+        :param with_status: Also return the StatusCode values in plan order
+        :return: Tuple (tsp, values) with the read timestamp and the values in plan order,
+                 (tsp, values, statuses) with with_status
+        """
+        tsp = datetime.now().astimezone().isoformat()
+        data_values = await self.read_plan(plan)
+        values = self._values_from_data_values(plan, data_values)
+        if with_status:
+            return tsp, values, [data_value.StatusCode.value for data_value in data_values]
+        return tsp, values
+
+    async def read_from_nodeset(self, nodeset):
+        """
+        Extract and read data from OPC UA server based on NodeSet JSON structure.
+
+        :param nodeset: NodeSet JSON structure (list of node definitions)
+        :return: Dictionary with timestamp and data populated with values.
+        """
+        plan = self.get_nodeset_read_plan(nodeset)
+
+        if not plan:
+            logger.warning("No variable nodes found in NodeSet")
+            return {"tsp": datetime.now().astimezone().isoformat(), "data": {}}
+
+        return await self.read_plan_data(plan)
 
     async def read_from_schema(self, schema):
         """
@@ -382,77 +845,69 @@ class OPCUAClient:
         :return: Dictionary with timestamp and the schema populated with values.
         """
         # print('Reading from schema:', schema)
-        tsp = datetime.now().astimezone().isoformat()
-
-        # Create a deep copy of the schema to populate with values
-        populated_schema = self._deep_copy_schema(schema)
-
-        # Extract leaf nodes and their original path references
-        # leaf_nodes_info will contain (full_opcua_path_string, node_id, schema_parent_path, schema_key_for_variable, opcua_variable_name) tuples.
-        leaf_nodes_info = await self.extract_leaf_nodes(schema)
-        if not leaf_nodes_info:
+        plan = await self.get_schema_read_plan(schema)
+        if not plan:
             logger.warning("No leaf nodes found in schema")
             return {
-                "tsp": tsp,
-                "data": populated_schema,
+                "tsp": datetime.now().astimezone().isoformat(),
+                "data": self._deep_copy_schema(schema),
             }  # Return schema with unresolved values if no nodes found
 
-        # Prepare for bulk reading
-        nodes_to_read = []
-        node_id_to_schema_info = {}
-
-        for (
-            full_opcua_path_string,
-            node_id,
-            schema_parent_path,
-            schema_key_for_variable,
-            opcua_variable_name,
-        ) in leaf_nodes_info:
-            nodes_to_read.append(self.client.get_node(node_id))
-            # Store a reference back to the exact location in the populated_schema
-            node_id_to_schema_info[str(node_id)] = (
-                schema_parent_path,
-                schema_key_for_variable,
-                opcua_variable_name,
-            )
+        tsp, values = await self.read_plan_values(plan)
+        return {"tsp": tsp, "data": self.build_schema_data(schema, plan, values)}
 
-        if not nodes_to_read:
-            logger.warning("No nodes to read after resolution")
-            return {"tsp": tsp, "data": populated_schema}
+    def build_schema_data(self, schema, plan, values, schema_plan=None):
+        """
+        Populate a copy of a legacy schema with the values of its ReadPlan.
+        Leaves that could not be resolved stay None. If plan is an interval group of
+        schema_plan, the leaves of the other groups are left out.
+        """
+        # Create a deep copy of the schema to populate with values
+        populated_schema = self._deep_copy_schema(schema)
 
-        # Read values from nodes
-        try:
-            values = await self.client.read_values(nodes_to_read)
-        except ConnectionError as e:
-            logger.warning(f"Connection lost while reading values: {e}")
-            self.is_connected = False
-            raise
+        if schema_plan is not None and len(plan) < len(schema_plan):
+            own_paths = set(plan.path_parts)
+            for path_parts in schema_plan.path_parts:
+                if path_parts not in own_paths:
+                    levels = [populated_schema]
+                    for part_key in path_parts[:-2]:
+                        levels.append(levels[-1].get(part_key))
+                    levels[-1].pop(path_parts[-2], None)
+                    # Drop the parents left empty, e.g. an object polled entirely by another group
+                    for depth in range(len(levels) - 1, 0, -1):
+                        if levels[depth]:
+                            break
+                        levels[depth - 1].pop(path_parts[depth - 1], None)
 
         # Populate the schema with the read values
-        for i, node in enumerate(nodes_to_read):
-            node_id_str = str(node.nodeid)
-            if node_id_str in node_id_to_schema_info:
-                schema_parent_path, schema_key_for_variable, opcua_variable_name = (
-                    node_id_to_schema_info[node_id_str]
-                )
-                read_value = values[i]
+        for path_parts, read_value in zip(plan.path_parts, values):
+            current_level = populated_schema
+            # Traverse to the parent dictionary where the schema key for the variable resides
+            for part_key in path_parts[:-2]:
+                current_level = current_level.get(part_key)
 
-                current_level = populated_schema
-                # Traverse to the parent dictionary where the 'schema_key_for_variable' resides
-                for part_key in schema_parent_path:
-                    current_level = current_level.get(part_key)
+            # Now, at 'current_level', the schema key (e.g., "Tank" or "Status") is the key
+            # we want to update. The value for this key should be a new dictionary like
+            # {"Temperature": 23.33}
+            current_level[path_parts[-2]] = {path_parts[-1]: read_value}
 
-                # Now, at 'current_level', 'schema_key_for_variable' (e.g., "Tank" or "Status")
-                # is the key we want to update.
-                # The value for this key should be a new dictionary like {"Temperature": 23.33}
-                current_level[schema_key_for_variable] = {opcua_variable_name: read_value}
+        return populated_schema
 
-        return {"tsp": tsp, "data": populated_schema}
+    def build_plan_data(self, plan, values):
+        """
+        Assemble the nested data structure for any compiled plan of this client.
+        The legacy schema plan and its interval groups keep the layout of the schema,
+        all other plans are nested by their output paths.
+        """
+        schema_plan = self.schema_plan
+        if schema_plan is not None and (plan is schema_plan or plan.source is schema_plan):
+            return self.build_schema_data(schema_plan.source, plan, values, schema_plan)
+        return self.build_data_from_plan(plan, values)
 
     def _deep_copy_schema(self, schema):
         """Recursively deep copies the schema structure, preparing for population."""
         if isinstance(schema, dict):
-            return {k: self._deep_copy_schema(v) for k, v in schema.items()}
+            return {k: self._deep_copy_schema(v) for k, v in schema.items() if k != SCHEMA_INTERVAL_KEY}
         elif isinstance(schema, list):
             return [self._deep_copy_schema(elem) for elem in schema]
         else:
@@ -460,6 +915,201 @@ class OPCUAClient:
             # we just return None initially. This will be overwritten with a dict.
             return None
 
+    async def browse_references(self, nodeids, node_class_mask):
+        """
+        Browse the hierarchical forward references of many nodes with batched
+        Browse requests, following BrowseNext continuation points.
+
+        Only BrowseName and NodeClass are requested, and the server filters the
+        targets by node class, so no extra attribute reads are needed per child.
+
+        :param nodeids: NodeIds of the parent nodes
+        :param node_class_mask: Bit mask of ua.NodeClass values to return
+        :return: List of ReferenceDescription lists, in the order of nodeids
+        """
+        references = [[] for _ in nodeids]
+        start = 0
+
+        while start < len(nodeids):
+            batch = list(range(start, min(start + self.browse_batch_size.size, len(nodeids))))
+
+            params = ua.BrowseParameters()
+            params.View = ua.ViewDescription()
+            params.RequestedMaxReferencesPerNode = 0
+            for index in batch:
+                desc = ua.BrowseDescription()
+                desc.NodeId = nodeids[index]
+                desc.BrowseDirection = ua.BrowseDirection.Forward
+                desc.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HierarchicalReferences)
+                desc.IncludeSubtypes = True
+                desc.NodeClassMask = node_class_mask
+                desc.ResultMask = ua.BrowseResultMask.BrowseName | ua.BrowseResultMask.NodeClass
+                params.NodesToBrowse.append(desc)
+
+            began = time.monotonic()
+            try:
+                with tracing.span("browse", nodes=len(batch)):
+                    results = await self.client.uaclient.browse(params)
+            except ua.UaStatusCodeError as e:
+                if self._batch_rejected(self.browse_batch_size, e, "Browse"):
+                    continue
+                raise
+            self.browse_batch_size.record(len(batch), time.monotonic() - began)
+            start += len(batch)
+
+            # Follow continuation points until every node is fully browsed
+            while True:
+                pending = []
+                for index, result in zip(batch, results):
+                    if not result.StatusCode.is_good():
+                        logger.debug(f"Browse of {nodeids[index]} failed: {result.StatusCode.name}")
+                        continue
+                    references[index].extend(result.References)
+                    if result.ContinuationPoint:
+                        pending.append((index, result.ContinuationPoint))
+                if not pending:
+                    break
+
+                next_params = ua.BrowseNextParameters()
+                next_params.ReleaseContinuationPoints = False
+                next_params.ContinuationPoints = [point for _, point in pending]
+                batch = [index for index, _ in pending]
+                results = await self.client.uaclient.browse_next(next_params)
+
+        return references
+
+    def _discovery_namespace_indices(self, namespace_indices):
+        """Determine which namespaces to scan during auto-discovery."""
+        if namespace_indices is not None:
+            return namespace_indices
+        if self.namespace_index is not None:
+            return [self.namespace_index]
+        # Get all custom namespaces (skip standard OPC UA namespace 0)
+        return [idx for idx in self.namespace_map.values() if idx > 0]
+
+    async def discover_variables(self, namespace_indices=None):
+        """
+        Browse one or more namespaces for variable nodes.
+        Each namespace gets its own root path component (ns2, ns3, etc.)
+
+        The address space is browsed level by level, with all nodes of a level
+        sent in batched Browse requests.
+
+        :param namespace_indices: List of namespace indices to browse, or None to use self.namespace_index
+        :return: ReadPlan of all discovered variables
+        """
+        plan = ReadPlan()
+        namespace_indices = self._discovery_namespace_indices(namespace_indices)
+
+        if not namespace_indices:
+            logger.warning("No namespaces to read")
+            return plan
+
+        logger.info(f"Discovering all variables in namespace indices {namespace_indices}")
+
+        object_mask = ua.NodeClass.Object
+        child_mask = ua.NodeClass.Object | ua.NodeClass.Variable
+
+        # Find all top-level objects in the requested namespaces.
+        # Each frontier entry is (nodeid, path_parts, namespace_index, sort_key); the sort
+        # key records the browse position along the path to keep depth-first output order.
+        ns_positions = {ns_idx: pos for pos, ns_idx in enumerate(namespace_indices)}
+        objects_refs = (await self.browse_references([self.client.nodes.objects.nodeid], object_mask))[0]
+        frontier = []
+        for ns_idx in namespace_indices:
+            for position, ref in enumerate(objects_refs):
+                if ref.NodeId.NamespaceIndex == ns_idx:
+                    frontier.append(
+                        (ref.NodeId, [f"ns{ns_idx}", ref.BrowseName.Name], ns_idx, (ns_positions[ns_idx], position))
+                    )
+
+        visited = {nodeid for nodeid, _, _, _ in frontier}
+        variables = []
+
+        # Browse one level of the hierarchy per iteration
+        while frontier:
+            children = await self.browse_references([nodeid for nodeid, _, _, _ in frontier], child_mask)
+            next_frontier = []
+            for (_, path_parts, ns_idx, sort_key), refs in zip(frontier, children):
+                for position, ref in enumerate(refs):
+                    # Only process nodes in our target namespace
+                    if ref.NodeId.NamespaceIndex != ns_idx or ref.NodeId in visited:
+                        continue
+                    visited.add(ref.NodeId)
+
+                    current_path = path_parts + [ref.BrowseName.Name]
+                    current_key = sort_key + (position,)
+                    if ref.NodeClass == ua.NodeClass.Variable:
+                        variables.append((current_key, ref.NodeId, current_path))
+                    elif ref.NodeClass == ua.NodeClass.Object:
+                        next_frontier.append((ref.NodeId, current_path, ns_idx, current_key))
+            frontier = next_frontier
+
+        variables.sort(key=lambda variable: variable[0])
+        for _, nodeid, path_parts in variables:
+            plan.add(self.client.get_node(nodeid), path_parts)
+
+        logger.info(f"Discovered {len(plan)} variables")
+        return plan
+
+    def discovery_outdated(self):
+        """Return True if the next get_discovery_plan() call browses the address space again."""
+        return self.discovery_plan is None or self._discovery_expired()
+
+    def _discovery_expired(self):
+        return bool(
+            self.discovery_refresh_interval
+            and time.monotonic() - self._discovery_time >= self.discovery_refresh_interval
+        )
+
+    def invalidate_discovery(self):
+        """Drop the cached discovery result so the next read browses the address space again."""
+        self.discovery_plan = None
+        if self.node_cache is not None:
+            self.node_cache.drop_discovery()
+
+    async def get_discovery_plan(self, namespace_indices=None):
+        """
+        Return the cached auto-discovery ReadPlan, browsing the address space only when
+        there is no cached result for these namespaces, the session was re-established,
+        invalidate_discovery() was called or discovery_refresh_interval has elapsed.
+        """
+        expired = self._discovery_expired()
+        if self.discovery_plan is None or expired or self._discovery_namespaces != namespace_indices:
+            plan = None
+            cache_key = ",".join(str(idx) for idx in self._discovery_namespace_indices(namespace_indices))
+            if self.node_cache is not None:
+                # A fresh session may start from the persisted result; a refresh always browses
+                if self.discovery_plan is None and not expired:
+                    plan = self._plan_from_cached_discovery(cache_key)
+
+            if plan is None:
+                with tracing.trace("resolve", endpoint=self.endpoint, mode="discovery") as span:
+                    plan = await self.discover_variables(namespace_indices)
+                    span.set(variables=len(plan))
+                if self.node_cache is not None:
+                    self.node_cache.set_discovery(
+                        cache_key,
+                        [(nodeid.to_string(), path_parts) for nodeid, path_parts in zip(plan.nodeids, plan.path_parts)],
+                    )
+                    self.node_cache.save()
+
+            self.discovery_plan = plan
+            self._discovery_namespaces = namespace_indices
+            self._discovery_time = time.monotonic()
+        return self.discovery_plan
+
+    def _plan_from_cached_discovery(self, cache_key):
+        """Build the discovery ReadPlan from the persistent node cache, or return None."""
+        variables = self.node_cache.get_discovery(cache_key)
+        if variables is None:
+            return None
+        plan = ReadPlan()
+        for nodeid, path_parts in variables:
+            plan.add(self.client.get_node(ua.NodeId.from_string(nodeid)), path_parts)
+        logger.info(f"Loaded {len(plan)} discovered variables from node cache")
+        return plan
+
     async def read_all_variables_in_namespace(self, namespace_indices=None):
         """
         Read all variable nodes and their values from one or more namespaces.
@@ -472,77 +1122,12 @@ class OPCUAClient:
         tsp = datetime.now().astimezone().isoformat()
         data = {}
 
-        # Determine which namespaces to scan
-        if namespace_indices is None:
-            if self.namespace_index is not None:
-                namespace_indices = [self.namespace_index]
-            else:
-                # Get all custom namespaces (skip standard OPC UA namespace 0)
-                namespace_indices = [idx for idx in self.namespace_map.values() if idx > 0]
-
-        if not namespace_indices:
-            logger.warning("No namespaces to read")
-            return {"tsp": tsp, "data": data}
-
-        logger.info(f"Reading all variables from namespace indices {namespace_indices}")
-
         try:
-            objects_node = self.client.nodes.objects
-
-            for ns_idx in namespace_indices:
-                # Find all top-level objects in this namespace
-                top_level_objects = []
-                children = await objects_node.get_children()
-                for child in children:
-                    if child.nodeid.NamespaceIndex == ns_idx:
-                        node_class = await child.read_node_class()
-                        if node_class.value == 1:  # Object
-                            browse_name = await child.read_browse_name()
-                            top_level_objects.append((child, browse_name.Name))
-
-                # Recursively browse and read all variable values under each top-level object
-                async def browse_and_read(node, path_parts, target_ns_idx):
-                    nonlocal data
-
-                    try:
-                        children = await node.get_children()
-                        for child in children:
-                            child_node_id = child.nodeid
-
-                            # Only process nodes in our target namespace
-                            if child_node_id.NamespaceIndex != target_ns_idx:
-                                continue
-
-                            # Get node class and browse name
-                            node_class = await child.read_node_class()
-                            browse_name = await child.read_browse_name()
-
-                            current_path = path_parts + [browse_name.Name]
-
-                            # If it's a variable, read its value
-                            if node_class.value == 2:  # Variable
-                                try:
-                                    value = await child.read_value()
-                                    # Build nested dict from path
-                                    nested = self._build_nested_dict(current_path, value)
-                                    data = self._merge_nested_dicts(data, nested)
-                                    logger.debug(
-                                        f"Read variable: {'.'.join(current_path)} = {value}"
-                                    )
-                                except Exception as e:
-                                    logger.debug(
-                                        f"Failed to read variable {'.'.join(current_path)}: {e}"
-                                    )
-                            # If it's an object, recurse into it
-                            elif node_class.value == 1:  # Object
-                                await browse_and_read(child, current_path, target_ns_idx)
-                    except Exception as e:
-                        logger.debug(f"Error browsing node: {e}")
-
-                # Browse each top-level object with namespace prefix as root
-                for obj_node, obj_name in top_level_objects:
-                    await browse_and_read(obj_node, [f"ns{ns_idx}", obj_name], ns_idx)
-
+            plan = await self.get_discovery_plan(namespace_indices)
+            if plan:
+                data_values = await self.read_plan(plan)
+                values = self._values_from_data_values(plan, data_values)
+                data = self.build_data_from_plan(plan, values)
         except ConnectionError:
             logger.warning("Connection lost while reading all variables")
             self.is_connected = False
@@ -551,3 +1136,50 @@ class OPCUAClient:
             logger.error(f"Error reading all variables: {e}")
 
         return {"tsp": tsp, "data": data}
+
+    async def delete_subscriptions(self):
+        """
+        Delete the subscriptions of the current session, e.g. before subscribing to a new plan.
+        Failures are logged only; the server drops the subscriptions with the session anyway.
+        """
+        subscriptions, self.subscriptions = self.subscriptions, []
+        for subscription in subscriptions:
+            try:
+                await subscription.delete()
+            except Exception as e:
+                logger.warning(f"Could not delete subscription: {e}")
+
+    async def subscribe_plan(self, plan, handler, publishing_interval, sampling_interval, queue_size):
+        """
+        Create a subscription with one data-change MonitoredItem per variable in a ReadPlan.
+
+        :param plan: Compiled ReadPlan
+        :param handler: asyncua subscription handler (datachange_notification)
+        :param publishing_interval: Requested publishing interval in milliseconds
+        :param sampling_interval: Requested sampling interval in milliseconds
+        :param queue_size: Server-side queue size per MonitoredItem
+        :return: The asyncua Subscription
+        """
+        subscription = await self.client.create_subscription(publishing_interval, handler)
+        self.subscriptions.append(subscription)
+
+        failed = 0
+        batch_size = self.max_monitored_items_per_call
+        for start in range(0, len(plan), batch_size):
+            results = await subscription.subscribe_data_change(
+                plan.nodes[start : start + batch_size],
+                queuesize=queue_size,
+                sampling_interval=sampling_interval,
+            )
+            for path, result in zip(plan.paths[start : start + batch_size], results):
+                if isinstance(result, ua.StatusCode):
+                    failed += 1
+                    logger.debug(f"Could not monitor {path}: {result.name}")
+
+        if failed:
+            logger.warning(f"{failed} of {len(plan)} MonitoredItems could not be created")
+        logger.info(
+            f"Subscribed to {len(plan) - failed} variables "
+            f"(publishing {publishing_interval} ms, sampling {sampling_interval} ms, queue {queue_size})"
+        )
+        return subscription
@@ -0,0 +1,61 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# First batch size when the server does not advertise a limit
+DEFAULT_INITIAL_BATCH_SIZE = 100
+# Requests slower than this (seconds) halve the batch size; well below asyncua's 4s request timeout
+DEFAULT_TARGET_RTT = 1.0
+
+
+class AdaptiveBatchSize:
+    """
+    Number of nodes per bulk service request (Read, Browse, TranslateBrowsePaths).
+
+    If the server advertises an operation limit, batches use that limit. Otherwise
+    the size starts small and follows the round-trip time: it doubles after a full
+    batch that completed in less than half the target round-trip time, and halves
+    after a request that took longer than the target. In both cases, a request the
+    server rejects as too large (too many operations, message size exceeded)
+    halves the size and lowers the ceiling to it for the rest of the session.
+    """
+
+    def __init__(self, limit, maximum, initial=DEFAULT_INITIAL_BATCH_SIZE, target_rtt=DEFAULT_TARGET_RTT):
+        """
+        :param limit: Limit advertised by the server, 0 if none
+        :param maximum: Largest batch size used, also caps an advertised limit
+        :param initial: First batch size when no limit is advertised
+        :param target_rtt: Round-trip time in seconds that adaptive sizing aims to stay below
+        """
+        self.adaptive = not limit
+        self.maximum = max(1, min(limit, maximum) if limit else maximum)
+        self.size = self.maximum if limit else max(1, min(initial, self.maximum))
+        self.target_rtt = target_rtt
+
+    def record(self, count, rtt):
+        """
+        Adjust the size after a successful request.
+
+        :param count: Number of nodes in the request
+        :param rtt: Round-trip time of the request in seconds
+        """
+        if not self.adaptive:
+            return
+        if rtt > self.target_rtt and self.size > 1:
+            self.size = max(1, self.size // 2)
+            logger.debug(f"Request of {count} nodes took {rtt:.3f}s, reducing batch size to {self.size}")
+        elif count >= self.size and rtt < self.target_rtt / 2 and self.size < self.maximum:
+            self.size = min(self.maximum, self.size * 2)
+            logger.debug(f"Request of {count} nodes took {rtt:.3f}s, increasing batch size to {self.size}")
+
+    def reject(self):
+        """
+        Halve the size after the server rejected a request as too large.
+
+        :return: False if the size is already 1 and the request cannot be split further
+        """
+        if self.size <= 1:
+            return False
+        self.size = max(1, self.size // 2)
+        self.maximum = self.size
+        return True
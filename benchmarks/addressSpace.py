@@ -0,0 +1,154 @@
+"""
+Synthetic address spaces for the benchmarks, served by a local asyncua Server.
+
+The same layout function is used by the server process to create the nodes and
+by the benchmark to build the matching NodeSet and legacy schema configurations.
+"""
+
+import asyncio
+import math
+
+from asyncua import Server, ua
+
+NAMESPACE_URI = "urn:recordevolution:opcua-client:benchmark"
+ROOT_NAME = "Bench"
+# Variables per leaf object
+VARIABLES_PER_OBJECT = 10
+# Data types cycled through the variables: (DataType name, VariantType, initial value for variable i)
+VALUE_TYPES = [
+    ("Double", ua.VariantType.Double, lambda i: i * 0.5),
+    ("Float", ua.VariantType.Float, lambda i: float(i)),
+    ("Int32", ua.VariantType.Int32, lambda i: i),
+    ("UInt16", ua.VariantType.UInt16, lambda i: i % 65536),
+    ("Boolean", ua.VariantType.Boolean, lambda i: i % 2 == 0),
+    ("String", ua.VariantType.String, lambda i: f"value {i}"),
+]
+
+
+def layout(variables, depth):
+    """
+    Distribute variables over the leaf objects of a tree of the given depth
+    below the root object ROOT_NAME.
+
+    :return: (objects, leaves) with the object paths (parents first) and the
+             variable (path, value type index) pairs
+    """
+    leaf_count = max(1, math.ceil(variables / VARIABLES_PER_OBJECT))
+    branching = max(1, math.ceil(leaf_count ** (1 / depth))) if depth else 1
+
+    level = [(ROOT_NAME,)]
+    for d in range(depth):
+        level = [parent + (f"L{d}_{i}",) for parent in level for i in range(branching)]
+    parents = level[:leaf_count]
+
+    objects = list(dict.fromkeys(path[:k] for path in parents for k in range(1, len(path) + 1)))
+    leaves = [
+        (parents[i // VARIABLES_PER_OBJECT] + (f"V{i}",), i % len(VALUE_TYPES))
+        for i in range(variables)
+    ]
+    return objects, leaves
+
+
+def build_nodeset(variables, depth):
+    """NodeSet JSON configuration that reads every variable of the layout."""
+    _, leaves = layout(variables, depth)
+    return {
+        "NamespaceUris": [NAMESPACE_URI],
+        "UAVariables": [
+            {
+                "NodeClass": "Variable",
+                "NodeId": f"ns=1;s={'.'.join(path)}",
+                "BrowseName": path[-1],
+                "DataType": VALUE_TYPES[type_index][0],
+            }
+            for path, type_index in leaves
+        ],
+    }
+
+
+def build_schema(variables, depth):
+    """
+    Legacy schema configuration of the layout. A schema leaf names one variable
+    of an object ({"Object": "Variable"}), so it reads the first variable of
+    every leaf object.
+    """
+    _, leaves = layout(variables, depth)
+    schema = {}
+    for path, _ in leaves:
+        subtree = schema
+        for name in path[:-2]:
+            subtree = subtree.setdefault(name, {})
+        subtree.setdefault(path[-2], path[-1])
+    return schema
+
+
+def _object_item(path, idx):
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = ua.NodeId(".".join(path), idx)
+    item.BrowseName = ua.QualifiedName(path[-1], idx)
+    item.NodeClass = ua.NodeClass.Object
+    if len(path) == 1:
+        item.ParentNodeId = ua.NodeId(ua.ObjectIds.ObjectsFolder)
+        item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.Organizes)
+    else:
+        item.ParentNodeId = ua.NodeId(".".join(path[:-1]), idx)
+        item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasComponent)
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.BaseObjectType)
+    attrs = ua.ObjectAttributes()
+    attrs.DisplayName = ua.LocalizedText(path[-1])
+    item.NodeAttributes = attrs
+    return item
+
+
+def _variable_item(path, type_index, number, idx):
+    type_name, variant_type, initial = VALUE_TYPES[type_index]
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = ua.NodeId(".".join(path), idx)
+    item.BrowseName = ua.QualifiedName(path[-1], idx)
+    item.NodeClass = ua.NodeClass.Variable
+    item.ParentNodeId = ua.NodeId(".".join(path[:-1]), idx)
+    item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasComponent)
+    item.TypeDefinition = ua.NodeId(ua.ObjectIds.BaseDataVariableType)
+    attrs = ua.VariableAttributes()
+    attrs.DisplayName = ua.LocalizedText(path[-1])
+    attrs.DataType = ua.NodeId(getattr(ua.ObjectIds, type_name))
+    attrs.Value = ua.Variant(initial(number), variant_type)
+    attrs.ValueRank = ua.ValueRank.Scalar
+    attrs.AccessLevel = ua.AccessLevel.CurrentRead.mask
+    attrs.UserAccessLevel = ua.AccessLevel.CurrentRead.mask
+    item.NodeAttributes = attrs
+    return item
+
+
+async def start_server(port, variables, depth):
+    """Start an asyncua Server on localhost with the benchmark address space."""
+    server = Server()
+    await server.init()
+    server.set_endpoint(f"opc.tcp://127.0.0.1:{port}/benchmark")
+    idx = await server.register_namespace(NAMESPACE_URI)
+
+    objects, leaves = layout(variables, depth)
+    items = [_object_item(path, idx) for path in objects]
+    items.extend(
+        _variable_item(path, type_index, number, idx) for number, (path, type_index) in enumerate(leaves)
+    )
+    # One AddNodes call for the whole address space instead of one per node
+    for result in await server.iserver.isession.add_nodes(items):
+        result.StatusCode.check()
+
+    await server.start()
+    return server
+
+
+def serve(port, variables, depth, ready):
+    """Process entry point: serve the address space until the process is terminated."""
+
+    async def run():
+        server = await start_server(port, variables, depth)
+        ready.set()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    asyncio.run(run())
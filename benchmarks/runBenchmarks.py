@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmarks of the OPC UA read and publish paths.
+
+For every address space size, a local asyncua Server is started in a separate
+process and each scenario connects a fresh OPCUAClient to it:
+
+  nodeset          read_from_nodeset with a NodeSet listing every variable
+  schema           read_from_schema with a legacy schema of the tree (one
+                   variable per leaf object, as the schema format allows)
+  discovery        read_all_variables_in_namespace (auto-discovery)
+  publish-rows     building and publishing one snapshot, one message per flat row
+  publish-message  the same with flat rows sent as list payloads
+
+The first call of a scenario is reported separately as cold start (it builds
+the read plan). Every following cycle is timed, and one extra cycle is run
+under tracemalloc to measure the peak memory it allocates. Publishing goes to
+an in-process stand-in for IronFlock with a configurable round-trip time.
+
+Results are printed (or written with --output) as JSON, for comparing releases:
+
+    python benchmarks/runBenchmarks.py --sizes 100,1000,10000 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+# main reads its configuration on import; the benchmark is not a registered device
+os.environ.setdefault("DEVICE_KEY", "benchmark")
+
+import asyncua  # noqa: E402
+from addressSpace import NAMESPACE_URI, build_nodeset, build_schema, serve  # noqa: E402
+
+import main  # noqa: E402
+from OPCUAClient import OPCUAClient  # noqa: E402
+from publisher import BatchPublisher  # noqa: E402
+
+SCENARIOS = ["nodeset", "schema", "discovery", "publish-rows", "publish-message"]
+
+
+class FakeIronFlock:
+    """Stand-in for IronFlock that acknowledges every publish after a fixed round-trip time."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.messages = 0
+        self.rows = 0
+
+    async def publish_to_table(self, tablename, *args):
+        await asyncio.sleep(self.latency)
+        self.messages += 1
+        self.rows += len(args[0]) if args and isinstance(args[0], list) else 1
+        return True
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def max_rss_kb():
+    """Peak resident set size of this process in KiB, or None where unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def latency_stats(samples):
+    ordered = sorted(samples)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+async def make_cycle(scenario, client, variables, depth, publish_latency):
+    """
+    Return the coroutine function that runs one cycle of a scenario and the
+    publishing stand-in (None for read scenarios).
+    """
+    # Every cycle function returns the number of variables it read or published
+    if scenario == "nodeset":
+        nodeset = build_nodeset(variables, depth)
+        return _counted(client.read_from_nodeset, nodeset, lambda: client.nodeset_plan), None
+    if scenario == "schema":
+        schema = build_schema(variables, depth)
+        return _counted(client.read_from_schema, schema, lambda: client.schema_plan), None
+    if scenario == "discovery":
+        return _counted(client.read_all_variables_in_namespace, None, lambda: client.discovery_plan), None
+
+    # Publish scenarios read once and time snapshot building plus publishing
+    ironflock = FakeIronFlock(publish_latency)
+    mode = scenario.split("-", 1)[1]
+    publisher = BatchPublisher(ironflock, mode, main.PUBLISH_BATCH_SIZE, main.PUBLISH_BATCH_MAX_BYTES)
+    endpoint = {"url": client.endpoint, "namespace": NAMESPACE_URI, "machine_name": "benchmark"}
+    plan = client.get_nodeset_read_plan(build_nodeset(variables, depth))
+    tsp, values = await client.read_plan_values(plan)
+
+    async def cycle():
+        data, flattab, _ = main.build_snapshot(client, plan, tsp, values)
+        await main.publish_data(endpoint, data, flattab, publisher)
+        return len(flattab)
+
+    return cycle, ironflock
+
+
+def _counted(read, config, current_plan):
+    async def cycle():
+        await read(config)
+        plan = current_plan()
+        return len(plan) if plan else 0
+
+    return cycle
+
+
+async def run_scenario(url, scenario, variables, depth, cycles, publish_latency):
+    client = OPCUAClient(url, NAMESPACE_URI)
+    await client.connect()
+    try:
+        cycle, ironflock = await make_cycle(scenario, client, variables, depth, publish_latency)
+
+        start = time.perf_counter()
+        count = await cycle()
+        cold = time.perf_counter() - start
+
+        samples = []
+        for _ in range(cycles):
+            start = time.perf_counter()
+            await cycle()
+            samples.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        await cycle()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        await client.disconnect()
+
+    latency = latency_stats(samples)
+    result = {
+        "scenario": scenario,
+        "variables": variables,
+        "variables_per_cycle": count,
+        "depth": depth,
+        "cycles": cycles,
+        "cold_start_s": cold,
+        "latency_s": latency,
+        "throughput_variables_per_s": count / latency["mean"] if latency["mean"] else None,
+        "peak_alloc_bytes": peak,
+        "read_batch_size": client.read_batch_size.size,
+    }
+    if ironflock is not None:
+        result["publish_latency_s"] = publish_latency
+        result["messages_per_cycle"] = ironflock.messages // (cycles + 2)
+    return result
+
+
+def run_size(variables, args):
+    """Serve one address space size in a child process and run all scenarios against it."""
+    port = free_port()
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(port, variables, args.depth, ready), daemon=True)
+    server.start()
+    try:
+        if not ready.wait(args.server_timeout):
+            raise RuntimeError(f"Benchmark server with {variables} variables did not start")
+        url = f"opc.tcp://127.0.0.1:{port}/benchmark"
+        results = []
+        for scenario in args.scenarios:
+            result = asyncio.run(
+                run_scenario(url, scenario, variables, args.depth, args.cycles, args.publish_latency)
+            )
+            print(
+                f"{scenario:>16} {variables:>7} variables: "
+                f"p50 {result['latency_s']['p50'] * 1000:.1f} ms, cold {result['cold_start_s'] * 1000:.1f} ms",
+                file=sys.stderr,
+            )
+            results.append(result)
+        return results
+    finally:
+        server.terminate()
+        server.join()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        help="comma separated numbers of variables, e.g. 100,1000,10000,100000")
+    parser.add_argument("--depth", type=int, default=3, help="object levels between the root and the variables")
+    parser.add_argument("--cycles", type=int, default=20, help="timed cycles per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--publish-latency", type=float, default=0.0,
+                        help="seconds the IronFlock stand-in takes to acknowledge a publish")
+    parser.add_argument("--server-timeout", type=float, default=600, help="seconds to wait for the server to start")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+    args.scenarios = [scenario.strip() for scenario in args.scenarios.split(",")]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    # Only the results should reach the output, not the per-cycle logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    for variables in args.sizes:
+        results.extend(run_size(variables, args))
+
+    report = {
+        "meta": {
+            "created": datetime.now().astimezone().isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "asyncua": getattr(asyncua, "__version__", None),
+            "max_rss_kb": max_rss_kb(),
+            "arguments": {
+                "sizes": args.sizes,
+                "depth": args.depth,
+                "cycles": args.cycles,
+                "publish_latency": args.publish_latency,
+            },
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    run()
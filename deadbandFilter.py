@@ -0,0 +1,72 @@
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DeadbandFilter:
+    """
+    Report-by-exception filter for flat table rows.
+
+    Remembers the last published value of every variable path per source (e.g. the
+    endpoint the rows were read from) and drops rows
+    whose value did not change by more than the deadband. A numeric value must
+    move by more than the absolute deadband and by more than the percentage
+    deadband of the last published value; other values must differ. With a
+    heartbeat interval, a row is published anyway once the variable has been
+    silent for that many seconds.
+    """
+
+    def __init__(self, absolute=0.0, percent=0.0, heartbeat_interval=0.0, clock=time.monotonic):
+        self.absolute = absolute
+        self.percent = percent
+        self.heartbeat_interval = heartbeat_interval
+        self._clock = clock
+        self._last = {}  # (source, variable path) -> (value, monotonic time of publish)
+        self.passed = 0
+        self.dropped = 0
+
+    def _changed(self, last_value, value):
+        """Return True if value differs from last_value by more than the deadband."""
+        if _is_number(value) and _is_number(last_value):
+            if math.isnan(value) or math.isnan(last_value):
+                return math.isnan(value) != math.isnan(last_value)
+            delta = abs(value - last_value)
+            return delta > self.absolute and delta > abs(last_value) * self.percent / 100
+        return value != last_value
+
+    def filter_rows(self, rows, source=None, keep_all=False):
+        """
+        Drop rows whose value is within the deadband of the last published value.
+
+        :param rows: Iterable of flat rows with "variable" and "value" keys
+        :param source: Where the rows come from, so equal paths of different endpoints are filtered separately
+        :param keep_all: Publish every row (e.g. of a keyframe) and only remember the values
+        :return: List of rows to publish
+        """
+        now = self._clock()
+        passed = []
+        total = 0
+        for row in rows:
+            total += 1
+            key = (source, row["variable"])
+            value = row["value"]
+            last = self._last.get(key)
+            if (
+                keep_all
+                or last is None
+                or self._changed(last[0], value)
+                or (self.heartbeat_interval > 0 and now - last[1] >= self.heartbeat_interval)
+            ):
+                self._last[key] = (value, now)
+                passed.append(row)
+
+        self.passed += len(passed)
+        self.dropped += total - len(passed)
+        logger.debug(f"Deadband filter passed {len(passed)} of {total} rows")
+        return passed
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
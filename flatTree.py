@@ -1,20 +1,48 @@
 from datetime import datetime
 
-def flatten_json_tree(json_obj, tsp, parent_path=""):
-    rows = []
-    
-    for key, value in json_obj.items():
-        current_path = f"{parent_path}.{key}" if parent_path else key
-        if current_path == 'tsp': continue # the tsp is in every row, no need for an extra row
-
-        if isinstance(value, dict):
-            rows.extend(flatten_json_tree(value, tsp, current_path))
+
+def iter_json_tree_rows(json_obj, tsp, parent_path=""):
+    """
+    Yield one {"tsp", "variable", "value"} row per leaf of a nested dictionary.
+
+    Rows are produced lazily in the same order as flatten_json_tree. The tree is
+    walked with an explicit stack, so deep trees do not hit the recursion limit.
+    """
+    stack = [(parent_path, iter(json_obj.items()))]
+    while stack:
+        path, items = stack[-1]
+        for key, value in items:
+            current_path = f"{path}.{key}" if path else key
+            if current_path == 'tsp': continue # the tsp is in every row, no need for an extra row
+
+            if isinstance(value, dict):
+                # Descend first; the rest of this level continues after the subtree
+                stack.append((current_path, iter(value.items())))
+                break
+            yield {"tsp": tsp, "variable": current_path, "value": value}
         else:
-            rows.append({"tsp": tsp, "variable": current_path, "value": value})
-    
-    return rows
+            stack.pop()
 
-def json_tree_to_table(json_obj):
+def iter_json_tree_chunks(json_obj, chunk_size):
+    """
+    Yield the rows of a {"tsp", "data"} object in lists of at most chunk_size rows,
+    e.g. for batched publishing without materializing the whole table.
+    """
+    chunk = []
+    for row in iter_json_tree_table(json_obj):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def flatten_json_tree(json_obj, tsp, parent_path=""):
+    return list(iter_json_tree_rows(json_obj, tsp, parent_path))
+
+def iter_json_tree_table(json_obj):
     tsp = json_obj.get('tsp', datetime.now().astimezone().isoformat())
-    rows = flatten_json_tree(json_obj.get("data", {}), tsp)
-    return rows
\ No newline at end of file
+    return iter_json_tree_rows(json_obj.get("data", {}), tsp)
+
+def json_tree_to_table(json_obj):
+    return list(iter_json_tree_table(json_obj))
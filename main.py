@@ -1,12 +1,32 @@
+import asyncio
 import json
-import os
 import logging
+import os
+import random
 import signal
+import time
 from asyncio import sleep
+from datetime import datetime
+
 from ironflock import IronFlock
+
+import metrics
+import tracing
+from changeFilter import ChangeFilter
+from deadbandFilter import DeadbandFilter
+from nodeCache import NodeCache
 from OPCUAClient import OPCUAClient
-from datetime import datetime
-from flatTree import json_tree_to_table
+from pipeline import PublishPipeline
+from profiling import CycleProfiler
+from publisher import MODE_MESSAGE, BatchPublisher
+from scheduler import CycleScheduler
+from storeForward import StoreAndForward
+from subscriptionHandler import DataChangeCollector
+
+try:
+    from windowAggregator import WindowAggregator
+except ImportError:  # numpy is only required for windowed aggregation
+    WindowAggregator = None
 
 # Configure logging
 logging.basicConfig(
@@ -42,13 +62,77 @@ DEVICE_NAME = os.environ.get("DEVICE_NAME")
 OPCUA_URL = os.environ.get("OPCUA_URL", "opc.tcp://localhost:4840/opcuaserver")
 OPCUA_NAMESPACE = os.environ.get("OPCUA_NAMESPACE", "example:ironflock:com")
 OPCUA_VARIABLES = os.environ.get("OPCUA_VARIABLES", "")
+# JSON list of endpoints polled by this process, each {"url", "machine_name", "namespace", "variables", "publish_interval"}
+OPCUA_ENDPOINTS = os.environ.get("OPCUA_ENDPOINTS", "")
 PUBLISH_INTERVAL = int(os.environ.get("PUBLISH_INTERVAL", 3))
 MACHINE_NAME = os.environ.get("MACHINE_NAME")
+# What happens to missed ticks when a cycle overruns PUBLISH_INTERVAL: "skip" or "coalesce"
+SCHEDULE_OVERRUN_POLICY = os.environ.get("SCHEDULE_OVERRUN_POLICY", "skip").strip().lower()
+# Reconnect backoff: the first retry waits up to RECONNECT_INTERVAL seconds, doubling up to RECONNECT_MAX_INTERVAL
 RECONNECT_INTERVAL = int(os.environ.get("RECONNECT_INTERVAL", 1))
+RECONNECT_MAX_INTERVAL = int(os.environ.get("RECONNECT_MAX_INTERVAL", 60))
+# Seconds after which auto-discovery browses the address space again (0 = only after reconnect)
+DISCOVERY_REFRESH_INTERVAL = int(os.environ.get("DISCOVERY_REFRESH_INTERVAL", 0))
+# File for persisting resolved NodeIds across restarts, used for the first session only (empty disables the cache)
+NODE_CACHE_FILE = os.environ.get("NODE_CACHE_FILE", "")
+# "rows" publishes each flat row individually (many in flight), "message" sends lists of rows
+PUBLISH_BATCH_MODE = os.environ.get("PUBLISH_BATCH_MODE", "rows").strip().lower()
+PUBLISH_BATCH_SIZE = int(os.environ.get("PUBLISH_BATCH_SIZE", 100))
+PUBLISH_BATCH_MAX_BYTES = int(os.environ.get("PUBLISH_BATCH_MAX_BYTES", 256000))
+# Tables whose definition maps a list of rows per message, required for the "message" batch mode
+PUBLISH_ARRAY_TABLES = [table.strip() for table in os.environ.get("PUBLISH_ARRAY_TABLES", "").split(",") if table.strip()]
+# Publish the nested snapshot to opcuadata; flat rows are always published to flatopcuadata
+PUBLISH_NESTED = os.environ.get("PUBLISH_NESTED", "true").strip().lower() not in ("false", "0", "no")
+# Read results waiting to be published; when full, PUBLISH_QUEUE_POLICY applies
+PUBLISH_QUEUE_SIZE = int(os.environ.get("PUBLISH_QUEUE_SIZE", 100))
+# "block", "drop-oldest" or "coalesce-latest"
+PUBLISH_QUEUE_POLICY = os.environ.get("PUBLISH_QUEUE_POLICY", "block").strip().lower()
+PUBLISH_WORKERS = int(os.environ.get("PUBLISH_WORKERS", 1))
+# SQLite file buffering publishes while IronFlock is unreachable (empty disables the buffer)
+STORE_FORWARD_FILE = os.environ.get("STORE_FORWARD_FILE", "opcua_publish_buffer.db")
+# Maximum number of buffered messages; in "rows" batch mode every flat row is one message
+STORE_FORWARD_MAX_MESSAGES = int(os.environ.get("STORE_FORWARD_MAX_MESSAGES", 100000))
+# Seconds after which buffered messages are discarded (0 keeps them until the buffer is full)
+STORE_FORWARD_RETENTION = int(os.environ.get("STORE_FORWARD_RETENTION", 86400))
+# Which messages are discarded when the buffer is full: "oldest" or "newest"
+STORE_FORWARD_DROP_POLICY = os.environ.get("STORE_FORWARD_DROP_POLICY", "oldest").strip().lower()
+# Report-by-exception: setting any of these drops flat rows whose value did not change
+DEADBAND_ABSOLUTE = os.environ.get("DEADBAND_ABSOLUTE", "")
+DEADBAND_PERCENT = os.environ.get("DEADBAND_PERCENT", "")
+HEARTBEAT_INTERVAL = os.environ.get("HEARTBEAT_INTERVAL", "")
+# Exact-change mode: polled flat rows are only published when their value or StatusCode changed
+PUBLISH_CHANGES_ONLY = os.environ.get("PUBLISH_CHANGES_ONLY", "false").strip().lower() in ("true", "1", "yes")
+# In exact-change mode, all rows are published every KEYFRAME_CYCLES cycles and every KEYFRAME_INTERVAL seconds (0 disables either)
+KEYFRAME_CYCLES = int(os.environ.get("KEYFRAME_CYCLES", 0))
+KEYFRAME_INTERVAL = float(os.environ.get("KEYFRAME_INTERVAL", 60))
+# Polling samples every SAMPLE_INTERVAL seconds and publishes per-window aggregates to aggopcuadata (0 disables)
+SAMPLE_INTERVAL = float(os.environ.get("SAMPLE_INTERVAL", 0))
+# "poll" reads all variables every PUBLISH_INTERVAL, "subscription" uses OPC UA MonitoredItems
+ACQUISITION_MODE = os.environ.get("ACQUISITION_MODE", "poll").strip().lower()
+SUBSCRIPTION_PUBLISHING_INTERVAL = int(os.environ.get("SUBSCRIPTION_PUBLISHING_INTERVAL", PUBLISH_INTERVAL * 1000))
+SUBSCRIPTION_SAMPLING_INTERVAL = int(os.environ.get("SUBSCRIPTION_SAMPLING_INTERVAL", SUBSCRIPTION_PUBLISHING_INTERVAL))
+SUBSCRIPTION_QUEUE_SIZE = int(os.environ.get("SUBSCRIPTION_QUEUE_SIZE", 1))
+# Port of the Prometheus text metrics endpoint (0 disables it)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+# Address the metrics endpoint listens on; "0.0.0.0" exposes it to the network
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+# File receiving tracing spans of sampled cycles as JSON lines (empty disables tracing)
+TRACE_FILE = os.environ.get("TRACE_FILE", "")
+# Fraction of cycles that are traced
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 1.0))
+# Size in bytes at which the trace file is rotated
+TRACE_MAX_BYTES = int(os.environ.get("TRACE_MAX_BYTES", 10 * 1024 * 1024))
+# SIGUSR1 profiles the next PROFILE_CYCLES cycles into PROFILE_DIR
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_CYCLES = int(os.environ.get("PROFILE_CYCLES", 10))
+# Also write tracemalloc snapshot diffs between the profiled cycles
+PROFILE_TRACEMALLOC = os.environ.get("PROFILE_TRACEMALLOC", "false").strip().lower() in ("true", "1", "yes")
 
 # Global state for graceful shutdown
 shutdown_requested = False
-opcua_client_instance = None
+opcua_client_instances = []
+device_registered = False
+profiler = CycleProfiler(PROFILE_DIR, PROFILE_CYCLES, PROFILE_TRACEMALLOC)
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully."""
@@ -56,6 +140,17 @@ def signal_handler(signum, frame):
     logger.info(f"Received signal {signum}, initiating graceful shutdown...")
     shutdown_requested = True
 
+def rediscover_handler(signum, frame):
+    """Handle SIGHUP by re-browsing the address space on the next cycle."""
+    logger.info(f"Received signal {signum}, variables will be rediscovered")
+    for opcua_client in opcua_client_instances:
+        opcua_client.invalidate_discovery()
+
+def profile_handler(signum, frame):
+    """Handle SIGUSR1 by profiling the next cycles of the running client."""
+    logger.info(f"Received signal {signum}")
+    profiler.request()
+
 async def register_device():
         logger.info("Storing Device info...")
         await ironflock.publish_to_table(
@@ -69,64 +164,99 @@ async def register_device():
         )
         logger.info("Device Info registered")
 
-async def register_measures(tab):
+async def register_measures(publisher, tab, machine_name):
         logger.info("Storing Measure info...")
-        for row in tab:
-            await ironflock.publish_to_table(
-                "opcua_flat_measures",
+        await publisher.publish_rows(
+            "opcua_flat_measures",
+            [
                 {
                     "tsp": datetime.now().astimezone().isoformat(),
                     "measure_name": row["variable"],
-                    "machine_name": MACHINE_NAME,
+                    "machine_name": machine_name,
                     "deleted": False
-                },
-            )
+                }
+                for row in tab
+            ],
+        )
         logger.info("Measure Info registered")
 
 
+def reconnect_delay(attempt, base=None, maximum=None, rand=random.random):
+    """
+    Exponential backoff with full jitter: a random delay between 0 and
+    min(maximum, base * 2 ** attempt), so many clients retrying after the same
+    outage do not reconnect in lockstep.
+
+    :param attempt: Number of failed attempts so far, starting at 0
+    :return: Delay in seconds
+    """
+    base = RECONNECT_INTERVAL if base is None else base
+    maximum = RECONNECT_MAX_INTERVAL if maximum is None else maximum
+    return rand() * min(maximum, base * 2 ** min(attempt, 32))
+
+
 async def connect_with_retry(opcua_client):
-    """Attempt to connect to OPC UA server with constant retry interval."""
+    """Attempt to connect to OPC UA server, backing off exponentially with jitter between attempts."""
+    attempt = 0
     while not shutdown_requested:
         try:
-            logger.info(f"Attempting to connect to OPC UA server at {OPCUA_URL}...")
-            await opcua_client.connect()
-            logger.info("Successfully reconnected to OPC UA server")
+            logger.info(f"Attempting to connect to OPC UA server at {opcua_client.endpoint}...")
+            with tracing.trace("connect", endpoint=opcua_client.endpoint, attempt=attempt):
+                await opcua_client.connect()
+            logger.info(f"Successfully connected to OPC UA server at {opcua_client.endpoint}")
             return True
         except Exception as e:
             logger.error(f"Failed to connect to OPC UA server: {e}")
-            logger.info(f"Retrying in {RECONNECT_INTERVAL} second(s)...")
-            await sleep(RECONNECT_INTERVAL)
+            delay = reconnect_delay(attempt)
+            attempt += 1
+            logger.info(f"Retrying in {delay:.1f} second(s)...")
+            await sleep(delay)
 
     return False
 
 
-async def main():
-    global opcua_client_instance, shutdown_requested
+async def register_device_once():
+    """Register the device once per process, after the first successful connection."""
+    global device_registered
+    if device_registered:
+        return
+    try:
+        await register_device()
+        device_registered = True
+    except Exception as e:
+        logger.error(f"Failed to register device: {e}")
 
-    # Register signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
 
-    # Parse OPCUA_VARIABLES first to extract namespace if present
-    # Clean multiline YAML input (handles \n escapes and whitespace)
-    cleaned_variables = clean_multiline_env_var(OPCUA_VARIABLES)
-    logger.debug(f"Cleaned OPCUA_VARIABLES: {cleaned_variables}")
+def parse_variables_config(variables, fallback_namespace):
+    """
+    Parse a variable configuration and detect its format.
 
-    # Check if OPCUA_VARIABLES is empty or just whitespace
-    if not cleaned_variables or cleaned_variables.strip() == "":
-        logger.info("OPCUA_VARIABLES is empty - will auto-discover all variables")
-        variables_config = None  # Signal for auto-discovery
+    :param variables: OPCUA_VARIABLES string (may be empty), or an already parsed JSON object
+    :param fallback_namespace: Namespace used unless the NodeSet declares NamespaceUris
+    :return: Tuple (variables_config, namespace_to_use, is_nodeset, auto_discover)
+    """
+    if isinstance(variables, str):
+        # Clean multiline YAML input (handles \n escapes and whitespace)
+        cleaned_variables = clean_multiline_env_var(variables)
+        logger.debug(f"Cleaned OPCUA_VARIABLES: {cleaned_variables}")
+
+        # Check if OPCUA_VARIABLES is empty or just whitespace
+        if not cleaned_variables or cleaned_variables.strip() == "":
+            logger.info("OPCUA_VARIABLES is empty - will auto-discover all variables")
+            variables_config = None  # Signal for auto-discovery
+        else:
+            try:
+                variables_config = json.loads(cleaned_variables)
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse OPCUA_VARIABLES as JSON: {e}")
+                logger.error(f"Raw value: {variables}")
+                logger.error(f"Cleaned value: {cleaned_variables}")
+                raise
     else:
-        try:
-            variables_config = json.loads(cleaned_variables)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse OPCUA_VARIABLES as JSON: {e}")
-            logger.error(f"Raw value: {OPCUA_VARIABLES}")
-            logger.error(f"Cleaned value: {cleaned_variables}")
-            raise
+        variables_config = variables or None
 
     # Extract namespace from OPCUA_VARIABLES if present, otherwise use OPCUA_NAMESPACE
-    namespace_to_use = OPCUA_NAMESPACE
+    namespace_to_use = fallback_namespace
 
     # Check if variables_config contains NamespaceUris (full NodeSet format)
     if variables_config and isinstance(variables_config, dict) and "NamespaceUris" in variables_config:
@@ -156,11 +286,295 @@ async def main():
     else:
         logger.info(f"Using {'NodeSet' if is_nodeset else 'legacy schema'} format for variable configuration")
 
-    opcua_client = OPCUAClient(OPCUA_URL, namespace_to_use)
-    opcua_client_instance = opcua_client
+    return variables_config, namespace_to_use, is_nodeset, auto_discover
+
+
+def load_endpoints():
+    """
+    Return the list of endpoint configurations to poll.
+
+    OPCUA_ENDPOINTS holds a JSON list of endpoints; keys that an endpoint leaves out
+    fall back to OPCUA_NAMESPACE, MACHINE_NAME, OPCUA_VARIABLES and PUBLISH_INTERVAL.
+    Without OPCUA_ENDPOINTS, the single endpoint OPCUA_URL is used.
+    """
+    cleaned_endpoints = clean_multiline_env_var(OPCUA_ENDPOINTS)
+    if not cleaned_endpoints:
+        configs = [{"url": OPCUA_URL}]
+    else:
+        try:
+            configs = json.loads(cleaned_endpoints)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse OPCUA_ENDPOINTS as JSON: {e}")
+            raise
+        if not isinstance(configs, list) or not all(isinstance(c, dict) and c.get("url") for c in configs):
+            raise ValueError("OPCUA_ENDPOINTS must be a JSON list of objects with a 'url'")
+
+    return [
+        {
+            "url": config["url"],
+            "namespace": config.get("namespace", OPCUA_NAMESPACE),
+            "machine_name": config.get("machine_name", MACHINE_NAME),
+            "variables": config.get("variables", OPCUA_VARIABLES),
+            "publish_interval": config.get("publish_interval", PUBLISH_INTERVAL),
+        }
+        for config in configs
+    ]
+
+
+def read_mode(endpoint):
+    """Name of the way an endpoint's variables are configured, used as a metrics label."""
+    _, _, is_nodeset, auto_discover = endpoint["variables_config"]
+    if is_nodeset:
+        return "nodeset"
+    return "discovery" if auto_discover else "schema"
+
+
+async def build_read_plan(opcua_client, variables_config, is_nodeset, auto_discover):
+    """Compile the variables to acquire into a ReadPlan for the current session."""
+    if auto_discover:
+        return await opcua_client.get_discovery_plan()
+    if is_nodeset:
+        return opcua_client.get_nodeset_read_plan(variables_config)
+    return await opcua_client.get_schema_read_plan(variables_config)
+
+
+def tables_without_array_support():
+    """
+    Return the tables that the "message" batch mode would send lists of rows to, but whose
+    definition is not declared in PUBLISH_ARRAY_TABLES. The shipped definitions map one row per message.
+    """
+    if PUBLISH_BATCH_MODE != MODE_MESSAGE:
+        return []
+    tables = ["flatopcuadata"] + (["aggopcuadata"] if SAMPLE_INTERVAL > 0 else [])
+    return [table for table in tables if table not in PUBLISH_ARRAY_TABLES]
+
+
+def new_change_filter():
+    """Return the exact-change filter for one polling loop, or None if PUBLISH_CHANGES_ONLY is off."""
+    return ChangeFilter(KEYFRAME_CYCLES, KEYFRAME_INTERVAL) if PUBLISH_CHANGES_ONLY else None
+
+
+def sampling_interval(interval):
+    """Return the cycle interval of a polling loop that publishes every interval seconds."""
+    return min(SAMPLE_INTERVAL, interval) if SAMPLE_INTERVAL > 0 else interval
+
+
+def new_aggregator(interval):
+    """Return the window aggregator of a polling loop publishing every interval seconds, or None."""
+    if SAMPLE_INTERVAL <= 0:
+        return None
+    return WindowAggregator(round(interval / sampling_interval(interval)), interval)
+
+
+def aggregate_sample(aggregator, plan, tsp, values):
+    """Add a sample to the aggregator, returning the aggregate rows if it closed a window."""
+    if aggregator is None:
+        return None
+    with tracing.span("aggregate", values=len(values)):
+        return aggregator.add(plan, tsp, values)
+
+
+def build_snapshot(opcua_client, plan, tsp, values, change_filter=None, statuses=None):
+    """
+    Build the flat rows of a read directly from the plan paths and, if PUBLISH_NESTED
+    is enabled, the nested opcuadata payload. Returns a (data, flattab, keyframe) tuple.
+    With a change_filter, flattab only holds the rows whose value or status changed,
+    except in keyframes, which hold all rows.
+    """
+    data = None
+    if PUBLISH_NESTED:
+        with tracing.span("build_tree"):
+            data = {"tsp": tsp, "data": opcua_client.build_plan_data(plan, values)}
+    with tracing.span("flatten", rows=len(values)) as span:
+        slots = None
+        if change_filter is not None:
+            slots = change_filter.changed_slots(plan, values, statuses)
+            metrics.DROPPED.inc(len(values) - len(slots), stage="unchanged")
+            span.set(changed=len(slots))
+        flattab = plan.rows(values, tsp, slots)
+    keyframe = change_filter is not None and change_filter.keyframe
+    return data, flattab, keyframe
+
+
+async def publish_data(endpoint, data, flattab, publisher, parent_span=None, keyframe=False):
+    """
+    Publish a data snapshot of an endpoint to opcuadata (unless data is None) and flat rows
+    to flatopcuadata. Publish errors are logged only, they must not interrupt reading from
+    the OPC UA server. parent_span is the span of the cycle that read the data, if traced.
+    The rows of a keyframe are all published, the deadband filter does not drop any of them.
+    """
+    try:
+        # logger.info(f"Publishing {len(flattab)} sensor values to sensordata tables")
+        with metrics.PUBLISH_DURATION.time(endpoint=endpoint["url"]), tracing.span(
+            "publish", parent_span, lane=f"{endpoint['url']} publish", rows=len(flattab)
+        ):
+            if data is not None:
+                await publisher.publish('opcuadata', endpoint["namespace"], endpoint["machine_name"], data)
+
+            await publisher.publish_rows(
+                'flatopcuadata',
+                flattab,
+                endpoint["namespace"],
+                endpoint["machine_name"],
+                source=endpoint["url"],
+                keyframe=keyframe,
+            )
+    except Exception as e:
+        logger.error(f"Error publishing OPC UA data: {e}")
+
+
+async def publish_aggregates(endpoint, aggregates, publisher, parent_span=None):
+    """Publish the aggregate rows of a sampling window to aggopcuadata. Publish errors are logged only."""
+    try:
+        with tracing.span("publish_aggregates", parent_span, lane=f"{endpoint['url']} publish", rows=len(aggregates)):
+            await publisher.publish_rows('aggopcuadata', aggregates, endpoint["namespace"], endpoint["machine_name"])
+    except Exception as e:
+        logger.error(f"Failed to publish aggregates: {e}")
+
+
+async def poll_group(endpoint, opcua_client, interval, plan, pipeline, outdated=None, on_cycle=None):
+    """
+    Read the variables of one polling group on its own schedule and queue them for publishing.
+    Returns when shutdown is requested or outdated() reports that the plan must be resolved again.
+    on_cycle() is called after every successful cycle.
+    """
+    scheduler = CycleScheduler(sampling_interval(interval), SCHEDULE_OVERRUN_POLICY)
+    scheduler.reset()
+    # A new plan (e.g. after rediscovery) starts with a keyframe and a new aggregation window
+    change_filter = new_change_filter()
+    aggregator = new_aggregator(interval)
+    # Change-only rows and window aggregates must all be published, so they are never coalesced
+    key = (endpoint["url"], interval) if change_filter is None and aggregator is None else None
+    try:
+        while not shutdown_requested and not (outdated is not None and outdated()):
+            cycle_start = time.monotonic()
+            with tracing.trace("cycle", f"{endpoint['url']} {interval}s", endpoint=endpoint["url"], interval=interval):
+                with metrics.READ_DURATION.time(endpoint=endpoint["url"], mode=read_mode(endpoint)), tracing.span("read"):
+                    tsp, values, statuses = await opcua_client.read_plan_values(plan, with_status=True)
+                logger.debug(f"Read {len(values)} values for the {interval}s group of {endpoint['url']}")
+                aggregates = aggregate_sample(aggregator, plan, tsp, values)
+                # While sampling, only the sample closing a window is published
+                if aggregator is None or aggregates is not None:
+                    data, flattab, keyframe = build_snapshot(opcua_client, plan, tsp, values, change_filter, statuses)
+                    await pipeline.put((endpoint, data, flattab, keyframe, aggregates, tracing.current_span()), key=key)
+            metrics.CYCLE_DURATION.observe(time.monotonic() - cycle_start, endpoint=endpoint["url"], interval=interval)
+            profiler.cycle_finished()
+            if on_cycle is not None:
+                on_cycle()
+
+            lateness = await scheduler.wait_next()
+            metrics.CYCLE_LATENESS.observe(lateness, endpoint=endpoint["url"], interval=interval)
+    finally:
+        if scheduler.cycles:
+            logger.info(f"Cycle statistics for the {interval}s group of {endpoint['url']}: {scheduler.stats()}")
+
+
+async def run_polling_groups(endpoint, opcua_client, plan, pipeline, register_measures_once, outdated=None, on_cycle=None):
+    """
+    Poll the variables of a plan in groups of equal interval, each with its own bulk reads.
+    A plan without per-variable intervals is polled as one group every publish interval.
+    Returns when shutdown is requested or the plan is outdated; raises the first error of any group.
+    """
+    groups = plan.split_by_interval(endpoint["publish_interval"])
+    logger.info(f"Polling {len(plan)} variables from {endpoint['url']} in groups: " + ", ".join(
+        f"{len(group)} every {interval}s" for interval, group in groups
+    ))
+
+    # Every group only publishes its own variables, so all measures are registered up front
+    await register_measures_once([{"variable": path} for path in plan.paths])
+
+    tasks = [
+        asyncio.create_task(poll_group(endpoint, opcua_client, interval, group, pipeline, outdated, on_cycle))
+        for interval, group in groups
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def subscribe(opcua_client, plan):
+    """Subscribe to all variables of the plan, returning the collector of their data changes."""
+    collector = DataChangeCollector(plan)
+    await opcua_client.subscribe_plan(
+        plan,
+        collector,
+        SUBSCRIPTION_PUBLISHING_INTERVAL,
+        SUBSCRIPTION_SAMPLING_INTERVAL,
+        SUBSCRIPTION_QUEUE_SIZE,
+    )
+    return collector
+
+
+async def run_subscription(endpoint, opcua_client, collector, pipeline, register_measures_once, outdated=None, on_cycle=None):
+    """
+    Publish the data changes delivered to the collector as they arrive, calling on_cycle() after each batch.
+    Returns when shutdown is requested or outdated() reports that the plan must be resolved again;
+    raises ConnectionError when the session is lost.
+    """
+    plan = collector.plan
+    while not shutdown_requested and not (outdated is not None and outdated()):
+        changes = await collector.wait_for_changes(timeout=1)
+        await opcua_client.check_connection()
+        if not changes:
+            continue
+
+        with tracing.trace("changes", endpoint=endpoint["url"], changes=len(changes)):
+            with tracing.span("flatten", rows=len(changes)):
+                flattab = [
+                    {"tsp": tsp, "variable": plan.paths[index], "value": value}
+                    for index, value, tsp in changes
+                ]
+            data = None
+            if PUBLISH_NESTED:
+                with tracing.span("build_tree"):
+                    data = {"tsp": flattab[-1]["tsp"], "data": opcua_client.build_data_from_plan(plan, collector.values)}
+            logger.debug(f"Data changes received: {len(changes)}")
+
+            await register_measures_once([{"variable": path} for path in plan.paths])
+            # Change batches are never coalesced, every change is published
+            await pipeline.put((endpoint, data, flattab, False, None, tracing.current_span()))
+        profiler.cycle_finished()
+        if on_cycle is not None:
+            on_cycle()
+
+
+async def run_endpoint(endpoint, node_cache, pipeline, measure_publisher):
+    """
+    Connect to one OPC UA endpoint and read its variables until shutdown is requested.
+    Read results are handed to the shared publish pipeline.
+    """
+    variables_config, namespace_to_use, is_nodeset, auto_discover = endpoint["variables_config"]
+
+    use_subscription = ACQUISITION_MODE == "subscription"
+    logger.info(f"Using {'subscription' if use_subscription else 'polling'} acquisition mode for {endpoint['url']}")
+
+    opcua_client = OPCUAClient(endpoint["url"], namespace_to_use, DISCOVERY_REFRESH_INTERVAL, node_cache)
+    opcua_client_instances.append(opcua_client)
+    # Discovered variables are polled until the discovery is refreshed, then resolved again
+    outdated = opcua_client.discovery_outdated if auto_discover else None
 
     first_response = True
-    device_registered = False
+    collector = None
+    # Read errors since the last successful cycle, backed off like failed connection attempts
+    read_failures = 0
+
+    def read_succeeded():
+        nonlocal read_failures
+        read_failures = 0
+
+    async def register_measures_once(flattab):
+        nonlocal first_response
+        if first_response:
+            first_response = False
+            try:
+                await register_measures(measure_publisher, flattab, endpoint["machine_name"])
+            except Exception as e:
+                logger.error(f"Failed to register measures: {e}")
 
     try:
         while not shutdown_requested:
@@ -170,57 +584,148 @@ async def main():
                     break  # Shutdown requested during reconnect
 
                 # Register device after successful connection
-                if not device_registered:
-                    try:
-                        await register_device()
-                        device_registered = True
-                    except Exception as e:
-                        logger.error(f"Failed to register device: {e}")
+                await register_device_once()
 
             try:
-                # Read data based on format
-                if auto_discover:
-                    # Read all variables directly from namespace
-                    data = await opcua_client.read_all_variables_in_namespace()
-                elif is_nodeset:
-                    data = await opcua_client.read_from_nodeset(variables_config)
+                # Traced as "resolve" by the client, only when it actually resolves or browses
+                plan = await build_read_plan(opcua_client, variables_config, is_nodeset, auto_discover)
+                metrics.VARIABLES.set(len(plan), endpoint=endpoint["url"])
+                if use_subscription:
+                    # Subscriptions survive a reactivated session and are only created for a new one
+                    # or a new plan, e.g. after rediscovery, which replaces the previous subscription
+                    if collector is None or collector.plan is not plan or not opcua_client.subscriptions:
+                        await opcua_client.delete_subscriptions()
+                        collector = await subscribe(opcua_client, plan)
+                    await run_subscription(
+                        endpoint, opcua_client, collector, pipeline, register_measures_once, outdated, read_succeeded
+                    )
                 else:
-                    data = await opcua_client.read_from_schema(variables_config)
+                    await run_polling_groups(
+                        endpoint, opcua_client, plan, pipeline, register_measures_once, outdated, read_succeeded
+                    )
 
-                logger.info(f"Value read: {data}")
-                flattab = json_tree_to_table(data)
+            except Exception as e:
+                logger.error(f"Error reading OPC UA variables from {endpoint['url']}: {e}")
+                # Mark as disconnected to trigger reconnection
+                opcua_client.is_connected = False
+                # Repeated errors wait longer, so a server failing every read is not reconnected in a tight loop
+                delay = reconnect_delay(read_failures)
+                read_failures += 1
+                logger.info(f"Reconnecting in {delay:.1f} second(s)...")
+                await sleep(delay)
+    finally:
+        if opcua_client.is_connected:
+            await opcua_client.disconnect()
 
-                # logger.info(f"Publishing {len(flattab)} sensor values to sensordata tables")
-                await ironflock.publish_to_table('opcuadata', OPCUA_NAMESPACE, MACHINE_NAME, data)
 
-                if first_response:
-                    first_response = False
-                    try:
-                        await register_measures(flattab)
-                    except Exception as e:
-                        logger.error(f"Failed to register measures: {e}")
+async def main():
+    global shutdown_requested
 
-                for row in flattab:
-                    # logger.info(f"Publishing sensor data: {row['variable']} = {row['value']}")
-                    await ironflock.publish_to_table('flatopcuadata', OPCUA_NAMESPACE, MACHINE_NAME, row)
+    # Register signal handlers
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGHUP, rediscover_handler)
+    signal.signal(signal.SIGUSR1, profile_handler)
+
+    endpoints = load_endpoints()
+    logger.info(f"Reading from {len(endpoints)} OPC UA endpoint(s)")
+    # Parse all variable configurations up front, so configuration errors stop the app at once
+    for endpoint in endpoints:
+        endpoint["variables_config"] = parse_variables_config(endpoint["variables"], endpoint["namespace"])
+
+    node_cache = NodeCache(NODE_CACHE_FILE) if NODE_CACHE_FILE else None
+    tracing.configure(TRACE_FILE, TRACE_SAMPLE_RATE, TRACE_MAX_BYTES)
+
+    row_filter = None
+    if DEADBAND_ABSOLUTE or DEADBAND_PERCENT or HEARTBEAT_INTERVAL:
+        row_filter = DeadbandFilter(
+            float(DEADBAND_ABSOLUTE or 0), float(DEADBAND_PERCENT or 0), float(HEARTBEAT_INTERVAL or 0)
+        )
+        logger.info(
+            f"Publishing flat rows by exception (absolute deadband {row_filter.absolute}, "
+            f"percent deadband {row_filter.percent}, heartbeat {row_filter.heartbeat_interval}s)"
+        )
+    if SAMPLE_INTERVAL > 0:
+        if WindowAggregator is None:
+            raise RuntimeError("SAMPLE_INTERVAL requires numpy, install it with 'pip install .[aggregation]'")
+        logger.info(f"Sampling every {SAMPLE_INTERVAL}s, publishing aggregates every publish interval")
+    unsupported_tables = tables_without_array_support()
+    if unsupported_tables:
+        raise RuntimeError(
+            f"PUBLISH_BATCH_MODE=message sends lists of rows, but the definitions of {', '.join(unsupported_tables)} "
+            "map one row per message. Adapt them in .ironflock/data-template.yml and list them in PUBLISH_ARRAY_TABLES"
+        )
+    if PUBLISH_CHANGES_ONLY:
+        logger.info(
+            f"Publishing changed flat rows only (keyframe every {KEYFRAME_CYCLES or '-'} cycles, "
+            f"every {KEYFRAME_INTERVAL or '-'}s)"
+        )
 
-            except Exception as e:
-                logger.error(f"Error reading/publishing OPC UA variables: {e}")
-                # Mark as disconnected to trigger reconnection
-                opcua_client.is_connected = False
-                # Continue immediately to trigger reconnection
-                continue
+    # Publishes go through the store-and-forward buffer, which retries them after uplink outages
+    publish_target = ironflock
+    store_forward = None
+    drain_task = None
+    if STORE_FORWARD_FILE:
+        store_forward = StoreAndForward(
+            ironflock,
+            STORE_FORWARD_FILE,
+            STORE_FORWARD_MAX_MESSAGES,
+            STORE_FORWARD_RETENTION,
+            STORE_FORWARD_DROP_POLICY,
+            drain_batch_size=PUBLISH_BATCH_SIZE,
+        )
+        publish_target = store_forward
+        drain_task = asyncio.create_task(store_forward.run())
+
+    # Publishing is shared by all endpoints; the deadband filter keeps its state per endpoint URL
+    publisher = BatchPublisher(publish_target, PUBLISH_BATCH_MODE, PUBLISH_BATCH_SIZE, PUBLISH_BATCH_MAX_BYTES, row_filter)
+    # Measures are always registered row by row, the table expects one row per message
+    measure_publisher = BatchPublisher(publish_target, max_batch_size=PUBLISH_BATCH_SIZE)
+
+    # Aggregate rows have no single value, so the deadband filter does not apply to them
+    aggregate_publisher = BatchPublisher(publish_target, PUBLISH_BATCH_MODE, PUBLISH_BATCH_SIZE, PUBLISH_BATCH_MAX_BYTES)
+
+    async def publish_item(item):
+        endpoint, data, flattab, keyframe, aggregates, span = item
+        await publish_data(endpoint, data, flattab, publisher, span, keyframe)
+        if aggregates:
+            await publish_aggregates(endpoint, aggregates, aggregate_publisher, span)
+
+    # Reading and publishing run decoupled, connected by a bounded queue
+    pipeline = PublishPipeline(publish_item, PUBLISH_QUEUE_SIZE, PUBLISH_QUEUE_POLICY, PUBLISH_WORKERS)
+    pipeline.start()
+
+    # Statistics the components already keep are collected when the metrics are scraped
+    metrics.QUEUE_DEPTH.set_function(lambda: pipeline.depth)
+    metrics.DROPPED.set_function(lambda: pipeline.dropped, stage="publish_queue")
+    if row_filter is not None:
+        metrics.DROPPED.set_function(lambda: row_filter.dropped, stage="deadband")
+    if store_forward is not None:
+        metrics.DROPPED.set_function(lambda: store_forward.dropped, stage="store_forward")
+        metrics.STORE_FORWARD_PENDING.set_function(lambda: store_forward.pending)
+    metrics_server = await metrics.start_metrics_server(METRICS_PORT, METRICS_HOST) if METRICS_PORT else None
 
-            await sleep(PUBLISH_INTERVAL)
+    try:
+        # Every endpoint has its own client and read loop; the NodeCache file is shared
+        await asyncio.gather(*(
+            run_endpoint(endpoint, node_cache.fork() if node_cache else None, pipeline, measure_publisher)
+            for endpoint in endpoints
+        ))
 
     except Exception as e:
         logger.error(f"Fatal error in main loop: {e}", exc_info=True)
+        shutdown_requested = True
         raise
     finally:
         logger.info("Shutting down...")
-        if opcua_client.is_connected:
-            await opcua_client.disconnect()
+        await pipeline.stop()
+        logger.info(f"Publish queue statistics: {pipeline.stats()}")
+        if metrics_server is not None:
+            metrics_server.close()
+        if drain_task is not None:
+            drain_task.cancel()
+            store_forward.close()
 
 if __name__ == "__main__":
     ironflock = IronFlock(mainFunc=main)
-    ironflock.run()
\ No newline at end of file
+    ironflock.run()
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import math
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets in seconds, from 1 ms to 1 min
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values -> value
+        self._functions = {}  # label values -> callable evaluated at scrape time
+        registry.register(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames) or set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects the labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, function, **labels):
+        """Report the return value of function (e.g. an existing statistics counter) at every scrape."""
+        self._functions[self._key(labels)] = function
+
+    def samples(self):
+        """Yield (name suffix, label pairs, value) for every label combination."""
+        for key, value in self._values.items():
+            yield "", list(zip(self.labelnames, key)), value
+        for key, function in self._functions.items():
+            try:
+                value = function()
+            except Exception as e:
+                logger.debug(f"Could not collect {self.name}: {e}")
+                continue
+            yield "", list(zip(self.labelnames, key)), value
+
+
+class Counter(_Metric):
+    """Monotonically increasing total, e.g. the number of nodes read."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. the queue depth."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. durations) over cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # Counts per bucket (plus +Inf), sum, count
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        counts = state[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        state[1] += value
+        state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the enclosed block in seconds."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start, **labels)
+
+    def set_function(self, function, **labels):
+        raise TypeError("Histograms can only be observed")
+
+    def samples(self):
+        for key, (counts, total, count) in self._values.items():
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield "_bucket", labels + [("le", _format_value(bound))], cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, count
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+async def start_metrics_server(port, host="127.0.0.1", registry=REGISTRY):
+    """
+    Serve the registry at http://host:port/metrics until the returned server is closed.
+
+    :return: The asyncio Server
+    """
+
+    async def handle(reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # Skip the request headers
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/", "/metrics"):
+                status, content_type, body = "200 OK", CONTENT_TYPE, registry.render().encode()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"Not Found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.debug(f"Metrics request failed: {e}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+# Metrics of the OPC UA client
+READ_DURATION = Histogram(
+    "opcua_read_duration_seconds", "Duration of reading all variables of a plan", ["endpoint", "mode"]
+)
+READ_BATCH_DURATION = Histogram(
+    "opcua_read_batch_duration_seconds", "Duration of a single Read service request", ["endpoint"]
+)
+PUBLISH_DURATION = Histogram(
+    "opcua_publish_duration_seconds", "Duration of publishing one read result to IronFlock", ["endpoint"]
+)
+CYCLE_DURATION = Histogram(
+    "opcua_cycle_duration_seconds", "Duration of a polling cycle from read start to queueing for publishing",
+    ["endpoint", "interval"],
+)
+CYCLE_LATENESS = Histogram(
+    "opcua_cycle_lateness_seconds", "Delay of a polling cycle start behind its deadline", ["endpoint", "interval"]
+)
+NODES_READ = Counter("opcua_nodes_read_total", "Number of node values read", ["endpoint"])
+BAD_STATUS = Counter("opcua_bad_status_total", "Number of node values read with a bad StatusCode", ["endpoint"])
+RECONNECTS = Counter(
+    "opcua_reconnects_total", "Number of reconnects, by whether the session was reactivated", ["endpoint", "session"]
+)
+DROPPED = Counter(
+    "opcua_dropped_total",
+    "Data dropped before reaching IronFlock: flat rows by the deadband or exact-change filter, "
+    "read results by the publish queue, messages by the store-and-forward buffer",
+    ["stage"],
+)
+VARIABLES = Gauge("opcua_variables", "Number of variables read from the endpoint", ["endpoint"])
+QUEUE_DEPTH = Gauge("opcua_publish_queue_depth", "Read results waiting to be published", [])
+STORE_FORWARD_PENDING = Gauge(
+    "opcua_store_forward_pending", "Messages buffered on disk until IronFlock is reachable", []
+)
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+
+
+class NodeCache:
+    """
+    Persistent on-disk cache of resolved NodeIds, kept across restarts.
+
+    Entries are stored per endpoint together with the server's namespace array
+    and a fingerprint of its start time, build date and namespace metadata. When
+    either differs on connect, e.g. because the server was restarted, the entry is
+    discarded and everything is resolved from the server again.
+    NodeIds are stored as strings (e.g. "ns=2;s=Tank.Temperature").
+    """
+
+    def __init__(self, path, entries=None):
+        self.path = path
+        self.entries = {} if entries is None else entries
+        self.entry = None
+        self._dirty = False
+        if entries is None:
+            self._load()
+
+    def fork(self):
+        """
+        Return a cache for another client that shares this cache's file and entries.
+        Every client binds its own endpoint; saving from any of them writes all entries.
+        """
+        return NodeCache(self.path, self.entries)
+
+    def _load(self):
+        """Load the cache file, starting empty if it is missing or unreadable."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable node cache {self.path}: {e}")
+            return
+
+        if content.get("version") != CACHE_FORMAT_VERSION:
+            logger.info(f"Ignoring node cache {self.path} with unsupported format")
+            return
+        self.entries = content.get("entries", {})
+
+    def bind(self, endpoint, namespaces, fingerprint, reuse=True):
+        """
+        Select the cache entry for an endpoint and validate it against the server.
+
+        :param endpoint: OPC UA endpoint URL
+        :param namespaces: The server's namespace array
+        :param fingerprint: JSON-serializable summary of the server's start time, build date and namespace metadata
+        :param reuse: False discards a valid entry too, so everything is browsed again
+        :return: True if a valid cached entry was found, False if it was (re)created empty
+        """
+        entry = self.entries.get(endpoint)
+        valid = entry and entry.get("namespaces") == list(namespaces) and entry.get("fingerprint") == fingerprint
+        if valid and reuse:
+            self.entry = entry
+            logger.info(f"Using cached NodeIds for {endpoint}")
+            return True
+
+        if valid:
+            logger.info(f"Resolving NodeIds for {endpoint} again, discarding cached NodeIds")
+        elif entry:
+            logger.info(f"Server changed for {endpoint}, discarding cached NodeIds")
+        self.entry = {
+            "namespaces": list(namespaces),
+            "fingerprint": fingerprint,
+            "paths": {},
+            "discovery": {},
+        }
+        self.entries[endpoint] = self.entry
+        self._dirty = True
+        return False
+
+    def get_paths(self, paths):
+        """Return a dict of cached NodeId strings for the given browse path strings."""
+        if self.entry is None:
+            return {}
+        cached = self.entry["paths"]
+        return {path: cached[path] for path in paths if path in cached}
+
+    def set_paths(self, resolved):
+        """Store NodeId strings for browse path strings."""
+        if self.entry is None or not resolved:
+            return
+        self.entry["paths"].update(resolved)
+        self._dirty = True
+
+    def get_discovery(self, key):
+        """Return the cached discovered variables as a list of (nodeid_string, path_parts), or None."""
+        if self.entry is None:
+            return None
+        variables = self.entry["discovery"].get(key)
+        if variables is None:
+            return None
+        return [(nodeid, path_parts) for nodeid, path_parts in variables]
+
+    def set_discovery(self, key, variables):
+        """Store discovered variables as a list of (nodeid_string, path_parts)."""
+        if self.entry is None:
+            return
+        self.entry["discovery"][key] = [[nodeid, list(path_parts)] for nodeid, path_parts in variables]
+        self._dirty = True
+
+    def drop_discovery(self, key=None):
+        """Forget cached discovery results (all of them if key is None)."""
+        if self.entry is None:
+            return
+        if key is None:
+            self.entry["discovery"].clear()
+        else:
+            self.entry["discovery"].pop(key, None)
+        self._dirty = True
+
+    def save(self):
+        """Write the cache to disk if it changed. The file is replaced atomically."""
+        if not self._dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_FORMAT_VERSION, "entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            logger.debug(f"Saved node cache to {self.path}")
+        except OSError as e:
+            logger.warning(f"Could not save node cache to {self.path}: {e}")
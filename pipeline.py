@@ -0,0 +1,122 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A full queue makes the producer wait for a free slot
+POLICY_BLOCK = "block"
+# A full queue discards its oldest item to make room
+POLICY_DROP_OLDEST = "drop-oldest"
+# An item replaces the pending item with the same key; a full queue makes the producer wait
+POLICY_COALESCE_LATEST = "coalesce-latest"
+
+
+class _Slot:
+    """Queue entry whose item can be replaced while it is still pending."""
+
+    __slots__ = ("item", "key")
+
+    def __init__(self, item, key):
+        self.item = item
+        self.key = key
+
+
+class PublishPipeline:
+    """
+    Bounded queue between the OPC UA read loop (producer) and publish workers (consumers).
+
+    The producer hands over each read result with put() and continues with the
+    next cycle, so slow publishing does not delay sampling. What happens when
+    the consumers fall behind and the queue is full is set by the policy:
+    "block" waits for a free slot, "drop-oldest" discards the oldest pending
+    item and "coalesce-latest" replaces a pending item of the same key (e.g. an
+    older snapshot of the same polling group) with the new one.
+    """
+
+    def __init__(self, handler, maxsize=100, policy=POLICY_BLOCK, workers=1):
+        if policy not in (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_COALESCE_LATEST):
+            raise ValueError(f"Unknown queue policy '{policy}'")
+        self.handler = handler
+        self.policy = policy
+        self.workers = max(1, workers)
+        self.queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self._pending = {}  # key -> slot still waiting in the queue
+        self._tasks = []
+
+        self.max_depth = 0
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def depth(self):
+        """Number of items waiting to be published."""
+        return self.queue.qsize()
+
+    def start(self):
+        """Start the consumer tasks."""
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+
+    async def stop(self, timeout=5):
+        """Give the consumers up to timeout seconds to publish pending items, then stop them."""
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping publish pipeline with {self.depth} unpublished items")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def put(self, item, key=None):
+        """
+        Hand an item over to the consumers.
+
+        :param item: Item passed to the handler
+        :param key: Identifies items that may replace each other under "coalesce-latest"
+        """
+        if self.policy == POLICY_COALESCE_LATEST and key is not None:
+            slot = self._pending.get(key)
+            if slot is not None:
+                slot.item = item
+                self.coalesced += 1
+                return
+
+        if self.policy == POLICY_DROP_OLDEST and self.queue.full():
+            oldest = self.queue.get_nowait()
+            self._forget(oldest)
+            self.queue.task_done()
+            self.dropped += 1
+            logger.warning(f"Publish queue full, dropped the oldest item ({self.dropped} dropped so far)")
+
+        slot = _Slot(item, key)
+        if key is not None:
+            self._pending[key] = slot
+        await self.queue.put(slot)
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def _forget(self, slot):
+        if slot.key is not None and self._pending.get(slot.key) is slot:
+            del self._pending[slot.key]
+
+    async def _consume(self):
+        while True:
+            slot = await self.queue.get()
+            self._forget(slot)
+            try:
+                await self.handler(slot.item)
+                self.processed += 1
+            except Exception as e:
+                logger.error(f"Error in publish pipeline: {e}")
+            finally:
+                self.queue.task_done()
+
+    def stats(self):
+        """Return the queue statistics collected so far."""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,136 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import tracemalloc
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Frames stored per allocation while tracemalloc runs; more frames cost more memory
+TRACEMALLOC_FRAMES = 10
+# Lines of the text reports: functions by cumulative time, allocation sites by growth
+REPORT_LIMIT = 30
+
+
+class CycleProfiler:
+    """
+    Profiles the next cycles of the running client on request.
+
+    request() only marks a profile as pending, so it is safe to call from a
+    signal handler. The profile starts when the next cycle finishes and covers
+    the following cycles of all read loops (polling groups, subscriptions,
+    endpoints), so cycles are counted across the whole process. The cProfile
+    stats are written as a .prof file for pstats or snakeviz plus a text report.
+    With tracemalloc enabled, a snapshot is taken after every profiled cycle
+    and the allocation growth per cycle and over all profiled cycles is
+    written as well.
+    """
+
+    def __init__(self, directory, cycles=10, trace_allocations=False):
+        """
+        :param directory: Directory the profiles are written to, created if missing
+        :param cycles: Number of cycles profiled per request
+        :param trace_allocations: Also write tracemalloc snapshot diffs between cycles
+        """
+        self.directory = directory
+        self.cycles = max(1, cycles)
+        self.trace_allocations = trace_allocations
+        self.pending = False
+        self._profile = None
+        self._remaining = 0
+        self._started_tracemalloc = False
+        self._first_snapshot = None
+        self._last_snapshot = None
+        self._allocation_report = []
+
+    @property
+    def active(self):
+        """Whether cycles are currently being profiled."""
+        return self._profile is not None
+
+    def request(self):
+        """Profile the cycles following the next finished cycle."""
+        if self.active or self.pending:
+            logger.info("Profiling is already requested")
+            return
+        self.pending = True
+        logger.info(f"Profiling the next {self.cycles} cycles")
+
+    def cycle_finished(self):
+        """Mark the end of a read cycle, starting or advancing a requested profile."""
+        if self.active:
+            self._remaining -= 1
+            if self.trace_allocations:
+                # Snapshots are slow, keep them out of the CPU profile
+                self._profile.disable()
+                self._compare_snapshot(self.cycles - self._remaining)
+                self._profile.enable()
+            if self._remaining <= 0:
+                self._finish()
+        elif self.pending:
+            self.pending = False
+            self._start()
+
+    def _start(self):
+        self._remaining = self.cycles
+        self._allocation_report = []
+        if self.trace_allocations:
+            # Tracing may already run, e.g. since startup with PYTHONTRACEMALLOC
+            self._started_tracemalloc = not tracemalloc.is_tracing()
+            if self._started_tracemalloc:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._first_snapshot = self._last_snapshot = self._take_snapshot()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def _compare_snapshot(self, cycle):
+        snapshot = self._take_snapshot()
+        self._allocation_report.append(
+            _format_allocation_diff(f"Cycle {cycle}", snapshot.compare_to(self._last_snapshot, "lineno"))
+        )
+        self._last_snapshot = snapshot
+
+    def _finish(self):
+        self._profile.disable()
+        profile, self._profile = self._profile, None
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, f"profile-{stamp}")
+            profile.dump_stats(f"{base}.prof")
+            report = io.StringIO()
+            pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(REPORT_LIMIT)
+            with open(f"{base}.txt", "w") as f:
+                f.write(report.getvalue())
+            logger.info(f"Wrote the profile of {self.cycles} cycles to {base}.prof")
+
+            if self.trace_allocations:
+                total = self._last_snapshot.compare_to(self._first_snapshot, "lineno")
+                with open(f"{base}-tracemalloc.txt", "w") as f:
+                    f.write(_format_allocation_diff(f"All {self.cycles} cycles", total))
+                    f.write("\n".join(self._allocation_report))
+                logger.info(f"Wrote the allocation growth of {self.cycles} cycles to {base}-tracemalloc.txt")
+        except OSError as e:
+            logger.error(f"Could not write profile to {self.directory}: {e}")
+        finally:
+            self._first_snapshot = self._last_snapshot = None
+            self._allocation_report = []
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+
+def _format_allocation_diff(title, statistics):
+    size_diff = sum(statistic.size_diff for statistic in statistics)
+    count_diff = sum(statistic.count_diff for statistic in statistics)
+    lines = [f"{title}: {size_diff / 1024:+.1f} KiB in {count_diff:+d} blocks"]
+    lines.extend(f"  {statistic}" for statistic in statistics[:REPORT_LIMIT])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Each row is sent as its own message, with up to max_batch_size publishes in flight
+MODE_ROWS = "rows"
+# Up to max_batch_size rows are sent together as a list in one message
+MODE_MESSAGE = "message"
+
+
+class BatchPublisher:
+    """
+    Publishes many table rows to IronFlock with as few sequential round-trips as possible.
+
+    In "rows" mode every row remains an individual publish (as the flatopcuadata table
+    definition expects), but a whole batch of acknowledged publishes is awaited together.
+    In "message" mode a batch of rows is sent as one list payload, for backends whose
+    table definition accepts arrays. Batches are capped by row count and, in "message"
+    mode, by the approximate JSON size of the payload. An optional row_filter (e.g. a
+    DeadbandFilter) is applied to the rows before they are batched.
+    """
+
+    def __init__(self, ironflock, mode=MODE_ROWS, max_batch_size=100, max_batch_bytes=256000, row_filter=None):
+        if mode not in (MODE_ROWS, MODE_MESSAGE):
+            raise ValueError(f"Unknown publish batch mode '{mode}'")
+        self.ironflock = ironflock
+        self.mode = mode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_bytes = max_batch_bytes
+        self.row_filter = row_filter
+
+    def _batches(self, rows):
+        """Split rows into batches that respect the row and byte limits."""
+        check_bytes = self.mode == MODE_MESSAGE and self.max_batch_bytes > 0
+        batch = []
+        batch_bytes = 0
+        for row in rows:
+            row_bytes = len(json.dumps(row, default=str)) if check_bytes else 0
+            if batch and (
+                len(batch) >= self.max_batch_size
+                or (check_bytes and batch_bytes + row_bytes > self.max_batch_bytes)
+            ):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append(row)
+            batch_bytes += row_bytes
+        if batch:
+            yield batch
+
+    async def publish(self, tablename, *args):
+        """Publish a single message to a table, without batching or filtering."""
+        return await self.ironflock.publish_to_table(tablename, *args)
+
+    async def publish_rows(self, tablename, rows, *args, source=None, keyframe=False):
+        """
+        Publish rows to a table. Each row (or list of rows in "message" mode) is passed
+        as the last positional argument after args.
+
+        :param tablename: IronFlock table name
+        :param rows: Iterable of row dictionaries
+        :param args: Leading positional arguments, e.g. namespace and machine name
+        :param source: Where the rows come from (e.g. the endpoint URL), passed to the row_filter
+        :param keyframe: The rows are a complete keyframe, the row_filter must not drop any of them
+        :return: Number of rows whose publish was not acknowledged
+        """
+        if self.row_filter is not None:
+            rows = self.row_filter.filter_rows(rows, source, keep_all=keyframe)
+
+        failed = 0
+        for batch in self._batches(rows):
+            if self.mode == MODE_MESSAGE:
+                result = await self.ironflock.publish_to_table(tablename, *args, batch)
+                if result is None:
+                    failed += len(batch)
+            else:
+                results = await asyncio.gather(
+                    *(self.ironflock.publish_to_table(tablename, *args, row) for row in batch)
+                )
+                failed += sum(1 for result in results if result is None)
+
+        if failed:
+            logger.warning(f"{failed} rows to '{tablename}' were not acknowledged")
+        return failed
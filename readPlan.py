@@ -0,0 +1,102 @@
+from asyncua import ua
+
+
+class ReadPlan:
+    """
+    A compiled list of OPC UA variables to read every cycle.
+
+    The plan is built once per connection from the variable configuration and
+    holds everything a read cycle needs: the resolved NodeIds, the output path
+    of each variable (pre-split and joined) and the ReadValueId request objects.
+    It stays valid until the session or the configuration changes.
+    """
+
+    def __init__(self, source=None):
+        self.source = source  # The configuration object this plan was compiled from
+        self.nodeids = []
+        self.nodes = []
+        self.path_parts = []
+        self.paths = []
+        self.read_value_ids = []
+        self.intervals = []  # Per-variable polling interval in seconds, None for the default
+        self._batch_size = None
+        self._read_batches = []
+
+    def __len__(self):
+        return len(self.nodeids)
+
+    def add(self, node, path_parts, interval=None):
+        """
+        Append a variable to the plan.
+
+        :param node: Resolved asyncua Node of the variable.
+        :param path_parts: Output path components, e.g. ["ns2", "Tank", "Temperature"].
+        :param interval: Polling interval in seconds, or None to use the default interval.
+        """
+        nodeid = node.nodeid
+        read_value_id = ua.ReadValueId()
+        read_value_id.NodeId = nodeid
+        read_value_id.AttributeId = ua.AttributeIds.Value
+
+        self.nodeids.append(nodeid)
+        self.nodes.append(node)
+        self.path_parts.append(tuple(path_parts))
+        self.paths.append(".".join(path_parts))
+        self.read_value_ids.append(read_value_id)
+        self.intervals.append(interval)
+        self._batch_size = None  # Invalidate prebuilt batches
+
+    def bind(self, client):
+        """
+        Recreate the plan's Nodes on another asyncua Client, e.g. after a new session
+        was created. NodeIds and read requests stay valid as long as the namespace
+        array is unchanged.
+        """
+        self.nodes = [client.get_node(nodeid) for nodeid in self.nodeids]
+
+    def read_batches(self, batch_size):
+        """
+        Return the Read service parameters for this plan, split into chunks of
+        at most batch_size nodes. The chunks are built once and re-used as long
+        as the batch size does not change.
+        """
+        batch_size = batch_size or len(self.read_value_ids) or 1
+        if batch_size != self._batch_size:
+            self._read_batches = []
+            for start in range(0, len(self.read_value_ids), batch_size):
+                params = ua.ReadParameters()
+                params.TimestampsToReturn = ua.TimestampsToReturn.Neither
+                params.NodesToRead = self.read_value_ids[start : start + batch_size]
+                self._read_batches.append(params)
+            self._batch_size = batch_size
+        return self._read_batches
+
+    def rows(self, values, tsp, slots=None):
+        """
+        Build flat table rows for this plan directly from its output paths.
+
+        :param values: Values in plan order
+        :param tsp: Timestamp of the read, shared by all rows
+        :param slots: Plan indices of the variables to build rows for, by default all
+        :return: List of {"tsp", "variable", "value"} dictionaries in plan order
+        """
+        if slots is None:
+            return [{"tsp": tsp, "variable": path, "value": value} for path, value in zip(self.paths, values)]
+        paths = self.paths
+        return [{"tsp": tsp, "variable": paths[slot], "value": values[slot]} for slot in slots]
+
+    def split_by_interval(self, default_interval):
+        """
+        Group the variables of this plan by their polling interval.
+
+        :param default_interval: Interval in seconds for variables without their own interval
+        :return: List of (interval, ReadPlan) tuples ordered from the fastest interval,
+                 each sub-plan keeping the variable order of this plan
+        """
+        groups = {}
+        for node, path_parts, interval in zip(self.nodes, self.path_parts, self.intervals):
+            interval = interval or default_interval
+            if interval not in groups:
+                groups[interval] = ReadPlan(source=self)
+            groups[interval].add(node, path_parts, interval)
+        return sorted(groups.items())
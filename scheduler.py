@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# Missed ticks are dropped and the next cycle starts on the next deadline of the grid
+POLICY_SKIP = "skip"
+# Missed ticks are merged into one cycle that starts immediately, then the grid is resumed
+POLICY_COALESCE = "coalesce"
+
+
+class CycleScheduler:
+    """
+    Runs a periodic cycle on fixed deadlines of the monotonic clock.
+
+    Deadlines are start + n * interval, so the time spent reading and publishing
+    does not add up to the period. When a cycle takes longer than the interval,
+    the ticks it ran into are either skipped (the next cycle waits for the next
+    deadline on the grid) or coalesced into a single cycle that starts right away.
+    Lateness of every cycle start and the number of overruns are recorded.
+    """
+
+    def __init__(self, interval, policy=POLICY_SKIP, clock=time.monotonic, sleep=asyncio.sleep):
+        if interval <= 0:
+            raise ValueError("Cycle interval must be positive")
+        if policy not in (POLICY_SKIP, POLICY_COALESCE):
+            raise ValueError(f"Unknown overrun policy '{policy}'")
+        self.interval = interval
+        self.policy = policy
+        self._clock = clock
+        self._sleep = sleep
+        self.deadline = None
+
+        self.cycles = 0
+        self.overruns = 0
+        self.missed_ticks = 0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self.total_lateness = 0.0
+
+    def reset(self):
+        """Start a new deadline grid at the current time, e.g. after a reconnect."""
+        self.deadline = self._clock()
+
+    async def wait_next(self):
+        """
+        Sleep until the deadline of the next cycle.
+
+        :return: Lateness of the cycle start in seconds
+        """
+        if self.deadline is None:
+            self.reset()
+            return 0.0
+
+        next_deadline = self.deadline + self.interval
+        now = self._clock()
+        if now > next_deadline:
+            # The previous cycle ran past the deadline of this one
+            overrun = now - next_deadline
+            missed = math.floor(overrun / self.interval) + 1
+            self.overruns += 1
+            self.missed_ticks += missed
+            if self.policy == POLICY_SKIP:
+                next_deadline += missed * self.interval
+                logger.warning(f"Cycle overran by {overrun:.3f}s, skipping {missed} tick(s)")
+            else:
+                next_deadline += (missed - 1) * self.interval
+                logger.warning(f"Cycle overran by {overrun:.3f}s, coalescing {missed} tick(s)")
+
+        if next_deadline > now:
+            await self._sleep(next_deadline - now)
+
+        self.deadline = next_deadline
+        lateness = max(0.0, self._clock() - next_deadline)
+        self.cycles += 1
+        self.last_lateness = lateness
+        self.max_lateness = max(self.max_lateness, lateness)
+        self.total_lateness += lateness
+        return lateness
+
+    def stats(self):
+        """Return the scheduling statistics collected so far."""
+        return {
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "missed_ticks": self.missed_ticks,
+            "last_lateness": self.last_lateness,
+            "max_lateness": self.max_lateness,
+            "mean_lateness": self.total_lateness / self.cycles if self.cycles else 0.0,
+        }
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+# When the buffer is full, delete the oldest buffered messages to make room
+DROP_OLDEST = "oldest"
+# When the buffer is full, discard new messages until the buffer drains
+DROP_NEWEST = "newest"
+
+
+class StoreAndForward:
+    """
+    Crash-safe store-and-forward buffer in front of IronFlock.publish_to_table.
+
+    Messages that cannot be published (not acknowledged or raising) are written to
+    a local SQLite database in WAL mode and published again in batches, oldest
+    first, once the platform is reachable. While messages are buffered, new ones
+    are queued behind them so the table receives them in order. The buffer is
+    bounded by a message count and a retention time; which messages are dropped
+    when it is full is decided by the drop policy.
+
+    Failed messages are collected in memory and written with a single INSERT and
+    commit per event loop iteration, so a publish batch that fails as a whole
+    costs one disk write instead of one per message.
+
+    It offers the same publish_to_table() call as IronFlock and can be used in
+    its place, e.g. as the target of a BatchPublisher.
+    """
+
+    def __init__(self, ironflock, path, max_messages=100000, retention=86400, drop_policy=DROP_OLDEST,
+                 drain_batch_size=500, retry_interval=5):
+        if drop_policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy '{drop_policy}'")
+        self.ironflock = ironflock
+        self.path = path
+        self.max_messages = max_messages
+        self.retention = retention
+        self.drop_policy = drop_policy
+        self.drain_batch_size = max(1, drain_batch_size)
+        self.retry_interval = retry_interval
+        self.dropped = 0
+        self._queued = []  # Messages stored but not yet written, as INSERT parameters
+        self._flush_handle = None
+
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, "
+            "tablename TEXT NOT NULL, args TEXT NOT NULL)"
+        )
+        self.db.commit()
+        self._expire()
+        self.pending = self.db.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        if self.pending:
+            logger.info(f"{self.pending} buffered messages in {path} will be published")
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    async def _try_publish(self, tablename, args):
+        """Publish one message, returning the publication or None if it failed."""
+        try:
+            return await self.ironflock.publish_to_table(tablename, *args)
+        except Exception as e:
+            logger.debug(f"Publishing to '{tablename}' failed: {e}")
+            return None
+
+    async def publish_to_table(self, tablename, *args):
+        """
+        Publish a message, buffering it on disk if it cannot be published now.
+
+        :return: The publication, or True if the message was buffered instead
+        """
+        if not self.pending:
+            result = await self._try_publish(tablename, args)
+            if result is not None:
+                return result
+        self.store(tablename, args)
+        return True
+
+    def store(self, tablename, args):
+        """
+        Append a message to the buffer, applying retention and the drop policy.
+        The message is written to disk by flush(), which runs once the current
+        event loop iteration is done (or at once without a running loop).
+        """
+        if self.pending >= self.max_messages:
+            self.flush()
+            self._expire()
+        if self.pending >= self.max_messages:
+            if self.drop_policy == DROP_NEWEST:
+                self.dropped += 1
+                return
+            surplus = self.pending - self.max_messages + 1
+            self.db.execute(
+                "DELETE FROM messages WHERE id IN (SELECT id FROM messages ORDER BY id LIMIT ?)", (surplus,)
+            )
+            self.pending -= surplus
+            self.dropped += surplus
+
+        self._queued.append((time.time(), tablename, json.dumps(list(args), default=str)))
+        if not self.pending:
+            logger.warning(f"Publishing failed, buffering messages in {self.path}")
+        self.pending += 1
+
+        if self._flush_handle is None:
+            try:
+                self._flush_handle = asyncio.get_running_loop().call_soon(self.flush)
+            except RuntimeError:
+                self.flush()
+
+    def flush(self):
+        """Write the messages collected by store() to the database with one commit."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._queued:
+            return
+        self.db.executemany("INSERT INTO messages (created, tablename, args) VALUES (?, ?, ?)", self._queued)
+        self.db.commit()
+        self._queued = []
+
+    def _expire(self):
+        """Delete messages older than the retention time."""
+        if self.retention <= 0:
+            return
+        cursor = self.db.execute("DELETE FROM messages WHERE created < ?", (time.time() - self.retention,))
+        self.db.commit()
+        if cursor.rowcount > 0:
+            self.dropped += cursor.rowcount
+            self.pending = max(0, self.pending - cursor.rowcount)
+            logger.warning(f"Dropped {cursor.rowcount} buffered messages older than {self.retention}s")
+
+    async def drain(self):
+        """
+        Publish buffered messages in batches until the buffer is empty or a publish fails.
+
+        :return: Number of messages published
+        """
+        self.flush()
+        self._expire()
+        published = 0
+        while self.pending:
+            batch = self.db.execute(
+                "SELECT id, tablename, args FROM messages ORDER BY id LIMIT ?", (self.drain_batch_size,)
+            ).fetchall()
+            if not batch:
+                self.pending = 0
+                break
+
+            results = await asyncio.gather(
+                *(self._try_publish(tablename, json.loads(args)) for _, tablename, args in batch)
+            )
+            done = [(row[0],) for row, result in zip(batch, results) if result is not None]
+            self.db.executemany("DELETE FROM messages WHERE id = ?", done)
+            self.db.commit()
+            self.pending = max(0, self.pending - len(done))
+            published += len(done)
+            if len(done) < len(batch):
+                break
+
+        if published:
+            logger.info(f"Published {published} buffered messages, {self.pending} remaining")
+        return published
+
+    async def run(self):
+        """Drain the buffer every retry_interval seconds until cancelled."""
+        while True:
+            if self.pending:
+                await self.drain()
+            await asyncio.sleep(self.retry_interval)
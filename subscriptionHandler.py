@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Notifications kept while the publish path is busy; older ones are dropped first
+DEFAULT_MAX_PENDING = 100000
+
+
+class DataChangeCollector:
+    """
+    asyncua subscription handler that collects data-change notifications for a ReadPlan.
+
+    Every notification is kept (including several changes of one variable between
+    two drains, as delivered by a MonitoredItem queue) until the publish path picks
+    them up with wait_for_changes(). The latest value of every plan variable is
+    tracked in values, so a full snapshot can be assembled at any time.
+    """
+
+    def __init__(self, plan, max_pending=DEFAULT_MAX_PENDING):
+        self.plan = plan
+        self.values = [None] * len(plan)
+        self.dropped = 0
+        self._pending = deque(maxlen=max_pending)
+        self._event = asyncio.Event()
+
+        # A NodeId may appear more than once in a plan (e.g. under two paths)
+        self._slots = {}
+        for index, nodeid in enumerate(plan.nodeids):
+            self._slots.setdefault(nodeid, []).append(index)
+
+    def datachange_notification(self, node, val, data):
+        """Called by asyncua for every data change of a monitored item."""
+        data_value = data.monitored_item.Value
+        if data_value.StatusCode is not None and not data_value.StatusCode.is_good():
+            logger.debug(f"Bad status for {node.nodeid}: {data_value.StatusCode.name}")
+            val = None
+
+        timestamp = data_value.SourceTimestamp or data_value.ServerTimestamp
+        tsp = (timestamp or datetime.now()).astimezone().isoformat()
+
+        for index in self._slots.get(node.nodeid, ()):
+            self.values[index] = val
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append((index, val, tsp))
+        self._event.set()
+
+    def status_change_notification(self, status):
+        """Called by asyncua when the subscription status changes (e.g. timeout)."""
+        logger.warning(f"Subscription status changed: {status.Status}")
+
+    async def wait_for_changes(self, timeout=None):
+        """
+        Wait for data changes and return all pending ones.
+
+        :param timeout: Seconds to wait before returning an empty list
+        :return: List of (plan_index, value, tsp) tuples in arrival order
+        """
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._event.clear()
+
+        changes = list(self._pending)
+        self._pending.clear()
+        return changes
@@ -15,7 +15,7 @@ print("=" * 80)
 client = OPCUAClient("opc.tcp://dummy:4840", "http://example.com")
 
 # Test the helper functions
-print("\n1. Testing _build_nested_dict:")
+print("\n1. Testing _insert_path:")
 print("-" * 80)
 
 test_cases = [
@@ -25,29 +25,15 @@ test_cases = [
     (["Status"], "Running"),  # Single level
 ]
 
+tree = {}
 for path, value in test_cases:
-    result = client._build_nested_dict(path, value)
+    client._insert_path(tree, path, value)
     print(f"  Path: {path}")
     print(f"  Value: {value}")
-    print(f"  Result: {result}")
+    print(f"  Tree: {tree}")
     print()
 
-print("\n2. Testing _merge_nested_dicts:")
-print("-" * 80)
-
-dict1 = {"Machine1": {"Tank": {"Temperature": 65.3}}}
-dict2 = {"Machine1": {"Tank": {"Pressure": 2.5}}}
-merged = client._merge_nested_dicts(dict1, dict2)
-print(f"  Dict1: {dict1}")
-print(f"  Dict2: {dict2}")
-print(f"  Merged: {merged}")
-
-dict3 = {"Machine1": {"Motor": {"Speed": 1450.0}}}
-merged2 = client._merge_nested_dicts(merged, dict3)
-print(f"\n  Add Dict3: {dict3}")
-print(f"  Result: {merged2}")
-
-print("\n\n3. Simulating NodeSet with nested paths:")
+print("\n\n2. Simulating NodeSet with nested paths:")
 print("-" * 80)
 
 # Simulate what would be output with nested NodeIds
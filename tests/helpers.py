@@ -0,0 +1,18 @@
+"""
+Shared test doubles for the unit tests
+"""
+
+
+class FakeClock:
+    """Monotonic clock stand-in that only advances when a test sets now or awaits sleep()"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Unit tests for adaptive batch sizing of bulk OPC UA requests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batchSizer import AdaptiveBatchSize
+
+
+class TestAdaptiveBatchSize(unittest.TestCase):
+    """Test limit handling and round-trip based sizing"""
+
+    def test_advertised_limit_is_used_and_capped(self):
+        """Test that an advertised limit sets a fixed size, capped by the maximum"""
+        batch_size = AdaptiveBatchSize(50, 1000)
+        self.assertEqual(batch_size.size, 50)
+        self.assertEqual(AdaptiveBatchSize(5000, 1000).size, 1000)
+
+        batch_size.record(50, 10.0)
+        batch_size.record(50, 0.001)
+        self.assertEqual(batch_size.size, 50)
+
+    def test_fast_full_batches_grow_up_to_maximum(self):
+        """Test that the size doubles after fast full batches"""
+        batch_size = AdaptiveBatchSize(0, 300, initial=100, target_rtt=1.0)
+        batch_size.record(100, 0.1)
+        self.assertEqual(batch_size.size, 200)
+        batch_size.record(50, 0.1)  # a partial batch says nothing about larger ones
+        self.assertEqual(batch_size.size, 200)
+        batch_size.record(200, 0.1)
+        self.assertEqual(batch_size.size, 300)
+
+    def test_slow_requests_shrink(self):
+        """Test that the size halves after a request slower than the target"""
+        batch_size = AdaptiveBatchSize(0, 1000, initial=100, target_rtt=1.0)
+        batch_size.record(100, 0.7)  # between half and full target: unchanged
+        self.assertEqual(batch_size.size, 100)
+        batch_size.record(100, 1.5)
+        self.assertEqual(batch_size.size, 50)
+
+    def test_rejection_lowers_the_ceiling(self):
+        """Test that a rejected request halves the size for good"""
+        batch_size = AdaptiveBatchSize(0, 1000, initial=8)
+        self.assertTrue(batch_size.reject())
+        self.assertEqual((batch_size.size, batch_size.maximum), (4, 4))
+        batch_size.record(4, 0.001)
+        self.assertEqual(batch_size.size, 4)
+
+        batch_size = AdaptiveBatchSize(1, 1000)
+        self.assertFalse(batch_size.reject())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the exact-change filter with keyframes
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import FakeClock
+
+from changeFilter import ChangeFilter
+
+GOOD = 0
+BAD = 0x80340000  # BadNodeIdUnknown
+
+
+class TestChangeFilter(unittest.TestCase):
+    """Test change detection per plan slot and keyframes"""
+
+    def setUp(self):
+        # Plans are only compared by identity
+        self.plan = object()
+
+    def test_first_cycle_is_keyframe_then_changes_only(self):
+        """Test that only slots whose value changed are passed after the first cycle"""
+        change_filter = ChangeFilter()
+        self.assertEqual(change_filter.changed_slots(self.plan, [True, "Auto", 1.5]), [0, 1, 2])
+        self.assertTrue(change_filter.keyframe)
+        self.assertEqual(change_filter.changed_slots(self.plan, [True, "Auto", 1.5]), [])
+        self.assertFalse(change_filter.keyframe)
+        self.assertEqual(change_filter.changed_slots(self.plan, [False, "Auto", 1.5]), [0])
+        self.assertEqual(change_filter.changed_slots(self.plan, [False, "Manual", 2.0]), [1, 2])
+        self.assertEqual(change_filter.keyframes, 1)
+        self.assertEqual(change_filter.passed, 6)
+        self.assertEqual(change_filter.dropped, 6)
+
+    def test_type_nan_and_none_changes(self):
+        """Test that a type change is a change and an unchanged NaN or None is not"""
+        change_filter = ChangeFilter()
+        nan = float("nan")
+        change_filter.changed_slots(self.plan, [1, None, nan])
+        self.assertEqual(change_filter.changed_slots(self.plan, [True, None, float("nan")]), [0])
+        self.assertEqual(change_filter.changed_slots(self.plan, [True, 0, 1.0]), [1, 2])
+
+    def test_status_changes(self):
+        """Test that a StatusCode change is published even if the value stays the same"""
+        change_filter = ChangeFilter()
+        change_filter.changed_slots(self.plan, [True, None, 1.0], [GOOD, BAD, GOOD])
+        self.assertEqual(change_filter.changed_slots(self.plan, [True, None, 1.0], [GOOD, GOOD, GOOD]), [1])
+        self.assertEqual(change_filter.changed_slots(self.plan, [True, None, 1.0], [GOOD, GOOD, GOOD]), [])
+
+    def test_keyframe_every_k_cycles(self):
+        """Test that all slots are published every keyframe_cycles cycles"""
+        change_filter = ChangeFilter(keyframe_cycles=3)
+        passed = [len(change_filter.changed_slots(self.plan, [True, "Auto", 1.5])) for _ in range(7)]
+        self.assertEqual(passed, [3, 0, 0, 3, 0, 0, 3])
+
+    def test_keyframe_every_t_seconds(self):
+        """Test that all slots are published once keyframe_interval seconds have passed"""
+        clock = FakeClock()
+        change_filter = ChangeFilter(keyframe_interval=10, clock=clock)
+        change_filter.changed_slots(self.plan, [True, "Auto", 1.5])
+        clock.now = 9.9
+        self.assertEqual(change_filter.changed_slots(self.plan, [True, "Auto", 1.5]), [])
+        clock.now = 10
+        self.assertEqual(change_filter.changed_slots(self.plan, [True, "Auto", 1.5]), [0, 1, 2])
+        clock.now = 15
+        self.assertEqual(change_filter.changed_slots(self.plan, [True, "Auto", 1.5]), [])
+
+    def test_new_plan_and_reset_start_with_keyframe(self):
+        """Test that a different plan or a reset publishes all slots"""
+        change_filter = ChangeFilter()
+        change_filter.changed_slots(self.plan, [True, "Auto", 1.5])
+        other = object()
+        self.assertEqual(change_filter.changed_slots(other, [True, "Auto"]), [0, 1])
+        self.assertEqual(change_filter.changed_slots(other, [True, "Auto"]), [])
+        change_filter.reset()
+        self.assertEqual(change_filter.changed_slots(other, [True, "Auto"]), [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
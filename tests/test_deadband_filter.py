@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the report-by-exception deadband filter
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import FakeClock
+
+from deadbandFilter import DeadbandFilter
+
+
+def row(variable, value):
+    return {"tsp": "2025-11-20T10:00:00Z", "variable": variable, "value": value}
+
+
+class TestDeadbandFilter(unittest.TestCase):
+    """Test deadbands and heartbeats per variable path"""
+
+    def values_passed(self, row_filter, variable, values):
+        return [r["value"] for value in values for r in row_filter.filter_rows([row(variable, value)])]
+
+    def test_unchanged_values_are_dropped(self):
+        """Test that only changes pass with a zero deadband, for any value type"""
+        row_filter = DeadbandFilter()
+        self.assertEqual(self.values_passed(row_filter, "A", [1, 1, 2, 2, 1]), [1, 2, 1])
+        self.assertEqual(self.values_passed(row_filter, "B", ["On", "On", None, None]), ["On", None])
+        self.assertEqual(len(self.values_passed(row_filter, "C", [float("nan"), float("nan"), 1.0])), 2)
+        self.assertEqual(row_filter.dropped, 5)
+
+    def test_absolute_deadband(self):
+        """Test that changes within the absolute deadband are dropped"""
+        row_filter = DeadbandFilter(absolute=0.5)
+        self.assertEqual(self.values_passed(row_filter, "A", [10.0, 10.4, 10.6, 10.2, 10.0]), [10.0, 10.6, 10.0])
+
+    def test_percent_deadband(self):
+        """Test that the percent deadband is relative to the last published value"""
+        row_filter = DeadbandFilter(percent=10)
+        self.assertEqual(self.values_passed(row_filter, "A", [100, 109, 111, 101, 99]), [100, 111, 99])
+
+    def test_heartbeat_republishes_silent_variables(self):
+        """Test that an unchanged value passes again after the heartbeat interval"""
+        clock = FakeClock()
+        row_filter = DeadbandFilter(heartbeat_interval=60, clock=clock)
+        rows = [row("A", 1), row("B", 2)]
+
+        self.assertEqual(len(row_filter.filter_rows(rows)), 2)
+        clock.now = 30
+        self.assertEqual(row_filter.filter_rows([row("A", 1), row("B", 3)]), [row("B", 3)])
+        clock.now = 61
+        self.assertEqual(row_filter.filter_rows([row("A", 1), row("B", 3)]), [row("A", 1)])
+
+    def test_keep_all_passes_and_remembers_rows(self):
+        """Test that keyframe rows pass the deadband and become the new reference values"""
+        row_filter = DeadbandFilter(absolute=0.5)
+        row_filter.filter_rows([row("A", 10.0)])
+        self.assertEqual(row_filter.filter_rows([row("A", 10.2)], keep_all=True), [row("A", 10.2)])
+        self.assertEqual(row_filter.filter_rows([row("A", 10.6)]), [])
+        self.assertEqual(row_filter.filter_rows([row("A", 10.8)]), [row("A", 10.8)])
+
+    def test_sources_are_filtered_separately(self):
+        """Test that equal variable paths of two endpoints do not share their last value"""
+        row_filter = DeadbandFilter()
+        self.assertEqual(len(row_filter.filter_rows([row("Machine.Speed", 1)], "opc.tcp://plc1:4840")), 1)
+        self.assertEqual(len(row_filter.filter_rows([row("Machine.Speed", 1)], "opc.tcp://plc2:4840")), 1)
+        self.assertEqual(row_filter.filter_rows([row("Machine.Speed", 1)], "opc.tcp://plc1:4840"), [])
+        self.assertEqual(len(row_filter.filter_rows([row("Machine.Speed", 2)], "opc.tcp://plc2:4840")), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,14 +3,19 @@
 Tests for flatTree JSON to table conversion
 """
 
-import unittest
-import sys
 import os
+import sys
+import unittest
 from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flatTree import json_tree_to_table, flatten_json_tree
+from flatTree import (
+    flatten_json_tree,
+    iter_json_tree_chunks,
+    iter_json_tree_rows,
+    json_tree_to_table,
+)
 
 
 class TestFlatTree(unittest.TestCase):
@@ -159,6 +164,39 @@ class TestFlatTree(unittest.TestCase):
         self.assertAlmostEqual(values_by_var["FloatValue"], 3.14)
         self.assertEqual(values_by_var["BoolValue"], True)
 
+    def test_iter_rows_keeps_depth_first_order(self):
+        """Test that rows are yielded lazily in tree order"""
+        json_obj = {"A": 1, "B": {"C": {"D": 2}, "E": 3}, "tsp": "x", "F": {}, "G": 4}
+        tsp = "2025-11-20T10:00:00Z"
+
+        rows = iter_json_tree_rows(json_obj, tsp)
+
+        self.assertEqual(next(rows), {"tsp": tsp, "variable": "A", "value": 1})
+        self.assertEqual([r["variable"] for r in rows], ["B.C.D", "B.E", "G"])
+
+    def test_iter_rows_handles_deep_trees(self):
+        """Test that very deep trees do not hit the recursion limit"""
+        depth = sys.getrecursionlimit() + 100
+        json_obj = leaf = {}
+        for _ in range(depth):
+            leaf["n"] = {}
+            leaf = leaf["n"]
+        leaf["value"] = 1
+
+        rows = list(iter_json_tree_rows(json_obj, "2025-11-20T10:00:00Z"))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["variable"].count("."), depth)
+
+    def test_iter_chunks(self):
+        """Test that rows are yielded in lists of at most the chunk size"""
+        json_obj = {"tsp": "2025-11-20T10:00:00Z", "data": {f"V{i}": i for i in range(5)}}
+
+        chunks = list(iter_json_tree_chunks(json_obj, 2))
+
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1])
+        self.assertEqual(chunks[2][0]["variable"], "V4")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Prometheus text metrics
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Counter, Gauge, Histogram, Registry, start_metrics_server
+
+
+class TestMetrics(unittest.TestCase):
+    """Test metric types and the text format"""
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge_render_with_labels(self):
+        """Test that counters add up per label set and gauges keep the last value"""
+        counter = Counter("nodes_read_total", "Nodes read", ["endpoint"], registry=self.registry)
+        counter.inc(5, endpoint="opc.tcp://a")
+        counter.inc(2, endpoint="opc.tcp://a")
+        gauge = Gauge("queue_depth", "Queue depth", registry=self.registry)
+        gauge.set(3)
+
+        text = self.registry.render()
+        self.assertIn("# TYPE nodes_read_total counter\n", text)
+        self.assertIn('nodes_read_total{endpoint="opc.tcp://a"} 7\n', text)
+        self.assertIn("queue_depth 3\n", text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that bucket counts include all smaller buckets and +Inf counts everything"""
+        histogram = Histogram("read_seconds", "Read", ["mode"], buckets=(0.1, 1), registry=self.registry)
+        for value in (0.05, 0.5, 0.5, 3):
+            histogram.observe(value, mode="nodeset")
+
+        lines = self.registry.render().splitlines()
+        self.assertIn('read_seconds_bucket{mode="nodeset",le="0.1"} 1', lines)
+        self.assertIn('read_seconds_bucket{mode="nodeset",le="1"} 3', lines)
+        self.assertIn('read_seconds_bucket{mode="nodeset",le="+Inf"} 4', lines)
+        self.assertIn('read_seconds_sum{mode="nodeset"} 4.05', lines)
+        self.assertIn('read_seconds_count{mode="nodeset"} 4', lines)
+
+    def test_functions_are_evaluated_at_scrape_time(self):
+        """Test that set_function reports the current value of existing statistics"""
+        stats = {"dropped": 1}
+        counter = Counter("dropped_total", "Dropped", ["stage"], registry=self.registry)
+        counter.set_function(lambda: stats["dropped"], stage="deadband")
+        stats["dropped"] = 4
+        self.assertIn('dropped_total{stage="deadband"} 4\n', self.registry.render())
+
+    def test_labels_are_validated_and_escaped(self):
+        """Test that wrong label names raise and label values are escaped"""
+        gauge = Gauge("variables", "Variables", ["endpoint"], registry=self.registry)
+        with self.assertRaises(ValueError):
+            gauge.set(1, url="x")
+        gauge.set(1, endpoint='a "b"\\')
+        self.assertIn('variables{endpoint="a \\"b\\"\\\\"} 1', self.registry.render())
+
+    def test_duplicate_names_are_rejected(self):
+        """Test that a metric name can only be registered once"""
+        Gauge("variables", "Variables", registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter("variables", "Variables", registry=self.registry)
+
+
+class TestMetricsServer(unittest.IsolatedAsyncioTestCase):
+    """Test the HTTP endpoint"""
+
+    async def request(self, port, path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response.decode()
+
+    async def test_metrics_are_served(self):
+        """Test that /metrics returns the registry and other paths 404"""
+        registry = Registry()
+        Gauge("queue_depth", "Queue depth", registry=registry).set(2)
+        server = await start_metrics_server(0, "127.0.0.1", registry)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            response = await self.request(port, "/metrics")
+            self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+            self.assertIn("queue_depth 2\n", response)
+            self.assertTrue((await self.request(port, "/other")).startswith("HTTP/1.1 404"))
+        finally:
+            server.close()
+            await server.wait_closed()
+
+
+if __name__ == '__main__':
+    unittest.main()
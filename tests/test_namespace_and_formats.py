@@ -3,10 +3,11 @@
 Integration tests for namespace detection and format handling
 """
 
-import unittest
 import json
-import sys
 import os
+import sys
+import unittest
+from unittest import mock
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -23,10 +24,12 @@ class MockClient:
     def __init__(self, endpoint):
         self.endpoint = endpoint
 
-sys.modules['asyncua'] = type('module', (), {'Client': MockClient})()
+sys.modules['asyncua'] = type('module', (), {'Client': MockClient, 'ua': type('ua', (), {})})()
 sys.modules['ironflock'] = type('module', (), {'IronFlock': type('IronFlock', (), {})})()
 
-from main import clean_multiline_env_var
+from main import clean_multiline_env_var, load_endpoints, parse_variables_config
+
+main = sys.modules['main']
 
 
 class TestNamespaceDetection(unittest.TestCase):
@@ -157,5 +160,66 @@ class TestFormatDetection(unittest.TestCase):
         self.assertTrue(is_legacy)
 
 
+class TestEndpointConfig(unittest.TestCase):
+    """Test parsing of variable configurations and multi-endpoint settings"""
+
+    def test_parse_variables_config_formats(self):
+        """Test format detection for strings and parsed objects"""
+        config, namespace, is_nodeset, auto_discover = parse_variables_config("", "urn:fallback")
+        self.assertEqual((config, namespace, is_nodeset, auto_discover), (None, "urn:fallback", False, True))
+
+        nodeset = {"NamespaceUris": ["http://example.com/"], "UAVariables": []}
+        _, namespace, is_nodeset, _ = parse_variables_config(json.dumps(nodeset), "urn:fallback")
+        self.assertEqual((namespace, is_nodeset), ("http://example.com/", True))
+
+        config, _, is_nodeset, auto_discover = parse_variables_config({"Tank": "Temperature"}, "urn:fallback")
+        self.assertEqual((config, is_nodeset, auto_discover), ({"Tank": "Temperature"}, False, False))
+
+    def test_single_endpoint_without_opcua_endpoints(self):
+        """Test that OPCUA_URL is used when OPCUA_ENDPOINTS is not set"""
+        with mock.patch.object(main, "OPCUA_ENDPOINTS", ""):
+            endpoints = load_endpoints()
+        self.assertEqual(len(endpoints), 1)
+        self.assertEqual(endpoints[0]["url"], main.OPCUA_URL)
+        self.assertEqual(endpoints[0]["machine_name"], main.MACHINE_NAME)
+
+    def test_endpoints_fall_back_to_global_settings(self):
+        """Test that endpoint keys default to the global environment variables"""
+        value = json.dumps([
+            {"url": "opc.tcp://plc1:4840", "machine_name": "Press 1", "publish_interval": 1},
+            {"url": "opc.tcp://plc2:4840", "variables": {"Tank": "Level"}},
+        ])
+        with mock.patch.object(main, "OPCUA_ENDPOINTS", value):
+            endpoints = load_endpoints()
+        self.assertEqual([e["machine_name"] for e in endpoints], ["Press 1", main.MACHINE_NAME])
+        self.assertEqual([e["publish_interval"] for e in endpoints], [1, main.PUBLISH_INTERVAL])
+        self.assertEqual(endpoints[1]["variables"], {"Tank": "Level"})
+        self.assertEqual(endpoints[0]["namespace"], main.OPCUA_NAMESPACE)
+
+    def test_endpoints_without_url_are_rejected(self):
+        """Test that every endpoint needs a url"""
+        with mock.patch.object(main, "OPCUA_ENDPOINTS", '[{"machine_name": "x"}]'):
+            with self.assertRaises(ValueError):
+                load_endpoints()
+
+
+class TestReconnectBackoff(unittest.TestCase):
+    """Test the jittered exponential reconnect delay"""
+
+    def test_delay_doubles_per_attempt(self):
+        """Test that the upper bound of the delay doubles with every failed attempt"""
+        delays = [main.reconnect_delay(attempt, base=1, maximum=60, rand=lambda: 1.0) for attempt in range(4)]
+        self.assertEqual(delays, [1, 2, 4, 8])
+
+    def test_delay_is_capped(self):
+        """Test that the delay never exceeds the maximum, even after many attempts"""
+        self.assertEqual(main.reconnect_delay(1000, base=1, maximum=60, rand=lambda: 1.0), 60)
+
+    def test_delay_is_jittered(self):
+        """Test that the delay is scaled by the random factor"""
+        self.assertEqual(main.reconnect_delay(3, base=1, maximum=60, rand=lambda: 0.25), 2)
+        self.assertEqual(main.reconnect_delay(3, base=1, maximum=60, rand=lambda: 0.0), 0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the persistent NodeId cache
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nodeCache import NodeCache
+
+ENDPOINT = "opc.tcp://localhost:4840"
+NAMESPACES = ["http://opcfoundation.org/UA/", "http://example.com/"]
+FINGERPRINT = {
+    "start_time": "2025-03-01 08:00:00",
+    "build_date": "2025-01-01 00:00:00",
+    "namespaces": [["http://example.com/", "1.0", "2025-01-01"]],
+}
+
+
+class TestNodeCache(unittest.TestCase):
+    """Test storing and validating cached NodeIds"""
+
+    def setUp(self):
+        """Create a temporary cache file location"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "cache.json")
+
+    def _populated_cache(self):
+        cache = NodeCache(self.path)
+        cache.bind(ENDPOINT, NAMESPACES, FINGERPRINT)
+        cache.set_paths({"1:Tank/1:Temperature": "ns=1;s=Tank.Temperature"})
+        cache.set_discovery("1", [("ns=1;i=6001", ("ns1", "Machine", "Status"))])
+        cache.save()
+        return cache
+
+    def test_round_trip_across_instances(self):
+        """Test that a saved cache is valid for the same server after restart"""
+        self._populated_cache()
+
+        cache = NodeCache(self.path)
+        self.assertTrue(cache.bind(ENDPOINT, NAMESPACES, FINGERPRINT))
+        self.assertEqual(
+            cache.get_paths(["1:Tank/1:Temperature", "1:Tank/1:Level"]),
+            {"1:Tank/1:Temperature": "ns=1;s=Tank.Temperature"},
+        )
+        self.assertEqual(cache.get_discovery("1"), [("ns=1;i=6001", ["ns1", "Machine", "Status"])])
+
+    def test_changed_namespaces_discard_entry(self):
+        """Test that a different namespace array or metadata invalidates the entry"""
+        self._populated_cache()
+
+        cache = NodeCache(self.path)
+        self.assertFalse(cache.bind(ENDPOINT, NAMESPACES + ["urn:new"], FINGERPRINT))
+        self.assertEqual(cache.get_paths(["1:Tank/1:Temperature"]), {})
+
+        cache = NodeCache(self.path)
+        self.assertFalse(cache.bind(ENDPOINT, NAMESPACES, dict(FINGERPRINT, namespaces=[["http://example.com/", "1.1", "2025-02-01"]])))
+        self.assertIsNone(cache.get_discovery("1"))
+
+    def test_restarted_server_discards_entry(self):
+        """Test that a different server start time invalidates the entry"""
+        self._populated_cache()
+
+        cache = NodeCache(self.path)
+        self.assertFalse(cache.bind(ENDPOINT, NAMESPACES, dict(FINGERPRINT, start_time="2025-03-02 08:00:00")))
+        self.assertEqual(cache.get_paths(["1:Tank/1:Temperature"]), {})
+
+    def test_bind_without_reuse_discards_valid_entry(self):
+        """Test that a later session browses again even though the entry is still valid"""
+        self._populated_cache()
+
+        cache = NodeCache(self.path)
+        self.assertFalse(cache.bind(ENDPOINT, NAMESPACES, FINGERPRINT, reuse=False))
+        self.assertEqual(cache.get_paths(["1:Tank/1:Temperature"]), {})
+        self.assertIsNone(cache.get_discovery("1"))
+
+    def test_drop_discovery(self):
+        """Test that discovery results can be dropped on demand"""
+        cache = self._populated_cache()
+        cache.drop_discovery()
+        self.assertIsNone(cache.get_discovery("1"))
+
+    def test_unreadable_file_starts_empty(self):
+        """Test that a corrupt cache file is ignored"""
+        with open(self.path, "w") as f:
+            f.write("{not json")
+
+        cache = NodeCache(self.path)
+        self.assertFalse(cache.bind(ENDPOINT, NAMESPACES, FINGERPRINT))
+
+    def test_forks_share_one_file(self):
+        """Test that caches of several endpoints are saved to the same file"""
+        cache = self._populated_cache()
+        other = cache.fork()
+        other.bind("opc.tcp://plc2:4840", NAMESPACES, FINGERPRINT)
+        other.set_paths({"1:Motor/1:Speed": "ns=1;s=Motor.Speed"})
+        other.save()
+
+        reloaded = NodeCache(self.path)
+        self.assertTrue(reloaded.bind(ENDPOINT, NAMESPACES, FINGERPRINT))
+        self.assertTrue(reloaded.fork().bind("opc.tcp://plc2:4840", NAMESPACES, FINGERPRINT))
+
+    def test_unbound_cache_is_inert(self):
+        """Test that lookups before bind() return nothing"""
+        cache = NodeCache(self.path)
+        self.assertEqual(cache.get_paths(["a"]), {})
+        self.assertIsNone(cache.get_discovery("1"))
+        cache.save()
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
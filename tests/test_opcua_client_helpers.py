@@ -4,21 +4,196 @@ Unit tests for OPCUAClient helper functions
 Tests namespace extraction, NodeId parsing, and nested dict operations
 """
 
-import unittest
-import sys
+import asyncio
+import json
 import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import tracing
+from batchSizer import AdaptiveBatchSize
+
+
 # Mock the asyncua module before importing OPCUAClient
+class MockNode:
+    def __init__(self, nodeid):
+        self.nodeid = nodeid
+
+
 class MockClient:
     def __init__(self, endpoint):
         self.endpoint = endpoint
 
-sys.modules['asyncua'] = type('module', (), {'Client': MockClient})()
+    def get_node(self, nodeid):
+        return MockNode(nodeid)
+
+
+class MockReadValueId:
+    NodeId = None
+    AttributeId = None
+
+
+class MockReadParameters:
+    TimestampsToReturn = None
+    NodesToRead = None
+
+
+class MockStatusCode:
+    def __init__(self, name="Good"):
+        self.name = name
+
+    def is_good(self):
+        return self.name == "Good"
+
+
+class MockDataValue:
+    def __init__(self, value, status="Good"):
+        self.Value = type('Variant', (), {'Value': value})()
+        self.StatusCode = MockStatusCode(status)
+
+
+class MockUaClient:
+    def __init__(self, address_space=None, max_references=0):
+        self.requests = []
+        self.address_space = address_space or {}  # parent nodeid -> list of references
+        self.max_references = max_references
+        self.browse_calls = 0
+        self.browse_next_calls = 0
+
+    async def read(self, params):
+        self.requests.append(params)
+        return [MockDataValue(rv.NodeId) for rv in params.NodesToRead]
+
+    def _browse_result(self, nodeid, offset):
+        refs = self.address_space.get(nodeid, [])
+        end = offset + self.max_references if self.max_references else len(refs)
+        result = MockStruct()
+        result.StatusCode = MockStatusCode()
+        result.References = refs[offset:end]
+        result.ContinuationPoint = (nodeid, end) if end < len(refs) else None
+        return result
+
+    async def browse(self, params):
+        self.browse_calls += 1
+        return [self._browse_result(desc.NodeId, 0) for desc in params.NodesToBrowse]
+
+    async def browse_next(self, params):
+        self.browse_next_calls += 1
+        return [self._browse_result(nodeid, offset) for nodeid, offset in params.ContinuationPoints]
+
+    async def translate_browsepaths_to_nodeids(self, browse_paths):
+        self.requests.append(browse_paths)
+        results = []
+        for browse_path in browse_paths:
+            names = [element.TargetName for element in browse_path.RelativePath.Elements]
+            result = MockStruct()
+            if names[-1].endswith("Missing"):
+                result.StatusCode = MockStatusCode("BadNoMatch")
+                result.Targets = []
+            else:
+                result.StatusCode = MockStatusCode()
+                target = MockStruct()
+                target.TargetId = "/".join(names)
+                result.Targets = [target]
+            results.append(result)
+        return results
+
+
+class MockNodeId:
+    def __init__(self, identifier, namespace):
+        self.Identifier = identifier
+        self.NamespaceIndex = namespace
+
+    def __eq__(self, other):
+        return (self.Identifier, self.NamespaceIndex) == (other.Identifier, other.NamespaceIndex)
+
+    def __hash__(self):
+        return hash((self.Identifier, self.NamespaceIndex))
+
+    def __repr__(self):
+        return f"ns={self.NamespaceIndex};s={self.Identifier}"
+
+
+def make_reference(identifier, namespace, node_class):
+    ref = MockStruct()
+    ref.NodeId = MockNodeId(identifier, namespace)
+    ref.BrowseName = type('QualifiedName', (), {'Name': identifier.split('.')[-1]})()
+    ref.NodeClass = node_class
+    return ref
+
+
+class MockBrowseParameters:
+    def __init__(self):
+        self.NodesToBrowse = []
+
+
+class MockStruct:
+    pass
+
+
+class MockRelativePath:
+    def __init__(self):
+        self.Elements = []
+
+
+class MockUaStatusCodeError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class MockUa:
+    UaStatusCodeError = MockUaStatusCodeError
+    StatusCodes = type('StatusCodes', (), {
+        'BadTooManyOperations': 0x80100000,
+        'BadResponseTooLarge': 0x80B90000,
+        'BadRequestTooLarge': 0x80B80000,
+        'BadEncodingLimitsExceeded': 0x80080000,
+        'BadNodeIdUnknown': 0x80340000,
+    })
+    ReadValueId = MockReadValueId
+    ReadParameters = MockReadParameters
+    BrowseParameters = MockBrowseParameters
+    BrowseDescription = MockStruct
+    BrowseNextParameters = MockStruct
+    ViewDescription = MockStruct
+    RelativePath = MockRelativePath
+    RelativePathElement = MockStruct
+    BrowsePath = MockStruct
+    AttributeIds = type('AttributeIds', (), {'Value': 13})
+    TimestampsToReturn = type('TimestampsToReturn', (), {'Neither': 3})
+    BrowseDirection = type('BrowseDirection', (), {'Forward': 0})
+    BrowseResultMask = type('BrowseResultMask', (), {'BrowseName': 8, 'NodeClass': 4})
+    NodeClass = type('NodeClass', (), {'Object': 1, 'Variable': 2})
+    ObjectIds = type('ObjectIds', (), {
+        'HierarchicalReferences': 33,
+        'RootFolder': 84,
+        'Server_ServerCapabilities_OperationLimits_MaxNodesPerRead': 11705,
+        'Server_ServerCapabilities_OperationLimits_MaxNodesPerBrowse': 11710,
+        'Server_ServerCapabilities_OperationLimits_MaxNodesPerTranslateBrowsePathsToNodeIds': 11712,
+        'Server_ServerCapabilities_OperationLimits_MaxMonitoredItemsPerCall': 11714,
+    })
+
+    @staticmethod
+    def QualifiedName(Name=None, NamespaceIndex=0):
+        return f"{NamespaceIndex}:{Name}"
+
+    @staticmethod
+    def NodeId(identifier, namespace=0):
+        return f"ns={namespace};i={identifier}"
 
-from OPCUAClient import OPCUAClient
+
+sys.modules['asyncua'] = type('module', (), {'Client': MockClient, 'ua': MockUa})()
+
+from OPCUAClient import OPERATION_LIMIT_NAMES, OPCUAClient
+
+# Imported by OPCUAClient with the mocked asyncua
+readPlan = sys.modules['readPlan']
 
 
 class TestOPCUAClientHelpers(unittest.TestCase):
@@ -76,54 +251,600 @@ class TestOPCUAClientHelpers(unittest.TestCase):
         namespace = self.client._extract_namespace_from_nodeset(nodeset_list)
         self.assertIsNone(namespace)
     
-    def test_build_nested_dict_single_level(self):
-        """Test building nested dict with single level"""
-        result = self.client._build_nested_dict(["Temperature"], 42.5)
-        self.assertEqual(result, {"Temperature": 42.5})
+    def test_insert_path_single_level(self):
+        """Test inserting a value with a single level path"""
+        tree = {}
+        self.client._insert_path(tree, ["Temperature"], 42.5)
+        self.assertEqual(tree, {"Temperature": 42.5})
     
-    def test_build_nested_dict_multi_level(self):
-        """Test building nested dict with multiple levels"""
-        result = self.client._build_nested_dict(["Machine1", "Tank", "Temperature"], 65.3)
-        expected = {"Machine1": {"Tank": {"Temperature": 65.3}}}
-        self.assertEqual(result, expected)
+    def test_insert_path_multi_level(self):
+        """Test inserting a value creates the missing levels"""
+        tree = {}
+        self.client._insert_path(tree, ["Machine1", "Tank", "Temperature"], 65.3)
+        self.assertEqual(tree, {"Machine1": {"Tank": {"Temperature": 65.3}}})
     
-    def test_merge_nested_dicts_simple(self):
-        """Test merging two simple nested dicts"""
-        dict1 = {"Machine1": {"Tank": {"Temperature": 65.3}}}
-        dict2 = {"Machine1": {"Tank": {"Pressure": 2.5}}}
-        
-        result = self.client._merge_nested_dicts(dict1, dict2)
+    def test_insert_path_merges_into_existing_levels(self):
+        """Test that paths sharing a prefix end up in the same subtree"""
+        tree = {}
+        self.client._insert_path(tree, ["Machine1", "Tank", "Temperature"], 65.3)
+        self.client._insert_path(tree, ["Machine1", "Tank", "Pressure"], 2.5)
+        self.client._insert_path(tree, ["Machine1", "Motor", "Speed"], 1450.0)
         expected = {
             "Machine1": {
-                "Tank": {
-                    "Temperature": 65.3,
-                    "Pressure": 2.5
-                }
-            }
-        }
-        self.assertEqual(result, expected)
-    
-    def test_merge_nested_dicts_different_branches(self):
-        """Test merging dicts with different branches"""
-        dict1 = {"Machine1": {"Tank": {"Temperature": 65.3}}}
-        dict2 = {"Machine1": {"Motor": {"Speed": 1450.0}}}
-        
-        result = self.client._merge_nested_dicts(dict1, dict2)
-        expected = {
-            "Machine1": {
-                "Tank": {"Temperature": 65.3},
+                "Tank": {"Temperature": 65.3, "Pressure": 2.5},
                 "Motor": {"Speed": 1450.0}
             }
         }
-        self.assertEqual(result, expected)
+        self.assertEqual(tree, expected)
     
-    def test_merge_nested_dicts_overwrite(self):
-        """Test that merge overwrites non-dict values"""
-        dict1 = {"status": "old"}
-        dict2 = {"status": "new"}
-        
-        result = self.client._merge_nested_dicts(dict1, dict2)
-        self.assertEqual(result, {"status": "new"})
+    def test_insert_path_overwrite(self):
+        """Test that inserting the same path again overwrites the value"""
+        tree = {"status": "old"}
+        self.client._insert_path(tree, ["status"], "new")
+        self.assertEqual(tree, {"status": "new"})
+
+
+class TestNodeSetReadPlan(unittest.TestCase):
+    """Test compiling a NodeSet into a reusable ReadPlan"""
+
+    def setUp(self):
+        """Set up test client with a server namespace map"""
+        self.client = OPCUAClient("opc.tcp://localhost:4840", "http://example.com/")
+        self.client.client = MockClient("opc.tcp://localhost:4840")
+        self.client.namespace_map = {"http://opcfoundation.org/UA/": 0, "http://example.com/": 3}
+        patcher = mock.patch.object(readPlan, 'ua', MockUa)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_plan_resolves_nodeids_and_paths(self):
+        """Test that the plan maps namespaces and pre-splits output paths"""
+        nodeset = {
+            "NamespaceUris": ["http://example.com/"],
+            "UAVariables": [
+                {"NodeClass": "Variable", "NodeId": "ns=1;s=Machine1.Tank.Temperature", "BrowseName": "1:Temperature"},
+                {"NodeClass": "Object", "NodeId": "ns=1;i=5001", "BrowseName": "1:Machine1"},
+                {"NodeClass": "Variable", "NodeId": "ns=1;i=6001", "BrowseName": "1:Status"},
+            ]
+        }
+
+        plan = self.client.build_nodeset_read_plan(nodeset)
+
+        self.assertEqual(len(plan), 2)
+        self.assertEqual(plan.nodeids, ["ns=3;s=Machine1.Tank.Temperature", "ns=3;i=6001"])
+        self.assertEqual(plan.path_parts[0], ("ns3", "Machine1", "Tank", "Temperature"))
+        self.assertEqual(plan.paths, ["ns3.Machine1.Tank.Temperature", "Status"])
+        self.assertEqual(plan.read_value_ids[1].NodeId, "ns=3;i=6001")
+        self.assertEqual(plan.read_value_ids[1].AttributeId, 13)
+
+    def test_plan_explicit_path_takes_priority(self):
+        """Test that an explicit Path field overrides the NodeId identifier"""
+        nodeset = [
+            {"NodeClass": "Variable", "NodeId": "ns=3;s=A.B", "BrowseName": "B", "Path": "Line1.Oven.Temp"},
+            {"NodeClass": "Variable", "BrowseName": "NoId"},
+        ]
+
+        plan = self.client.build_nodeset_read_plan(nodeset)
+
+        self.assertEqual(plan.paths, ["ns3.Line1.Oven.Temp"])
+
+    def test_plan_is_reused_until_config_changes(self):
+        """Test that the compiled plan is cached per configuration object"""
+        nodeset = [{"NodeClass": "Variable", "NodeId": "ns=3;i=6001", "BrowseName": "Status"}]
+
+        plan = self.client.get_nodeset_read_plan(nodeset)
+        self.assertIs(self.client.get_nodeset_read_plan(nodeset), plan)
+
+        other = [{"NodeClass": "Variable", "NodeId": "ns=3;i=6002", "BrowseName": "Mode"}]
+        self.assertIsNot(self.client.get_nodeset_read_plan(other), plan)
+
+    def test_resolve_is_traced_only_when_compiling(self):
+        """Test that a cached plan does not write a resolve span"""
+        nodeset = [{"NodeClass": "Variable", "NodeId": "ns=3;i=6001", "BrowseName": "Status"}]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "spans.jsonl")
+            tracing.configure(path)
+            self.addCleanup(tracing.configure, None)
+            for _ in range(3):
+                self.client.get_nodeset_read_plan(nodeset)
+            with open(path) as f:
+                events = [json.loads(line) for line in f]
+
+        self.assertEqual([event["name"] for event in events], ["resolve"])
+        self.assertEqual(events[0]["args"]["mode"], "nodeset")
+        self.assertEqual(events[0]["args"]["variables"], 1)
+
+    def test_plan_groups_by_publish_interval(self):
+        """Test that PublishInterval splits the plan into interval groups"""
+        nodeset = [
+            {"NodeClass": "Variable", "NodeId": "ns=3;i=1", "BrowseName": "Serial", "PublishInterval": 60},
+            {"NodeClass": "Variable", "NodeId": "ns=3;i=2", "BrowseName": "Vibration", "PublishInterval": "0.1"},
+            {"NodeClass": "Variable", "NodeId": "ns=3;i=3", "BrowseName": "Speed"},
+            {"NodeClass": "Variable", "NodeId": "ns=3;i=4", "BrowseName": "Model", "PublishInterval": 60},
+            {"NodeClass": "Variable", "NodeId": "ns=3;i=5", "BrowseName": "Mode", "PublishInterval": "never"},
+        ]
+
+        plan = self.client.build_nodeset_read_plan(nodeset)
+        groups = plan.split_by_interval(2)
+
+        self.assertEqual(plan.intervals, [60.0, 0.1, None, 60.0, None])
+        self.assertEqual([interval for interval, _ in groups], [0.1, 2, 60.0])
+        self.assertEqual(groups[1][1].paths, ["Speed", "Mode"])
+        self.assertEqual(groups[2][1].nodeids, ["ns=3;i=1", "ns=3;i=4"])
+
+
+
+class TestBulkRead(unittest.IsolatedAsyncioTestCase):
+    """Test chunked bulk reads of a ReadPlan"""
+
+    def setUp(self):
+        """Set up a plan of five nodes"""
+        for module in (readPlan, sys.modules['OPCUAClient']):
+            patcher = mock.patch.object(module, 'ua', MockUa)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.plan = readPlan.ReadPlan()
+        for i in range(5):
+            self.plan.add(MockNode(f"ns=2;i={i}"), ["ns2", f"V{i}"])
+        self.client = OPCUAClient("opc.tcp://localhost:4840")
+        self.client.client = MockClient("opc.tcp://localhost:4840")
+        self.client.client.uaclient = MockUaClient()
+
+    def test_read_batches_are_cached_per_size(self):
+        """Test that read requests are split and re-used"""
+        batches = self.plan.read_batches(2)
+        self.assertEqual([len(b.NodesToRead) for b in batches], [2, 2, 1])
+        self.assertIs(self.plan.read_batches(2), batches)
+        self.assertEqual(len(self.plan.read_batches(0)), 1)
+
+    async def test_read_plan_issues_one_request_per_batch(self):
+        """Test that values come back in plan order across batches"""
+        self.client.read_batch_size = AdaptiveBatchSize(2, 2)
+        data_values = await self.client.read_plan(self.plan)
+        self.assertEqual(len(self.client.client.uaclient.requests), 3)
+        self.assertEqual([dv.Value.Value for dv in data_values], self.plan.nodeids)
+
+    async def test_rejected_read_is_retried_in_smaller_batches(self):
+        """Test that BadTooManyOperations halves the batch size and repeats the read"""
+        uaclient = self.client.client.uaclient
+        read = uaclient.read
+
+        async def limited_read(params):
+            if len(params.NodesToRead) > 2:
+                raise MockUaStatusCodeError(MockUa.StatusCodes.BadTooManyOperations)
+            return await read(params)
+
+        uaclient.read = limited_read
+        self.client.read_batch_size = AdaptiveBatchSize(0, 8, initial=8)
+        data_values = await self.client.read_plan(self.plan)
+        self.assertEqual(self.client.read_batch_size.size, 2)
+        self.assertEqual([dv.Value.Value for dv in data_values], self.plan.nodeids)
+
+        uaclient.read = mock.AsyncMock(side_effect=MockUaStatusCodeError(MockUa.StatusCodes.BadNodeIdUnknown))
+        with self.assertRaises(MockUaStatusCodeError):
+            await self.client.read_plan(self.plan)
+
+    async def test_operation_limits_size_batches(self):
+        """Test that advertised limits fix batch sizes and missing ones stay adaptive"""
+        self.client.client.uaclient.read = mock.AsyncMock(return_value=[
+            MockDataValue(5), MockDataValue(0), MockDataValue(None, "BadNodeIdUnknown"), MockDataValue(50),
+        ])
+        limits = await self.client._read_operation_limits()
+        self.assertEqual(limits, dict(zip(OPERATION_LIMIT_NAMES, [5, 0, 0, 50])))
+
+        self.client._apply_operation_limits(limits)
+        self.assertEqual(self.client.read_batch_size.size, 5)
+        self.assertFalse(self.client.read_batch_size.adaptive)
+        self.assertTrue(self.client.browse_batch_size.adaptive)
+        self.assertTrue(self.client.translate_batch_size.adaptive)
+        self.assertEqual(self.client.max_monitored_items_per_call, 50)
+
+    def test_bad_status_becomes_none(self):
+        """Test that a bad StatusCode yields None instead of raising"""
+        data_values = [MockDataValue(i) for i in range(5)]
+        data_values[3] = MockDataValue(None, "BadNodeIdUnknown")
+        values = self.client._values_from_data_values(self.plan, data_values)
+        self.assertEqual(values, [0, 1, 2, None, 4])
+
+    def test_rows_come_from_plan_paths(self):
+        """Test that flat rows are built without a nested tree"""
+        rows = self.plan.rows([0, 1, 2, 3, 4], "2025-11-20T10:00:00Z")
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[3], {"tsp": "2025-11-20T10:00:00Z", "variable": "ns2.V3", "value": 3})
+
+    def test_rows_for_selected_slots(self):
+        """Test that rows can be built for a subset of slots, e.g. changed variables"""
+        rows = self.plan.rows([0, 1, 2, 3, 4], "2025-11-20T10:00:00Z", [1, 4])
+        self.assertEqual([row["variable"] for row in rows], ["ns2.V1", "ns2.V4"])
+        self.assertEqual([row["value"] for row in rows], [1, 4])
+
+    def test_nested_data_is_built_in_place(self):
+        """Test that plan values are nested by their paths"""
+        plan = readPlan.ReadPlan()
+        for path in ("M.Tank.Temp", "M.Tank.Level", "M.Status", "Other"):
+            plan.add(MockNode(path), path.split("."))
+        data = self.client.build_data_from_plan(plan, [1, 2, 3, 4])
+        self.assertEqual(data, {"M": {"Tank": {"Temp": 1, "Level": 2}, "Status": 3}, "Other": 4})
+
+    def test_leaf_and_subtree_collision_is_order_independent(self):
+        """Test that a leaf with the same path as a subtree moves to _value"""
+        expected = {"Motor": {"_value": "On", "Speed": 1500}}
+        for paths, values in (
+            (["Motor", "Motor.Speed"], ["On", 1500]),
+            (["Motor.Speed", "Motor"], [1500, "On"]),
+        ):
+            plan = readPlan.ReadPlan()
+            for path in paths:
+                plan.add(MockNode(path), path.split("."))
+            self.assertEqual(self.client.build_data_from_plan(plan, values), expected)
+
+
+
+class TestDiscoveryCache(unittest.IsolatedAsyncioTestCase):
+    """Test caching of the auto-discovery result"""
+
+    def setUp(self):
+        """Set up a client whose browse is counted"""
+        self.client = OPCUAClient("opc.tcp://localhost:4840")
+        self.browse_count = 0
+
+        async def discover_variables(namespace_indices=None):
+            self.browse_count += 1
+            return readPlan.ReadPlan()
+
+        self.client.discover_variables = discover_variables
+
+    async def test_discovery_runs_once(self):
+        """Test that repeated reads re-use the cached browse result"""
+        plan = await self.client.get_discovery_plan()
+        self.assertIs(await self.client.get_discovery_plan(), plan)
+        self.assertEqual(self.browse_count, 1)
+
+    async def test_invalidate_forces_rediscovery(self):
+        """Test that discovery runs again on demand and for other namespaces"""
+        await self.client.get_discovery_plan()
+        self.client.invalidate_discovery()
+        await self.client.get_discovery_plan()
+        await self.client.get_discovery_plan([3])
+        self.assertEqual(self.browse_count, 3)
+
+    async def test_refresh_interval_expires_cache(self):
+        """Test that the cache expires after the refresh interval"""
+        self.client.discovery_refresh_interval = 60
+        await self.client.get_discovery_plan()
+        self.client._discovery_time -= 61
+        await self.client.get_discovery_plan()
+        self.assertEqual(self.browse_count, 2)
+
+
+
+class TestBatchedDiscovery(unittest.IsolatedAsyncioTestCase):
+    """Test level-order discovery with batched Browse requests"""
+
+    def setUp(self):
+        """Set up a small address space with a cycle and a foreign-namespace node"""
+        for module in (readPlan, sys.modules['OPCUAClient']):
+            patcher = mock.patch.object(module, 'ua', MockUa)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        objects = MockNodeId("Objects", 0)
+        machine = MockNodeId("Machine", 2)
+        tank = MockNodeId("Machine.Tank", 2)
+        address_space = {
+            objects: [make_reference("Machine", 2, 1), make_reference("Server", 0, 1)],
+            machine: [
+                make_reference("Machine.Tank", 2, 1),
+                make_reference("Machine.Status", 2, 2),
+                make_reference("Machine.Type", 0, 2),
+            ],
+            tank: [
+                make_reference("Machine.Tank.Temperature", 2, 2),
+                make_reference("Machine.Tank.Pressure", 2, 2),
+                make_reference("Machine", 2, 1),
+            ],
+        }
+
+        self.client = OPCUAClient("opc.tcp://localhost:4840")
+        self.client.client = MockClient("opc.tcp://localhost:4840")
+        self.client.client.nodes = type('Nodes', (), {'objects': MockNode(objects)})()
+        self.client.client.uaclient = MockUaClient(address_space, max_references=1)
+        self.client.namespace_index = 2
+
+    async def test_browse_follows_continuation_points(self):
+        """Test that BrowseNext is used until all references are returned"""
+        refs = await self.client.browse_references([MockNodeId("Machine", 2)], 3)
+        self.assertEqual(len(refs[0]), 3)
+        self.assertEqual(self.client.client.uaclient.browse_next_calls, 2)
+
+    async def test_discovery_keeps_depth_first_order(self):
+        """Test discovered paths, order, namespace filter and cycle handling"""
+        plan = await self.client.discover_variables()
+        self.assertEqual(plan.paths, [
+            "ns2.Machine.Tank.Temperature",
+            "ns2.Machine.Tank.Pressure",
+            "ns2.Machine.Status",
+        ])
+
+    async def test_discovery_batches_each_level(self):
+        """Test that one Browse request is sent per hierarchy level"""
+        self.client.client.uaclient.max_references = 0
+        await self.client.discover_variables()
+        # Objects, Machine, Tank
+        self.assertEqual(self.client.client.uaclient.browse_calls, 3)
+
+
+
+class TestSchemaTranslation(unittest.IsolatedAsyncioTestCase):
+    """Test batched TranslateBrowsePathsToNodeIds resolution of legacy schemas"""
+
+    def setUp(self):
+        """Set up a client whose server resolves every path except '*Missing'"""
+        for module in (readPlan, sys.modules['OPCUAClient']):
+            patcher = mock.patch.object(module, 'ua', MockUa)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = OPCUAClient("opc.tcp://localhost:4840")
+        self.client.client = MockClient("opc.tcp://localhost:4840")
+        self.client.client.uaclient = MockUaClient()
+        self.client.namespace_index = 2
+        self.schema = {"Tank": "Temperature", "Machine": {"Status": "Voltage", "Motor": "Missing"}}
+
+    def test_collect_schema_leaves(self):
+        """Test that leaves keep their schema parent path"""
+        leaves = self.client._collect_schema_leaves(self.schema)
+        self.assertEqual(leaves, [
+            ([], "Tank", "Temperature", None),
+            (["Machine"], "Status", "Voltage", None),
+            (["Machine"], "Motor", "Missing", None),
+        ])
+
+    def test_schema_intervals_are_inherited(self):
+        """Test that _publish_interval applies to its subtree and is not a leaf"""
+        schema = {
+            "Tank": "Temperature",
+            "Nameplate": {"_publish_interval": 60, "Serial": "Number", "Motor": {"Model": "Name"}},
+        }
+        leaves = self.client._collect_schema_leaves(schema)
+        self.assertEqual(leaves, [
+            ([], "Tank", "Temperature", None),
+            (["Nameplate"], "Serial", "Number", 60.0),
+            (["Nameplate", "Motor"], "Model", "Name", 60.0),
+        ])
+        self.assertNotIn("_publish_interval", self.client._deep_copy_schema(schema)["Nameplate"])
+
+    async def test_paths_are_translated_in_batches(self):
+        """Test that all leaves are resolved with one request per batch"""
+        self.client.translate_batch_size = AdaptiveBatchSize(2, 2)
+        plan = await self.client.build_schema_read_plan(self.schema)
+
+        self.assertEqual(len(self.client.client.uaclient.requests), 2)
+        self.assertEqual(plan.paths, ["Tank.Temperature", "Machine.Status.Voltage"])
+        self.assertEqual(plan.nodeids[0], "0:Objects/2:Tank/2:Temperature")
+
+    async def test_schema_plan_data_keeps_schema_layout(self):
+        """Test that the nested schema payload keeps unresolved leaves as None"""
+        plan = await self.client.get_schema_read_plan(self.schema)
+        data = self.client.build_plan_data(plan, [1.5, 230])
+        self.assertEqual(data, {"Tank": {"Temperature": 1.5}, "Machine": {"Status": {"Voltage": 230}, "Motor": None}})
+
+    async def test_schema_interval_groups_keep_schema_layout(self):
+        """Test that polling groups of the schema plan keep the schema layout with their own leaves"""
+        schema = {
+            "Tank": "Temperature",
+            "Machine": {"Status": "Voltage", "Motor": "Missing"},
+            "Nameplate": {"_publish_interval": 60, "Serial": "Number", "Motor": {"Model": "Name"}},
+        }
+        plan = await self.client.get_schema_read_plan(schema)
+        (fast_interval, fast), (slow_interval, slow) = plan.split_by_interval(2)
+
+        self.assertEqual((fast_interval, slow_interval), (2, 60.0))
+        self.assertEqual(
+            self.client.build_plan_data(fast, [1.5, 230]),
+            {"Tank": {"Temperature": 1.5}, "Machine": {"Status": {"Voltage": 230}, "Motor": None}},
+        )
+        self.assertEqual(
+            self.client.build_plan_data(slow, ["SN-1", "M-7"]),
+            {"Machine": {"Motor": None}, "Nameplate": {"Serial": {"Number": "SN-1"}, "Motor": {"Model": {"Name": "M-7"}}}},
+        )
+
+    async def test_schema_plan_is_cached(self):
+        """Test that the schema is resolved only once per session"""
+        plan = await self.client.get_schema_read_plan(self.schema)
+        self.assertIs(await self.client.get_schema_read_plan(self.schema), plan)
+        self.assertEqual(len(self.client.client.uaclient.requests), 1)
+
+
+class MockSessionUaClient:
+    def __init__(self):
+        self._publish_task = None
+        self.protocol = type('protocol', (), {'authentication_token': 'token-1'})()
+
+    async def _publish_loop(self):
+        await asyncio.sleep(3600)
+
+
+class MockSessionClient:
+    """asyncua Client stand-in recording the reconnect steps"""
+
+    def __init__(self, endpoint, namespaces):
+        self.endpoint = endpoint
+        self.namespaces = namespaces
+        self.steps = []
+        self.fail_activation = False
+        self._username = None
+        self._password = None
+        self.user_certificate = None
+        self._renew_channel_task = None
+        self._monitor_server_task = None
+        self.uaclient = MockSessionUaClient()
+
+    async def connect(self):
+        self.steps.append("connect")
+
+    def disconnect_socket(self):
+        self.steps.append("disconnect_socket")
+
+    async def disconnect(self):
+        self.steps.append("disconnect")
+
+    async def connect_socket(self):
+        self.steps.append("connect_socket")
+        self.uaclient.protocol = type('protocol', (), {'authentication_token': None})()
+
+    async def send_hello(self):
+        self.steps.append("send_hello")
+
+    async def open_secure_channel(self):
+        self.steps.append("open_secure_channel")
+
+    async def activate_session(self, username=None, password=None, certificate=None):
+        self.steps.append("activate_session")
+        if self.fail_activation:
+            raise RuntimeError("BadSessionIdInvalid")
+
+    async def get_namespace_array(self):
+        return self.namespaces
+
+    def get_node(self, nodeid):
+        node = MockNode(nodeid)
+        node.client = self
+        return node
+
+    async def _renew_channel_loop(self):
+        await asyncio.sleep(3600)
+
+    async def _monitor_server_loop(self):
+        await asyncio.sleep(3600)
+
+
+class TestSessionReactivation(unittest.IsolatedAsyncioTestCase):
+    """Test that reconnects reactivate the session and keep resolved plans"""
+
+    async def asyncSetUp(self):
+        self.created = []
+        self.namespaces = ["http://opcfoundation.org/UA/", "http://example.com/"]
+
+        def make_client(endpoint):
+            client = MockSessionClient(endpoint, self.namespaces)
+            self.created.append(client)
+            return client
+
+        patcher = mock.patch.object(sys.modules['OPCUAClient'], 'Client', make_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for module in (readPlan, sys.modules['OPCUAClient']):
+            patcher = mock.patch.object(module, 'ua', MockUa)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.client = OPCUAClient("opc.tcp://localhost:4840")
+        self.client._read_operation_limits = mock.AsyncMock(return_value=dict.fromkeys(OPERATION_LIMIT_NAMES, 0))
+        await self.client.connect()
+        del self.created[0]  # Client created by the constructor
+        plan = readPlan.ReadPlan()
+        plan.add(self.created[0].get_node("ns=1;i=1001"), ["Tank", "Temperature"])
+        self.client.nodeset_plan = plan
+        self.client.subscriptions = [object()]
+
+    async def asyncTearDown(self):
+        await self.client._stop_session_tasks()
+
+    async def test_reactivation_keeps_session_state(self):
+        """Test that the existing session is activated on a new channel with its token"""
+        session = self.created[0]
+        plan = self.client.nodeset_plan
+        await self.client.connect()
+
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(
+            session.steps[1:],
+            ["disconnect_socket", "connect_socket", "send_hello", "open_secure_channel", "activate_session"],
+        )
+        self.assertEqual(session.uaclient.protocol.authentication_token, 'token-1')
+        self.assertIs(self.client.nodeset_plan, plan)
+        self.assertIs(plan.nodes[0].client, session)
+        self.assertEqual(len(self.client.subscriptions), 1)
+        self.assertIsNotNone(session._monitor_server_task)
+        self.assertIsNotNone(session.uaclient._publish_task)
+        self.assertTrue(self.client.is_connected)
+
+    async def test_rejected_session_falls_back_to_new_session(self):
+        """Test that a new session is created, keeping plans if namespaces are unchanged"""
+        self.created[0].fail_activation = True
+        plan = self.client.nodeset_plan
+        await self.client.connect()
+
+        self.assertEqual(len(self.created), 2)
+        self.assertIs(self.client.nodeset_plan, plan)
+        self.assertEqual(self.client.subscriptions, [])
+
+    async def test_new_session_rebinds_plan_nodes(self):
+        """Test that kept plans read through the new client instead of the closed one"""
+        self.created[0].fail_activation = True
+        plan = self.client.nodeset_plan
+        await self.client.connect()
+
+        self.assertIs(plan.nodes[0].client, self.created[1])
+        self.assertEqual(plan.nodes[0].nodeid, "ns=1;i=1001")
+        self.assertEqual(plan.nodeids, ["ns=1;i=1001"])
+
+    async def test_changed_namespaces_drop_plans(self):
+        """Test that plans are resolved again when the namespace array changed"""
+        self.created[0].fail_activation = True
+        self.namespaces = ["http://opcfoundation.org/UA/", "http://other.com/"]
+        await self.client.connect()
+
+        self.assertIsNone(self.client.nodeset_plan)
+        self.assertEqual(self.client.namespace_map["http://other.com/"], 1)
+
+    async def test_delete_subscriptions(self):
+        """Test that all subscriptions are deleted and a failing delete does not raise"""
+        subscriptions = [mock.Mock(delete=mock.AsyncMock()), mock.Mock(delete=mock.AsyncMock(side_effect=RuntimeError))]
+        self.client.subscriptions = list(subscriptions)
+        await self.client.delete_subscriptions()
+
+        for subscription in subscriptions:
+            subscription.delete.assert_awaited_once()
+        self.assertEqual(self.client.subscriptions, [])
+
+    async def test_failed_session_setup_is_not_reactivated(self):
+        """Test that a session whose setup failed is closed and replaced by a new one"""
+        self.created[0].fail_activation = True
+        self.client.namespace_name = "http://missing.com/"
+        with self.assertRaises(ValueError):
+            await self.client.connect()
+        self.assertIsNone(self.client._session_token)
+        self.assertEqual(self.created[1].steps[-1], "disconnect")
+
+        self.client.namespace_name = "http://example.com/"
+        await self.client.connect()
+        self.assertEqual(len(self.created), 3)
+        self.assertEqual(self.client.namespace_index, 1)
+        self.assertTrue(self.client.is_connected)
+
+    async def test_node_cache_is_only_reused_for_first_session(self):
+        """Test that cached NodeIds are reused after a process start but not after a connection loss"""
+        fingerprint = {"start_time": "2025-03-01 08:00:00", "build_date": None, "namespaces": []}
+        client = OPCUAClient("opc.tcp://localhost:4840", node_cache=mock.Mock())
+        client._read_operation_limits = mock.AsyncMock(return_value=dict.fromkeys(OPERATION_LIMIT_NAMES, 0))
+        client._read_server_fingerprint = mock.AsyncMock(return_value=fingerprint)
+        await client.connect()
+        client.node_cache.bind.assert_called_with(client.endpoint, self.namespaces, fingerprint, True)
+
+        self.created[-1].fail_activation = True
+        await client.connect()
+        client.node_cache.bind.assert_called_with(client.endpoint, self.namespaces, fingerprint, False)
+        await client._stop_session_tasks()
+
+    async def test_node_cache_needs_server_start_time(self):
+        """Test that cached NodeIds are not reused if the server start time is unknown"""
+        fingerprint = {"start_time": None, "build_date": None, "namespaces": []}
+        client = OPCUAClient("opc.tcp://localhost:4840", node_cache=mock.Mock())
+        client._read_operation_limits = mock.AsyncMock(return_value=dict.fromkeys(OPERATION_LIMIT_NAMES, 0))
+        client._read_server_fingerprint = mock.AsyncMock(return_value=fingerprint)
+        await client.connect()
+        client.node_cache.bind.assert_called_with(client.endpoint, self.namespaces, fingerprint, False)
+        await client._stop_session_tasks()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bounded publish pipeline
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipeline import PublishPipeline
+
+
+class TestPublishPipeline(unittest.IsolatedAsyncioTestCase):
+    """Test backpressure policies of the publish queue"""
+
+    async def asyncSetUp(self):
+        """Set up a handler that only publishes while released"""
+        self.published = []
+        self.release = asyncio.Event()
+
+    async def handler(self, item):
+        await self.release.wait()
+        self.published.append(item)
+
+    async def run_pipeline(self, policy, puts):
+        pipeline = PublishPipeline(self.handler, maxsize=2, policy=policy)
+        pipeline.start()
+        await asyncio.sleep(0)  # The consumer is idle and waiting for items
+        for item, key in puts:
+            await asyncio.wait_for(pipeline.put(item, key), 1)
+        self.release.set()
+        await pipeline.stop()
+        return pipeline
+
+    async def test_block_keeps_every_item(self):
+        """Test that the producer waits for a free slot and nothing is lost"""
+        pipeline = PublishPipeline(self.handler, maxsize=1)
+        pipeline.start()
+        await pipeline.put(1)
+        await pipeline.put(2)
+        blocked = asyncio.create_task(pipeline.put(3))
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+
+        self.release.set()
+        await blocked
+        await pipeline.stop()
+        self.assertEqual(self.published, [1, 2, 3])
+
+    async def test_drop_oldest(self):
+        """Test that a full queue discards its oldest pending item"""
+        pipeline = await self.run_pipeline("drop-oldest", [(1, None), (2, None), (3, None), (4, None)])
+        # 1 was taken by the consumer, 2 was dropped for 4
+        self.assertEqual(self.published, [1, 3, 4])
+        self.assertEqual(pipeline.stats()["dropped"], 1)
+        self.assertEqual(pipeline.max_depth, 2)
+
+    async def test_coalesce_latest(self):
+        """Test that pending items are replaced by newer items with the same key"""
+        pipeline = await self.run_pipeline(
+            "coalesce-latest", [("a1", "a"), ("a2", "a"), ("b1", "b"), ("a3", "a"), ("b2", "b")]
+        )
+        self.assertEqual(self.published, ["a1", "a3", "b2"])
+        self.assertEqual(pipeline.coalesced, 2)
+
+    async def test_handler_errors_do_not_stop_consumers(self):
+        """Test that a failing publish is logged and the next item is processed"""
+        async def handler(item):
+            if item == 1:
+                raise RuntimeError("publish failed")
+            self.published.append(item)
+
+        pipeline = PublishPipeline(handler)
+        pipeline.start()
+        await pipeline.put(1)
+        await pipeline.put(2)
+        await pipeline.stop()
+        self.assertEqual(self.published, [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
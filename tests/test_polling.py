@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the acquisition loops: interval groups, subscriptions, snapshots and publishing
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Set required environment variables before importing main
+os.environ.setdefault('DEVICE_NAME', 'test_device')
+os.environ.setdefault('DEVICE_KEY', 'test_key')
+os.environ.setdefault('FLEET_URL', 'http://test.com')
+os.environ.setdefault('OPCUA_NAMESPACE', 'http://test.com/')
+os.environ.setdefault('OPCUA_ENDPOINT', 'opc.tcp://localhost:4840')
+os.environ.setdefault('OPCUA_VARIABLES', '[]')
+
+
+# Mock the required modules
+class MockClient:
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+
+
+class MockNode:
+    def __init__(self, nodeid):
+        self.nodeid = nodeid
+
+
+class MockUa:
+    ReadValueId = type('ReadValueId', (), {})
+    AttributeIds = type('AttributeIds', (), {'Value': 13})
+
+
+sys.modules['asyncua'] = type('module', (), {'Client': MockClient, 'ua': MockUa})()
+sys.modules['ironflock'] = type('module', (), {'IronFlock': type('IronFlock', (), {})})()
+
+from main import (
+    DataChangeCollector,
+    build_snapshot,
+    poll_group,
+    publish_data,
+    run_polling_groups,
+    run_subscription,
+)
+
+main = sys.modules['main']
+readPlan = sys.modules['readPlan']
+
+ENDPOINT = {
+    "url": "opc.tcp://localhost:4840",
+    "namespace": "http://test.com/",
+    "machine_name": "test_machine",
+    "publish_interval": 0.01,
+    "variables_config": ({}, "http://test.com/", False, False),
+}
+
+
+def make_schema_plan(opcua_client):
+    """Build a legacy schema plan with a slow group and an unresolved leaf, as the client would."""
+    schema = {
+        "Tank": "Temperature",
+        "Machine": {"Status": "Voltage", "Motor": "Missing"},
+        "Nameplate": {"_publish_interval": 60, "Serial": "Number"},
+    }
+    plan = readPlan.ReadPlan(source=schema)
+    plan.add(MockNode("ns=2;s=Tank.Temperature"), ["Tank", "Temperature"])
+    plan.add(MockNode("ns=2;s=Machine.Status.Voltage"), ["Machine", "Status", "Voltage"])
+    plan.add(MockNode("ns=2;s=Nameplate.Serial.Number"), ["Nameplate", "Serial", "Number"], 60.0)
+    opcua_client.schema_plan = plan
+    return plan
+
+
+class MockPipeline:
+    def __init__(self):
+        self.items = []
+
+    async def put(self, item, key=None):
+        self.items.append((item, key))
+
+
+class MockPublisher:
+    def __init__(self):
+        self.calls = []
+
+    async def publish(self, table, *args):
+        self.calls.append((table, args))
+
+    async def publish_rows(self, table, rows, namespace, machine_name, source=None, keyframe=False):
+        self.calls.append((table, rows, source, keyframe))
+
+
+class PollingTestCase(unittest.IsolatedAsyncioTestCase):
+    """Base class patching the module state the polling loop depends on"""
+
+    def setUp(self):
+        for target, name, value in (
+            (readPlan, 'ua', MockUa),
+            (main, 'PUBLISH_NESTED', True),
+            (main, 'PUBLISH_CHANGES_ONLY', False),
+            (main, 'SAMPLE_INTERVAL', 0),
+            (main, 'shutdown_requested', False),
+        ):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = main.OPCUAClient(ENDPOINT["url"])
+        self.client.is_connected = True
+
+
+class TestBuildSnapshot(PollingTestCase):
+    """Test the payloads built for each polling group"""
+
+    def test_schema_groups_keep_schema_layout(self):
+        """Test that a polled legacy schema group keeps its layout and unresolved leaves"""
+        plan = make_schema_plan(self.client)
+        (_, fast), (_, slow) = plan.split_by_interval(ENDPOINT["publish_interval"])
+
+        data, flattab, _ = build_snapshot(self.client, fast, "t1", [1.5, 230])
+        self.assertEqual(
+            data["data"], {"Tank": {"Temperature": 1.5}, "Machine": {"Status": {"Voltage": 230}, "Motor": None}}
+        )
+        self.assertEqual([row["variable"] for row in flattab], ["Tank.Temperature", "Machine.Status.Voltage"])
+
+        data, flattab, _ = build_snapshot(self.client, slow, "t1", ["SN-1"])
+        self.assertEqual(data["data"], {"Machine": {"Motor": None}, "Nameplate": {"Serial": {"Number": "SN-1"}}})
+        self.assertEqual(flattab, [{"tsp": "t1", "variable": "Nameplate.Serial.Number", "value": "SN-1"}])
+
+    def test_other_plans_are_nested_by_path(self):
+        """Test that NodeSet and discovery groups are nested by their output paths"""
+        plan = readPlan.ReadPlan()
+        plan.add(MockNode("ns=2;i=1"), ["ns2", "Tank", "Temperature"])
+        (_, group), = plan.split_by_interval(1)
+
+        data, _, _ = build_snapshot(self.client, group, "t1", [20.5])
+        self.assertEqual(data["data"], {"ns2": {"Tank": {"Temperature": 20.5}}})
+
+    def test_change_filter_marks_keyframes(self):
+        """Test that keyframes hold all rows and are flagged, so the deadband does not thin them out"""
+        plan = make_schema_plan(self.client)
+        change_filter = main.ChangeFilter(keyframe_cycles=2)
+
+        _, flattab, keyframe = build_snapshot(self.client, plan, "t1", [1.5, 230, "SN-1"], change_filter)
+        self.assertTrue(keyframe)
+        _, flattab, keyframe = build_snapshot(self.client, plan, "t2", [1.5, 231, "SN-1"], change_filter)
+        self.assertEqual((len(flattab), keyframe), (1, False))
+        _, flattab, keyframe = build_snapshot(self.client, plan, "t3", [1.5, 231, "SN-1"], change_filter)
+        self.assertEqual((len(flattab), keyframe), (3, True))
+
+    def test_nested_payload_can_be_disabled(self):
+        """Test that only flat rows are built with PUBLISH_NESTED off"""
+        plan = make_schema_plan(self.client)
+        with mock.patch.object(main, 'PUBLISH_NESTED', False):
+            data, flattab, _ = build_snapshot(self.client, plan, "t1", [1.5, 230, "SN-1"])
+        self.assertIsNone(data)
+        self.assertEqual(len(flattab), 3)
+
+
+class TestPollGroups(PollingTestCase):
+    """Test that plans are polled in groups until they are outdated"""
+
+    async def asyncSetUp(self):
+        self.plan = make_schema_plan(self.client)
+        self.reads = []
+
+        async def read_plan_values(plan, with_status=False):
+            self.reads.append(plan)
+            return "t1", [len(self.reads)] * len(plan), ["Good"] * len(plan)
+
+        self.client.read_plan_values = read_plan_values
+        self.pipeline = MockPipeline()
+        self.registered = []
+
+    async def register_measures_once(self, measures):
+        self.registered.append(measures)
+
+    async def test_poll_group_stops_when_outdated(self):
+        """Test that a group keeps reading on its schedule until outdated() reports true"""
+        cycles = []
+        await asyncio.wait_for(
+            poll_group(ENDPOINT, self.client, 0.01, self.plan, self.pipeline,
+                       outdated=lambda: len(cycles) >= 3, on_cycle=lambda: cycles.append(1)),
+            1,
+        )
+        self.assertEqual(len(self.reads), 3)
+        self.assertEqual(len(self.pipeline.items), 3)
+        (endpoint, data, flattab, keyframe, aggregates, _), key = self.pipeline.items[0]
+        self.assertIs(endpoint, ENDPOINT)
+        self.assertEqual(len(flattab), 3)
+        self.assertFalse(keyframe)
+        self.assertIsNone(aggregates)
+        self.assertEqual(key, (ENDPOINT["url"], 0.01))
+
+    async def test_run_polling_groups_reads_each_group(self):
+        """Test that every interval group reads only its own variables"""
+        outdated = asyncio.Event()
+
+        def on_cycle():
+            if len(self.reads) >= 2:
+                outdated.set()
+
+        await asyncio.wait_for(
+            run_polling_groups(ENDPOINT, self.client, self.plan, self.pipeline, self.register_measures_once,
+                               outdated=outdated.is_set, on_cycle=on_cycle),
+            1,
+        )
+        self.assertEqual(sorted(len(plan) for plan in self.reads[:2]), [1, 2])
+        self.assertEqual(self.registered, [[{"variable": path} for path in self.plan.paths]])
+
+    async def test_run_polling_groups_raises_group_errors(self):
+        """Test that a read error of one group stops all groups and is raised"""
+        async def read_plan_values(plan, with_status=False):
+            raise ConnectionError("connection lost")
+
+        self.client.read_plan_values = read_plan_values
+        with self.assertRaises(ConnectionError):
+            await asyncio.wait_for(
+                run_polling_groups(ENDPOINT, self.client, self.plan, self.pipeline, self.register_measures_once),
+                1,
+            )
+
+
+class TestRunSubscription(PollingTestCase):
+    """Test that subscribed data changes are published until the plan is outdated"""
+
+    async def asyncSetUp(self):
+        self.plan = readPlan.ReadPlan()
+        self.plan.add(MockNode("ns=2;i=1"), ["ns2", "Tank", "Temperature"])
+        self.collector = DataChangeCollector(self.plan)
+        self.client.check_connection = mock.AsyncMock()
+        self.pipeline = MockPipeline()
+
+    async def register_measures_once(self, measures):
+        pass
+
+    async def test_stops_when_outdated(self):
+        """Test that a refreshed discovery ends the subscription loop, so the new plan is subscribed"""
+        self.collector._pending.append((0, 20.5, "t1"))
+        self.collector._event.set()
+        batches = []
+        await asyncio.wait_for(
+            run_subscription(ENDPOINT, self.client, self.collector, self.pipeline, self.register_measures_once,
+                             outdated=lambda: bool(batches), on_cycle=lambda: batches.append(1)),
+            1,
+        )
+        self.assertEqual(len(batches), 1)
+        (_, data, flattab, keyframe, _, _), key = self.pipeline.items[0]
+        self.assertEqual(flattab, [{"tsp": "t1", "variable": "ns2.Tank.Temperature", "value": 20.5}])
+        self.assertFalse(keyframe)
+        self.assertIsNone(key)
+
+
+class TestArrayTables(unittest.TestCase):
+    """Test that message batch mode only starts for tables declared to accept row lists"""
+
+    def unsupported(self, mode, array_tables, sample_interval=0):
+        with mock.patch.multiple(
+            main, PUBLISH_BATCH_MODE=mode, PUBLISH_ARRAY_TABLES=array_tables, SAMPLE_INTERVAL=sample_interval
+        ):
+            return main.tables_without_array_support()
+
+    def test_rows_mode_needs_no_array_tables(self):
+        """Test that the default rows mode works with the shipped table definitions"""
+        self.assertEqual(self.unsupported("rows", []), [])
+
+    def test_message_mode_needs_declared_tables(self):
+        """Test that every table receiving row lists must be declared"""
+        self.assertEqual(self.unsupported("message", []), ["flatopcuadata"])
+        self.assertEqual(self.unsupported("message", ["flatopcuadata"]), [])
+        self.assertEqual(self.unsupported("message", ["flatopcuadata"], sample_interval=1), ["aggopcuadata"])
+
+
+class TestPublishData(PollingTestCase):
+    """Test publishing of one snapshot"""
+
+    async def test_publishes_nested_and_flat_tables(self):
+        """Test that the snapshot goes to opcuadata and its rows to flatopcuadata of the endpoint"""
+        publisher = MockPublisher()
+        rows = [{"tsp": "t1", "variable": "Tank.Temperature", "value": 1.5}]
+        await publish_data(ENDPOINT, {"tsp": "t1", "data": {}}, rows, publisher, keyframe=True)
+
+        self.assertEqual(publisher.calls[0][0], 'opcuadata')
+        self.assertEqual(publisher.calls[1], ('flatopcuadata', rows, ENDPOINT["url"], True))
+
+    async def test_publish_errors_are_logged_only(self):
+        """Test that a failing publish does not raise into the polling loop"""
+        publisher = MockPublisher()
+        publisher.publish_rows = mock.AsyncMock(side_effect=RuntimeError("router down"))
+        await publish_data(ENDPOINT, None, [], publisher)
+        self.assertEqual(publisher.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
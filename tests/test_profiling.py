@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the on-demand cycle profiler
+"""
+
+import os
+import pstats
+import sys
+import tempfile
+import tracemalloc
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profiling import CycleProfiler
+
+
+def busy_cycle(retained):
+    retained.append([str(number) for number in range(1000)])
+
+
+class TestCycleProfiler(unittest.TestCase):
+    """Test that requested profiles cover the right cycles and are written to disk"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "profiles")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def files(self):
+        return sorted(os.listdir(self.path)) if os.path.exists(self.path) else []
+
+    def test_nothing_is_profiled_without_request(self):
+        """Test that finished cycles do nothing until a profile is requested"""
+        profiler = CycleProfiler(self.path, cycles=2)
+        for _ in range(5):
+            profiler.cycle_finished()
+        self.assertFalse(profiler.active)
+        self.assertEqual(self.files(), [])
+
+    def test_profiles_next_cycles(self):
+        """Test that a request profiles the cycles after the next finished cycle"""
+        profiler = CycleProfiler(self.path, cycles=2)
+        retained = []
+        profiler.request()
+        self.assertTrue(profiler.pending)
+
+        profiler.cycle_finished()  # Cycle in progress when the request arrived
+        self.assertTrue(profiler.active)
+        busy_cycle(retained)
+        profiler.cycle_finished()
+        self.assertTrue(profiler.active)
+        busy_cycle(retained)
+        profiler.cycle_finished()
+        self.assertFalse(profiler.active)
+
+        files = self.files()
+        self.assertEqual(len(files), 2)
+        prof = next(name for name in files if name.endswith(".prof"))
+        stats = pstats.Stats(os.path.join(self.path, prof))
+        self.assertIn("busy_cycle", {function for _, _, function in stats.stats})
+        report = next(name for name in files if name.endswith(".txt"))
+        with open(os.path.join(self.path, report)) as f:
+            self.assertIn("cumulative", f.read())
+
+    def test_repeated_request_is_ignored_while_profiling(self):
+        """Test that requests during a profile neither restart nor extend it"""
+        profiler = CycleProfiler(self.path, cycles=1)
+        profiler.request()
+        profiler.cycle_finished()
+        profiler.request()
+        self.assertFalse(profiler.pending)
+        profiler.cycle_finished()
+        self.assertFalse(profiler.active)
+        self.assertEqual(len(self.files()), 2)
+
+    def test_allocation_diffs_between_cycles(self):
+        """Test that tracemalloc diffs are written per cycle and tracemalloc is stopped again"""
+        self.assertFalse(tracemalloc.is_tracing())
+        profiler = CycleProfiler(self.path, cycles=2, trace_allocations=True)
+        retained = []
+        profiler.request()
+        profiler.cycle_finished()
+        self.assertTrue(tracemalloc.is_tracing())
+        busy_cycle(retained)
+        profiler.cycle_finished()
+        busy_cycle(retained)
+        profiler.cycle_finished()
+        self.assertFalse(tracemalloc.is_tracing())
+
+        report = next(name for name in self.files() if name.endswith("-tracemalloc.txt"))
+        with open(os.path.join(self.path, report)) as f:
+            text = f.read()
+        self.assertIn("All 2 cycles: +", text)
+        self.assertIn("Cycle 1: +", text)
+        self.assertIn("Cycle 2: +", text)
+        self.assertIn("test_profiling.py", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
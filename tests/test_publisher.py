@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for batched publishing to IronFlock tables
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deadbandFilter import DeadbandFilter
+from publisher import BatchPublisher
+
+
+class MockIronFlock:
+    def __init__(self, fail_variables=()):
+        self.calls = []
+        self.fail_variables = fail_variables
+
+    async def publish_to_table(self, tablename, *args):
+        self.calls.append((tablename, args))
+        payload = args[-1]
+        if isinstance(payload, dict) and payload.get("variable") in self.fail_variables:
+            return None
+        return object()
+
+
+def make_rows(count):
+    return [{"tsp": "2025-11-20T10:00:00Z", "variable": f"V{i}", "value": i} for i in range(count)]
+
+
+class TestBatchPublisher(unittest.IsolatedAsyncioTestCase):
+    """Test row and message batching modes"""
+
+    async def test_rows_mode_publishes_each_row(self):
+        """Test that rows mode keeps one publish per row with leading args"""
+        ironflock = MockIronFlock()
+        publisher = BatchPublisher(ironflock, "rows", max_batch_size=2)
+
+        failed = await publisher.publish_rows("flatopcuadata", make_rows(5), "ns", "machine")
+
+        self.assertEqual(failed, 0)
+        self.assertEqual(len(ironflock.calls), 5)
+        self.assertEqual(ironflock.calls[0], ("flatopcuadata", ("ns", "machine", make_rows(1)[0])))
+
+    async def test_message_mode_sends_lists(self):
+        """Test that message mode sends batches of rows as one payload"""
+        ironflock = MockIronFlock()
+        publisher = BatchPublisher(ironflock, "message", max_batch_size=2)
+
+        await publisher.publish_rows("flatopcuadata", make_rows(5), "ns", "machine")
+
+        self.assertEqual([len(args[-1]) for _, args in ironflock.calls], [2, 2, 1])
+
+    async def test_message_mode_respects_byte_limit(self):
+        """Test that batches are split before exceeding the byte limit"""
+        ironflock = MockIronFlock()
+        publisher = BatchPublisher(ironflock, "message", max_batch_size=100, max_batch_bytes=140)
+
+        await publisher.publish_rows("flatopcuadata", make_rows(4))
+
+        self.assertEqual([len(args[-1]) for _, args in ironflock.calls], [2, 2])
+
+    async def test_unacknowledged_rows_are_counted(self):
+        """Test that publishes returning None are reported as failed"""
+        ironflock = MockIronFlock(fail_variables=("V1", "V3"))
+        publisher = BatchPublisher(ironflock)
+
+        failed = await publisher.publish_rows("flatopcuadata", make_rows(4))
+
+        self.assertEqual(failed, 2)
+
+    async def test_row_filter_is_applied(self):
+        """Test that rows dropped by the row filter are not published"""
+        class EvenRows:
+            def filter_rows(self, rows, source=None, keep_all=False):
+                return [row for row in rows if keep_all or row["value"] % 2 == 0]
+
+        ironflock = MockIronFlock()
+        publisher = BatchPublisher(ironflock, row_filter=EvenRows())
+
+        await publisher.publish_rows("flatopcuadata", make_rows(5))
+
+        self.assertEqual([args[-1]["value"] for _, args in ironflock.calls], [0, 2, 4])
+
+    async def test_deadband_state_is_kept_per_source(self):
+        """Test that two endpoints publishing the same variable path are filtered separately"""
+        ironflock = MockIronFlock()
+        publisher = BatchPublisher(ironflock, row_filter=DeadbandFilter())
+        rows = make_rows(1)
+
+        await publisher.publish_rows("flatopcuadata", rows, "ns", "plc1", source="opc.tcp://plc1:4840")
+        await publisher.publish_rows("flatopcuadata", rows, "ns", "plc2", source="opc.tcp://plc2:4840")
+        await publisher.publish_rows("flatopcuadata", rows, "ns", "plc1", source="opc.tcp://plc1:4840")
+
+        self.assertEqual([args[1] for _, args in ironflock.calls], ["plc1", "plc2"])
+
+    async def test_keyframes_bypass_the_deadband(self):
+        """Test that keyframe rows are all published and reset the deadband to their values"""
+        ironflock = MockIronFlock()
+        publisher = BatchPublisher(ironflock, row_filter=DeadbandFilter(absolute=5))
+        rows = make_rows(2)
+
+        await publisher.publish_rows("flatopcuadata", rows)
+        await publisher.publish_rows("flatopcuadata", rows, keyframe=True)
+        await publisher.publish_rows("flatopcuadata", rows)
+
+        self.assertEqual(len(ironflock.calls), 4)
+
+    def test_unknown_mode_is_rejected(self):
+        """Test that an invalid mode raises ValueError"""
+        with self.assertRaises(ValueError):
+            BatchPublisher(MockIronFlock(), "bulk")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the deadline-based cycle scheduler
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import FakeClock
+
+from scheduler import CycleScheduler
+
+
+class TestCycleScheduler(unittest.IsolatedAsyncioTestCase):
+    """Test deadline tracking and overrun policies"""
+
+    async def test_work_time_does_not_drift(self):
+        """Test that the sleep is shortened by the time spent in the cycle"""
+        clock = FakeClock(100.0)
+        scheduler = CycleScheduler(3, clock=clock, sleep=clock.sleep)
+        scheduler.reset()
+
+        for _ in range(3):
+            clock.now += 0.5  # Work
+            await scheduler.wait_next()
+
+        self.assertEqual(clock.sleeps, [2.5, 2.5, 2.5])
+        self.assertEqual(clock.now, 109.0)
+        self.assertEqual(scheduler.overruns, 0)
+
+    async def test_skip_policy_waits_for_next_grid_deadline(self):
+        """Test that missed ticks are skipped and the grid is kept"""
+        clock = FakeClock(100.0)
+        scheduler = CycleScheduler(3, "skip", clock=clock, sleep=clock.sleep)
+        scheduler.reset()
+
+        clock.now += 7.0  # Runs into the ticks at 103 and 106
+        await scheduler.wait_next()
+
+        self.assertEqual(clock.now, 109.0)
+        self.assertEqual(scheduler.overruns, 1)
+        self.assertEqual(scheduler.missed_ticks, 2)
+
+    async def test_coalesce_policy_runs_immediately(self):
+        """Test that missed ticks are merged into one immediate cycle"""
+        clock = FakeClock(100.0)
+        scheduler = CycleScheduler(3, "coalesce", clock=clock, sleep=clock.sleep)
+        scheduler.reset()
+
+        clock.now += 7.0
+        lateness = await scheduler.wait_next()
+
+        self.assertEqual(clock.sleeps, [])
+        self.assertAlmostEqual(lateness, 1.0)
+        self.assertEqual(scheduler.deadline, 106.0)
+
+        clock.now += 0.5
+        await scheduler.wait_next()
+        self.assertEqual(clock.now, 109.0)
+
+        stats = scheduler.stats()
+        self.assertEqual(stats["cycles"], 2)
+        self.assertAlmostEqual(stats["max_lateness"], 1.0)
+
+    def test_invalid_policy_is_rejected(self):
+        """Test that an unknown policy raises ValueError"""
+        with self.assertRaises(ValueError):
+            CycleScheduler(3, "catchup")
+
+
+if __name__ == '__main__':
+    unittest.main()
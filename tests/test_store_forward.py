@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the store-and-forward publish buffer
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storeForward import StoreAndForward
+
+
+class MockIronFlock:
+    def __init__(self):
+        self.online = True
+        self.published = []
+
+    async def publish_to_table(self, tablename, *args):
+        if not self.online:
+            return None
+        self.published.append((tablename, list(args)))
+        return object()
+
+
+class CountingConnection:
+    """sqlite3 connection wrapper counting commits"""
+
+    def __init__(self, db):
+        self.db = db
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+        self.db.commit()
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+
+class TestStoreAndForward(unittest.IsolatedAsyncioTestCase):
+    """Test buffering, draining, retention and drop policies"""
+
+    def setUp(self):
+        """Create a buffer in a temporary directory"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "buffer.db")
+        self.ironflock = MockIronFlock()
+
+    def make_buffer(self, **kwargs):
+        buffer = StoreAndForward(self.ironflock, self.path, **kwargs)
+        self.addCleanup(buffer.close)
+        return buffer
+
+    async def test_publishes_directly_when_online(self):
+        """Test that nothing is buffered while publishing succeeds"""
+        buffer = self.make_buffer()
+        await buffer.publish_to_table("flatopcuadata", "ns", {"value": 1})
+        self.assertEqual(buffer.pending, 0)
+        self.assertEqual(self.ironflock.published, [("flatopcuadata", ["ns", {"value": 1}])])
+
+    async def test_failed_publishes_are_drained_in_order(self):
+        """Test that buffered messages are published in order once online again"""
+        buffer = self.make_buffer(drain_batch_size=2)
+        self.ironflock.online = False
+        for i in range(3):
+            self.assertTrue(await buffer.publish_to_table("flatopcuadata", {"value": i}))
+        self.assertEqual(buffer.pending, 3)
+
+        self.ironflock.online = True
+        # Queued behind the buffered messages to keep the order
+        await buffer.publish_to_table("flatopcuadata", {"value": 3})
+        self.assertEqual(await buffer.drain(), 4)
+
+        self.assertEqual([args[0]["value"] for _, args in self.ironflock.published], [0, 1, 2, 3])
+        self.assertEqual(buffer.pending, 0)
+
+    async def test_buffer_survives_restart(self):
+        """Test that buffered messages are still there after reopening the file"""
+        buffer = self.make_buffer()
+        self.ironflock.online = False
+        await buffer.publish_to_table("opcuadata", {"value": 1})
+        buffer.close()
+
+        self.ironflock.online = True
+        reopened = self.make_buffer()
+        self.assertEqual(reopened.pending, 1)
+        await reopened.drain()
+        self.assertEqual(self.ironflock.published, [("opcuadata", [{"value": 1}])])
+
+    async def test_drop_policies(self):
+        """Test that a full buffer drops the oldest or the newest messages"""
+        self.ironflock.online = False
+        oldest = self.make_buffer(max_messages=2)
+        for i in range(3):
+            await oldest.publish_to_table("t", i)
+        oldest.close()
+
+        newest = self.make_buffer(max_messages=3, drop_policy="newest")
+        await newest.publish_to_table("t", 3)
+        await newest.publish_to_table("t", 4)
+
+        self.ironflock.online = True
+        await newest.drain()
+        self.assertEqual([args[0] for _, args in self.ironflock.published], [1, 2, 3])
+        self.assertEqual(newest.dropped, 1)
+
+    async def test_failed_batch_is_written_with_one_commit(self):
+        """Test that messages failing in the same loop iteration are inserted together"""
+        buffer = self.make_buffer()
+        self.ironflock.online = False
+        buffer.db = CountingConnection(buffer.db)
+        await asyncio.gather(*(buffer.publish_to_table("flatopcuadata", {"value": i}) for i in range(5)))
+        await asyncio.sleep(0)
+
+        self.assertEqual(buffer.db.commits, 1)
+        self.assertEqual(buffer.db.execute("SELECT COUNT(*) FROM messages").fetchone()[0], 5)
+        self.assertEqual(buffer.pending, 5)
+
+    async def test_retention_expires_old_messages(self):
+        """Test that messages older than the retention time are not published"""
+        buffer = self.make_buffer(retention=60)
+        self.ironflock.online = False
+        await buffer.publish_to_table("t", 1)
+        buffer.flush()
+        buffer.db.execute("UPDATE messages SET created = created - 120")
+        buffer.db.commit()
+
+        self.ironflock.online = True
+        self.assertEqual(await buffer.drain(), 0)
+        self.assertEqual(buffer.pending, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
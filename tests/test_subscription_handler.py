@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the subscription data-change collector
+"""
+
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriptionHandler import DataChangeCollector
+
+
+class MockPlan:
+    def __init__(self, nodeids):
+        self.nodeids = nodeids
+
+    def __len__(self):
+        return len(self.nodeids)
+
+
+class MockStatusCode:
+    def __init__(self, good=True):
+        self.good = good
+        self.name = "Good" if good else "BadCommunicationError"
+
+    def is_good(self):
+        return self.good
+
+
+def make_notification(good=True):
+    data_value = type('DataValue', (), {
+        'StatusCode': MockStatusCode(good),
+        'SourceTimestamp': datetime(2025, 11, 20, 10, 0, tzinfo=timezone.utc),
+        'ServerTimestamp': None,
+    })()
+    return type('DataChangeNotif', (), {'monitored_item': type('Item', (), {'Value': data_value})()})()
+
+
+def make_node(nodeid):
+    return type('Node', (), {'nodeid': nodeid})()
+
+
+class TestDataChangeCollector(unittest.IsolatedAsyncioTestCase):
+    """Test collecting and draining data-change notifications"""
+
+    async def test_every_change_is_kept_in_order(self):
+        """Test that several changes of one variable are all returned"""
+        collector = DataChangeCollector(MockPlan(["a", "b"]))
+        collector.datachange_notification(make_node("b"), 1, make_notification())
+        collector.datachange_notification(make_node("b"), 2, make_notification())
+
+        changes = await collector.wait_for_changes(timeout=1)
+
+        self.assertEqual([(i, v) for i, v, _ in changes], [(1, 1), (1, 2)])
+        self.assertEqual(collector.values, [None, 2])
+        self.assertEqual(changes[0][2], datetime(2025, 11, 20, 10, 0, tzinfo=timezone.utc).astimezone().isoformat())
+
+    async def test_bad_status_becomes_none(self):
+        """Test that a bad StatusCode is reported as None"""
+        collector = DataChangeCollector(MockPlan(["a"]))
+        collector.datachange_notification(make_node("a"), 5, make_notification(good=False))
+
+        changes = await collector.wait_for_changes(timeout=1)
+
+        self.assertEqual(changes[0][1], None)
+
+    async def test_timeout_returns_empty_list(self):
+        """Test that waiting without notifications times out"""
+        collector = DataChangeCollector(MockPlan(["a"]))
+        self.assertEqual(await collector.wait_for_changes(timeout=0.01), [])
+
+    async def test_pending_notifications_are_bounded(self):
+        """Test that the oldest notifications are dropped when the buffer is full"""
+        collector = DataChangeCollector(MockPlan(["a"]), max_pending=2)
+        for value in range(3):
+            collector.datachange_notification(make_node("a"), value, make_notification())
+
+        changes = await collector.wait_for_changes(timeout=1)
+
+        self.assertEqual([v for _, v, _ in changes], [1, 2])
+        self.assertEqual(collector.dropped, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the tracing spans and their file exporter
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracing
+
+
+class TestTracing(unittest.TestCase):
+    """Test span nesting, sampling and the JSON lines file"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "spans.jsonl")
+
+    def tearDown(self):
+        tracing.configure(None)
+        self.directory.cleanup()
+
+    def events(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_spans_nest_within_a_trace(self):
+        """Test that child spans reference their parent and share the trace id"""
+        tracing.configure(self.path)
+        with tracing.trace("cycle", endpoint="opc.tcp://a") as root:
+            with tracing.span("read", nodes=3) as read:
+                read.set(values=3)
+            self.assertIs(tracing.current_span(), root)
+        self.assertIsNone(tracing.current_span())
+
+        read_event, cycle_event = self.events()
+        self.assertEqual(read_event["name"], "read")
+        self.assertEqual(cycle_event["name"], "cycle")
+        self.assertEqual(read_event["ph"], "X")
+        self.assertEqual(read_event["args"]["parent_id"], cycle_event["args"]["span_id"])
+        self.assertEqual(read_event["args"]["trace_id"], cycle_event["args"]["trace_id"])
+        self.assertIsNone(cycle_event["args"]["parent_id"])
+        self.assertEqual(read_event["args"]["nodes"], 3)
+        self.assertEqual(read_event["args"]["values"], 3)
+        self.assertEqual(read_event["tid"], cycle_event["tid"])
+        self.assertGreaterEqual(cycle_event["dur"], read_event["dur"])
+
+    def test_explicit_parent_continues_trace_in_another_task(self):
+        """Test that a span handed over to another task parents spans there on their own lane"""
+        tracing.configure(self.path)
+
+        async def run():
+            with tracing.trace("cycle", endpoint="opc.tcp://a"):
+                parent = tracing.current_span()
+
+            async def publish():
+                with tracing.span("publish", parent, lane="opc.tcp://a publish"):
+                    pass
+
+            await asyncio.create_task(publish())
+            return parent
+
+        parent = asyncio.run(run())
+        cycle_event, publish_event = self.events()
+        self.assertEqual(publish_event["args"]["parent_id"], parent.span_id)
+        self.assertNotEqual(publish_event["tid"], cycle_event["tid"])
+
+    def test_unsampled_traces_write_nothing(self):
+        """Test that spans of an unsampled trace are no-ops, including their children"""
+        tracing.configure(self.path, sample_rate=0.5, rand=lambda: 0.9)
+        with tracing.trace("cycle") as root:
+            self.assertIsNone(tracing.current_span())
+            with tracing.span("read") as read:
+                read.set(values=1)
+        root.set(values=1)
+        self.assertEqual(self.events(), [])
+
+    def test_spans_without_exporter_are_noops(self):
+        """Test that tracing does nothing until a file is configured"""
+        with tracing.trace("cycle"), tracing.span("read"):
+            self.assertIsNone(tracing.current_span())
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_errors_are_recorded(self):
+        """Test that an exception leaving a span is recorded and re-raised"""
+        tracing.configure(self.path)
+        with self.assertRaises(ValueError):
+            with tracing.trace("connect"):
+                raise ValueError("refused")
+        (event,) = self.events()
+        self.assertEqual(event["args"]["error"], "ValueError('refused')")
+
+    def test_file_is_rotated(self):
+        """Test that the span file is rotated at max_bytes and old files are limited"""
+        tracing.configure(self.path, max_bytes=500, backup_count=2)
+        for _ in range(20):
+            with tracing.trace("cycle"):
+                pass
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertTrue(os.path.exists(self.path + ".2"))
+        self.assertFalse(os.path.exists(self.path + ".3"))
+        self.assertLessEqual(os.path.getsize(self.path), 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the windowed aggregation of fast samples
+"""
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import FakeClock
+
+try:
+    import numpy
+
+    from windowAggregator import WindowAggregator
+except ImportError:
+    numpy = None
+
+
+class FakePlan:
+    def __init__(self, *paths):
+        self.paths = list(paths)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestWindowAggregator(unittest.TestCase):
+    """Test window boundaries and the aggregates per numeric slot"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.plan = FakePlan("M.Speed", "M.Running", "M.Mode", "M.Temp")
+
+    def add_samples(self, aggregator, samples):
+        results = []
+        for index, values in enumerate(samples):
+            results.append(aggregator.add(self.plan, f"t{index}", values))
+            self.clock.now += 0.1
+        return results
+
+    def test_aggregates_of_full_window(self):
+        """Test min, max, mean, stddev, count, first and last of numeric slots"""
+        aggregator = WindowAggregator(4, 0.4, clock=self.clock)
+        results = self.add_samples(aggregator, [
+            [1.0, True, "Auto", 20],
+            [3.0, False, "Auto", 22],
+            [9.0, True, "Manual", 21],
+            [3.0, True, "Auto", 21],
+        ])
+        self.assertEqual(results[:3], [None, None, None])
+        speed, temp = results[3]
+        self.assertEqual(speed["variable"], "M.Speed")
+        self.assertEqual(temp["variable"], "M.Temp")
+        self.assertEqual((speed["tsp"], speed["window_start"]), ("t3", "t0"))
+        self.assertEqual(
+            (speed["count"], speed["min"], speed["max"], speed["mean"], speed["first"], speed["last"]),
+            (4, 1.0, 9.0, 4.0, 1.0, 3.0),
+        )
+        self.assertAlmostEqual(speed["stddev"], math.sqrt(9))
+        self.assertEqual((temp["min"], temp["max"], temp["mean"]), (20, 22, 21))
+
+    def test_bad_samples_are_left_out(self):
+        """Test that None values (bad StatusCode) are not counted"""
+        aggregator = WindowAggregator(3, 0.3, clock=self.clock)
+        self.plan = FakePlan("A", "B")
+        a, b = self.add_samples(aggregator, [[5.0, 1.0], [None, None], [7.0, None]])[-1]
+        self.assertEqual((a["count"], a["first"], a["last"], a["mean"]), (2, 5.0, 7.0, 6.0))
+        self.assertEqual((b["count"], b["first"], b["last"], b["stddev"]), (1, 1.0, 1.0, 0.0))
+
+        # A slot that is bad when a window starts is aggregated from the next window on
+        rows = self.add_samples(aggregator, [[None, 1.0], [4.0, 2.0], [None, 3.0]])[-1]
+        self.assertEqual([row["variable"] for row in rows], ["B"])
+        rows = self.add_samples(aggregator, [[4.0, 1.0], [4.0, 2.0], [4.0, 3.0]])[-1]
+        self.assertEqual([row["variable"] for row in rows], ["A", "B"])
+
+    def test_type_change_within_window(self):
+        """Test that a numeric slot turning into a string is skipped for that sample"""
+        aggregator = WindowAggregator(3, 0.3, clock=self.clock)
+        (speed, temp) = self.add_samples(aggregator, [
+            [1.0, True, "Auto", 20],
+            ["n/a", True, "Auto", 21],
+            [2.0, True, "Auto", 22],
+        ])[-1]
+        self.assertEqual((speed["count"], speed["max"]), (2, 2.0))
+        self.assertEqual(temp["count"], 3)
+
+    def test_window_closes_after_its_length(self):
+        """Test that skipped samples do not stretch a window beyond its length"""
+        aggregator = WindowAggregator(10, 1.0, clock=self.clock)
+        self.assertIsNone(aggregator.add(self.plan, "t0", [1.0, True, "Auto", 20]))
+        self.clock.now = 1.0
+        rows = aggregator.add(self.plan, "t1", [2.0, True, "Auto", 20])
+        self.assertEqual(rows[0]["count"], 2)
+        self.assertEqual(aggregator.windows, 1)
+        # The next window starts with the next sample
+        self.assertIsNone(aggregator.add(self.plan, "t2", [2.0, True, "Auto", 20]))
+
+    def test_new_plan_discards_open_window(self):
+        """Test that samples of a replaced plan are not mixed into the new plan's window"""
+        aggregator = WindowAggregator(2, 0.2, clock=self.clock)
+        aggregator.add(self.plan, "t0", [100.0, True, "Auto", 20])
+        other = FakePlan("M.Speed")
+        self.assertIsNone(aggregator.add(other, "t1", [1.0]))
+        (speed,) = aggregator.add(other, "t2", [3.0])
+        self.assertEqual((speed["count"], speed["max"], speed["window_start"]), (2, 3.0, "t1"))
+
+    def test_no_numeric_variables(self):
+        """Test that plans without numeric variables close windows without rows"""
+        aggregator = WindowAggregator(1, 0.1, clock=self.clock)
+        self.assertEqual(aggregator.add(FakePlan("Running"), "t0", [True]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import random
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Rotated span files kept next to the current one
+DEFAULT_BACKUP_COUNT = 3
+
+_current = contextvars.ContextVar("tracing_current_span", default=None)
+_exporter = None
+
+
+class Span:
+    """One timed operation of a sampled trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "lane", "attributes", "start")
+
+    def __init__(self, name, trace_id, parent_id, lane, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.lane = lane
+        self.attributes = attributes
+        self.start = time.time()
+
+    def set(self, **attributes):
+        """Add attributes known only after the span started, e.g. a result count."""
+        self.attributes.update(attributes)
+
+
+class _NoopSpan:
+    """Stands in for spans of unsampled traces, so callers need no checks."""
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Exporter:
+    """
+    Writes finished spans as one JSON object per line to a size-rotated file.
+
+    Every line is a Chrome trace "complete" event (ph "X", timestamps in
+    microseconds), so the file can be loaded into trace viewers such as Perfetto
+    after wrapping the lines in a JSON array.
+    """
+
+    def __init__(self, path, sample_rate, max_bytes, backup_count, rand):
+        self.sample_rate = sample_rate
+        self._rand = rand
+        self._pid = os.getpid()
+        self._lanes = {}
+        self._lane_ids = itertools.count(1)
+        self._handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger = logging.getLogger(f"{__name__}.spans")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(self._handler)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or self._rand() < self.sample_rate
+
+    def export(self, span, end):
+        lane = self._lanes.get(span.lane)
+        if lane is None:
+            lane = self._lanes[span.lane] = next(self._lane_ids)
+        event = {
+            "name": span.name,
+            "cat": "opcua",
+            "ph": "X",
+            "ts": int(span.start * 1e6),
+            "dur": int((end - span.start) * 1e6),
+            "pid": self._pid,
+            "tid": lane,
+            "args": dict(
+                span.attributes,
+                trace_id=span.trace_id,
+                span_id=span.span_id,
+                parent_id=span.parent_id,
+                lane=span.lane,
+            ),
+        }
+        self._logger.info(json.dumps(event, default=str))
+
+    def close(self):
+        self._logger.removeHandler(self._handler)
+        self._handler.close()
+
+
+def configure(path, sample_rate=1.0, max_bytes=10 * 1024 * 1024, backup_count=DEFAULT_BACKUP_COUNT,
+              rand=random.random):
+    """
+    Write spans to path, rotating it at max_bytes. Only the given fraction of
+    traces is sampled; a trace's spans are either all written or none.
+    A path of None disables tracing.
+    """
+    global _exporter
+    if _exporter is not None:
+        _exporter.close()
+        _exporter = None
+    if path:
+        _exporter = _Exporter(path, sample_rate, max_bytes, backup_count, rand)
+        logger.info(f"Writing {sample_rate:.0%} of traces to {path}")
+
+
+def current_span():
+    """Return the active span of a sampled trace, or None."""
+    return _current.get()
+
+
+@contextmanager
+def _activate(span):
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.set(error=repr(e))
+        raise
+    finally:
+        _current.reset(token)
+        if _exporter is not None:
+            _exporter.export(span, time.time())
+
+
+@contextmanager
+def trace(name, lane=None, **attributes):
+    """
+    Start a new trace whose root span covers the enclosed block, e.g. one read cycle.
+
+    :param lane: Timeline the trace is shown on in a viewer, by default its endpoint or name
+    """
+    if _exporter is None or not _exporter.sampled():
+        token = _current.set(None)
+        try:
+            yield _NOOP_SPAN
+        finally:
+            _current.reset(token)
+        return
+    lane = lane or attributes.get("endpoint") or name
+    with _activate(Span(name, os.urandom(16).hex(), None, lane, attributes)) as span:
+        yield span
+
+
+@contextmanager
+def span(name, parent=None, lane=None, **attributes):
+    """
+    Time the enclosed block as a child of the active span, or of parent (e.g. a
+    span handed over to another task). Does nothing outside a sampled trace.
+    """
+    parent = parent or _current.get()
+    if parent is None or _exporter is None:
+        yield _NOOP_SPAN
+        return
+    with _activate(Span(name, parent.trace_id, parent.span_id, lane or parent.lane, attributes)) as child:
+        yield child
@@ -0,0 +1,154 @@
+import logging
+import time
+from operator import itemgetter
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Python types aggregated as numbers; booleans and enums' strings are not
+NUMERIC_TYPES = (int, float)
+
+
+class WindowAggregator:
+    """
+    Windowed aggregates (min, max, mean, stddev, count, first, last) of the
+    numeric variables of a polled ReadPlan.
+
+    Fast samples are written into a preallocated NumPy buffer with one row per
+    sample and one column per numeric slot of the plan, so a window is
+    aggregated with a few vectorized operations instead of per-value loops.
+    A window closes with its samples_per_window-th sample, or with the first
+    sample once window seconds have passed (e.g. after skipped cycles), and the
+    buffer is reused for the next window. Samples with a bad StatusCode (None)
+    and values that are not numbers are left out of the aggregates.
+    """
+
+    def __init__(self, samples_per_window, window, clock=time.monotonic):
+        """
+        :param samples_per_window: Number of samples in a full window
+        :param window: Window length in seconds
+        """
+        self.samples_per_window = max(1, samples_per_window)
+        self.window = window
+        self._clock = clock
+        self.plan = None
+        self._slots = []  # Buffer column -> plan slot
+        self._getter = None
+        self._buffer = None
+        self._count = 0
+        self._started = None
+        self._first_tsp = None
+        self.windows = 0
+
+    def _start_window(self, plan, values, now, tsp):
+        # Slots are classified at the start of every window, so variables that were
+        # bad (None) when the plan started are picked up in a later window
+        slots = [slot for slot, value in enumerate(values) if _is_number(value)]
+        if plan is not self.plan or slots != self._slots:
+            self.plan = plan
+            self._slots = slots
+            if len(slots) == 1:
+                self._getter = lambda values, slot=slots[0]: (values[slot],)
+            else:
+                self._getter = itemgetter(*slots) if slots else None
+            self._buffer = np.empty((self.samples_per_window, len(slots)), dtype=np.float64)
+        self._count = 0
+        self._started = now
+        self._first_tsp = tsp
+
+    def _sample_row(self, values):
+        try:
+            return np.array(self._getter(values), dtype=np.float64)
+        except (TypeError, ValueError):
+            # A slot changed its type, e.g. to a string or an array
+            return np.array(
+                [values[slot] if _is_number(values[slot]) else None for slot in self._slots], dtype=np.float64
+            )
+
+    def add(self, plan, tsp, values):
+        """
+        Add a sample of all variables of the plan.
+
+        :param plan: ReadPlan the values were read with; a different plan discards the open window
+        :param tsp: Timestamp of the read
+        :param values: Values in plan order, None for a bad StatusCode
+        :return: Aggregate rows if the sample closed a window, else None
+        """
+        now = self._clock()
+        if plan is not self.plan and self._count:
+            logger.debug(f"Discarding an aggregation window of {self._count} samples for a new plan")
+            self._count = 0
+        if not self._count:
+            self._start_window(plan, values, now, tsp)
+
+        if self._getter is not None:
+            self._buffer[self._count] = self._sample_row(values)
+        self._count += 1
+
+        if self._count >= self.samples_per_window or now - self._started >= self.window:
+            return self.flush(tsp)
+        return None
+
+    def flush(self, tsp):
+        """
+        Close the open window.
+
+        :param tsp: Timestamp of the window end
+        :return: List of {"tsp", "window_start", "variable", "count", "min", "max", "mean",
+                 "stddev", "first", "last"} rows for every numeric variable with valid samples
+        """
+        count = self._count
+        self._count = 0
+        self.windows += 1
+        if not count or not self._slots:
+            return []
+
+        window = self._buffer[:count]
+        valid = ~np.isnan(window)
+        counts = valid.sum(axis=0)
+        present = counts > 0
+        divisor = np.where(present, counts, 1)
+        columns = np.arange(window.shape[1])
+        first = window[valid.argmax(axis=0), columns]
+        last = window[count - 1 - valid[::-1].argmax(axis=0), columns]
+        minimum = np.where(valid, window, np.inf).min(axis=0)
+        maximum = np.where(valid, window, -np.inf).max(axis=0)
+        # Summing deviations from the first sample keeps constant signals exact
+        deviations = np.where(valid, window - first, 0.0)
+        offset = deviations.sum(axis=0) / divisor
+        mean = first + offset
+        stddev = np.sqrt((np.where(valid, deviations - offset, 0.0) ** 2).sum(axis=0) / divisor)
+
+        paths = self.plan.paths
+        window_start = self._first_tsp
+        return [
+            {
+                "tsp": tsp,
+                "window_start": window_start,
+                "variable": paths[slot],
+                "count": n,
+                "min": low,
+                "max": high,
+                "mean": avg,
+                "stddev": std,
+                "first": head,
+                "last": tail,
+            }
+            for slot, is_present, n, low, high, avg, std, head, tail in zip(
+                self._slots,
+                present.tolist(),
+                counts.tolist(),
+                minimum.tolist(),
+                maximum.tolist(),
+                mean.tolist(),
+                stddev.tolist(),
+                first.tolist(),
+                last.tolist(),
+            )
+            if is_present
+        ]
+
+
+def _is_number(value):
+    return isinstance(value, NUMERIC_TYPES) and not isinstance(value, bool)